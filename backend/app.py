@@ -1,301 +1,1013 @@
+"""
+iCore card API.
+
+create_app() builds the Flask app around the `api` blueprint. pybaseball,
+pandas and pyarrow are only imported by the code paths that use them, so
+importing this module (each worker boot, each reloader restart) stays
+fast. With preload, create_app also imports them up front, loads the
+player registry and reads the most recently built cards into the memory
+cache, so workers forked from a preloaded master share all of it
+copy-on-write. Startup phases are reported as icore_startup_seconds on
+/metrics.
+
+Usage:
+    python app.py                                   # development server
+    ICORE_PRELOAD=1 python app.py
+    gunicorn --preload -w 4 "app:create_app(preload=True)"
+"""
+import time
+
+# Measured from here: what importing this module costs a worker
+IMPORT_START = time.perf_counter()
+
 import os
 import json
-from flask import Flask, request, jsonify, make_response
-import pandas as pd
-from io import StringIO
+import cProfile
+import gc
+import gzip
+import hashlib
+import importlib
+import math
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+import numpy as np
 from flask_cors import CORS
-from pybaseball import playerid_lookup, statcast_pitcher, statcast_batter
 import random
-
-app = Flask(__name__)
-CORS(app)
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+
+import card_windows
+import statcast_ingest
+import statcast_store
+from card_windows import CardWindow
+from player_registry import ALLPLAYERS_SEASON, get_registry
+
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER, HAND_COLUMNS
+import card_format
+from card_cache import CardCache, Encoded
+from job_queue import JobError, JobQueue
+from matchup_matrix import load_matrix as load_matchup_matrix
+from card_engine import build_card, card_from_counts, count_tensor, ranges_from_counts, count_frequencies_from_counts
+from metrics import BYTES_BUCKETS, metrics
+from dice_tables import NO_RESULT
+from simulator import CARDS, MAX_ROLLS, MAX_SIMULATIONS, resolve_rolls, simulate_matchup
+from game_simulator import GAMES_PER_SEASON, LINEUP_SIZE, MAX_GAMES, simulate_games, simulate_seasons
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with metrics.stage("json_encode"):
+            return super().dumps(obj, **kwargs)
+
+api = Blueprint("api", __name__)
 
 DATA_FOLDER = "data"
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
-ALL_EVENTS_ORDER = [
-    "strikeout", "sac_fly_double_play", "double_play_combined", "field_out_ground_ball", "field_out_popup", "field_out_fly_ball", "field_out_line_drive", 
-    "field_error", "truncated_pa", "catcher_interf", "walk", "hit_by_pitch",
-    "single", "double", "triple", "home_run"
-]
-
-# Update EVENT_GROUPS to only combine necessary events, leaving out field outs to be distinct
-EVENT_GROUPS = {
-    "grounded_into_double_play": "double_play_combined",
-    "sac_fly_double_play": "double_play_combined",
-    "double_play": "double_play_combined",
-    "sac_fly": "field_out_fly_ball",
-    "strikeout": "strikeout",
-    "strikeout_double_play": "strikeout",
-    "fielders_choice_out": "field_out_ground_ball",
-    "truncated_pa": "field_out_ground_ball",
-    "fielders_choice": "field_out_ground_ball",
-    "sac_bunt": "field_out_ground_ball",
-    "force_out": "field_out_ground_ball",
-    "intent_walk": "walk",
-    "walk": "walk",
-    "catcher_interf": "walk",
-    # You can add more mappings if necessary
-}
-
-COUNT_ORDER = ["(0-0)", "(0-1)", "(0-2)", "(1-0)", "(1-1)", "(1-2)", "(2-0)", "(2-1)", "(2-2)", "(3-0)", "(3-1)", "(3-2)"]
+card_cache = CardCache(os.path.join(DATA_FOLDER, "cards"))
+metrics.add_collector(lambda: [
+    ("card_cache_total", {"result": f"{tier}_hit"}, hits) for tier, hits in card_cache.stats()["hits"].items()
+] + [("card_cache_total", {"result": "miss"}, card_cache.stats()["misses"])])
+
+# Opt-in cProfile dumps of individual requests: a fraction sampled at random
+# (ICORE_PROFILE_SAMPLE_RATE) and, in debug or with ICORE_PROFILE_HEADER=1,
+# any request sent with "X-Profile: 1". Off by default.
+PROFILE_SAMPLE_RATE = float(os.environ.get("ICORE_PROFILE_SAMPLE_RATE", 0))
+PROFILE_HEADER_ENABLED = os.environ.get("ICORE_PROFILE_HEADER") == "1"
+PROFILE_FOLDER = os.path.join(DATA_FOLDER, "profiles")
+
+# Optional warm start (ICORE_PRELOAD=1 for the module-level app): the heavy
+# libraries, the player registry and up to PRELOAD_CARDS of the most
+# recently built cards, pre-encoded as PRELOAD_FORMATS
+PRELOAD = os.environ.get("ICORE_PRELOAD") == "1"
+PRELOAD_CARDS = int(os.environ.get("ICORE_PRELOAD_CARDS", 1000))
+PRELOAD_FORMATS = ("json",)
+PRELOAD_MODULES = ("pandas", "pyarrow.parquet", "pybaseball")
 
 def calculate_event_ranges_for_counts(stats, player_type):
     print(f"Processing stats for {player_type} event ranges")
-    stats = stats.dropna(subset=['events'])
-
-    # Separate stats based on handedness
-    if player_type == 'batter':
-        lefty_stats = stats[stats['p_throws'] == 'L']  # Left-handed pitchers
-        righty_stats = stats[stats['p_throws'] == 'R']  # Right-handed pitchers
-    elif player_type == 'pitcher':
-        lefty_stats = stats[stats['stand'] == 'L']  # Left-handed batters
-        righty_stats = stats[stats['stand'] == 'R']  # Right-handed batters
-
-    lefty_results = calculate_ranges(lefty_stats)
-    righty_results = calculate_ranges(righty_stats)
-
-    return {
-        "lefty": lefty_results,
-        "righty": righty_results
-    }
+    return build_card(stats, player_type)["event_ranges"]
 
 def calculate_ranges(subset):
-    event_ranges = []
-
-    for (balls, strikes), group in subset.groupby(['balls', 'strikes']):
-        total_count = group.shape[0]
-        current_start = 0
-        grouped_data = []
-
-        # Initialize events dictionary and counts to 0 for all events in ALL_EVENTS_ORDER
-        events_dict = {event_name: 0 for event_name in ALL_EVENTS_ORDER}
-        event_counts = {event_name: 0 for event_name in ALL_EVENTS_ORDER}
-
-        for event, event_group in group.groupby('events'):
-            # Combine events based on the grouping dictionary if applicable
-            combined_event = EVENT_GROUPS.get(event, event)
-
-            if event == 'field_out':
-                # Further classify field_out based on bb_type (batted ball type)
-                for bb_type, bb_group in event_group.groupby('bb_type'):
-                    if bb_type == 'fly_ball':
-                        combined_event = 'field_out_fly_ball'
-                    elif bb_type == 'popup':
-                        combined_event = 'field_out_popup'
-                    elif bb_type == 'line_drive':
-                        combined_event = 'field_out_line_drive'
-                    elif bb_type == 'ground_ball':
-                        combined_event = 'field_out_ground_ball'
-
-                    # Update events dictionary and counts
-                    event_count = bb_group.shape[0]
-                    events_dict[combined_event] += event_count / total_count
-                    event_counts[combined_event] += event_count
-            else:
-                # Update events dictionary and counts for non-field_out events
-                event_count = event_group.shape[0]
-                events_dict[combined_event] += event_count / total_count
-                event_counts[combined_event] += event_count
-
-        # Create ranges based on the order defined in ALL_EVENTS_ORDER
-        for event_name in ALL_EVENTS_ORDER:
-            if events_dict[event_name] > 0:
-                decimal_value = events_dict[event_name]
-                range_size = int(decimal_value * 1000)
-
-                # Append the event with the corrected count as the size of the range
-                grouped_data.append({
-                    'balls': int(balls),
-                    'strikes': int(strikes),
-                    'event': event_name,
-                    'decimal_value': float(decimal_value),
-                    'range_start': int(current_start),
-                    'range_end': int(current_start + range_size - 1),
-                    'count_label': f"({int(balls)}-{int(strikes)})",
-                    'chances': round(decimal_value * 100, 2),
-                    'chance_bar_width': int(decimal_value * 100)
-                })
-
-                current_start += range_size
-                if current_start > 999:
-                    current_start = 999
-
-        # Adjust the last range to end at 999 if necessary
-        if grouped_data and grouped_data[-1]['range_end'] != 999:
-            grouped_data[-1]['range_end'] = 999
-
-        event_ranges.extend(grouped_data)
-
-    return event_ranges
+    counts, _ = count_tensor(subset)
+    return ranges_from_counts(counts[0].sum(axis=0))
 
 
 def calculate_count_frequencies(stats):
-    stats_with_results = stats.dropna(subset=['events'])
-    
-    if stats_with_results.empty:
-        print("No events found in stats, returning empty count frequencies.")
-        return pd.DataFrame(columns=['count_label', 'range_start', 'range_end'])
+    import pandas as pd
 
-    count_frequencies = stats_with_results.groupby(['balls', 'strikes']).size().reset_index(name='count')
-    total_counts = count_frequencies['count'].sum()
-    count_frequencies['percentage'] = (count_frequencies['count'] / total_counts) * 100
+    counts, _ = count_tensor(stats)
+    records = count_frequencies_from_counts(counts[0].sum(axis=(0, 3)))
 
-    # Sort count_frequencies by the same order as COUNT_ORDER
-    count_frequencies['count_label'] = count_frequencies.apply(
-        lambda row: f"({int(row['balls'])}-{int(row['strikes'])})", axis=1
-    )
-    count_frequencies['count_label'] = pd.Categorical(
-        count_frequencies['count_label'], categories=COUNT_ORDER, ordered=True
-    )
-    count_frequencies = count_frequencies.sort_values('count_label')
+    if not records:
+        print("No events found in stats, returning empty count frequencies.")
 
-    current_start = 0
-    count_frequencies['range_start'] = 0
-    count_frequencies['range_end'] = 0
+    return pd.DataFrame(records, columns=['count_label', 'range_start', 'range_end'])
 
-    for i, row in count_frequencies.iterrows():
-        range_size = int((row['percentage'] / 100) * 1000)
-        count_frequencies.at[i, 'range_start'] = int(current_start)
-        count_frequencies.at[i, 'range_end'] = int(current_start + range_size - 1)
-        current_start += range_size
+def statcast_batter(start_dt, end_dt, player_id):
+    from pybaseball import statcast_batter
 
-        if current_start > 999:
-            current_start = 999
-            count_frequencies.at[i, 'range_end'] = 999
+    return statcast_batter(start_dt, end_dt, player_id)
 
-    # Remove NaN values that may have arisen
-    count_frequencies.dropna(subset=['count_label'], inplace=True)
+def statcast_pitcher(start_dt, end_dt, player_id):
+    from pybaseball import statcast_pitcher
 
-    return count_frequencies[['count_label', 'range_start', 'range_end']].astype({
-        'range_start': int,
-        'range_end': int
-    })
+    return statcast_pitcher(start_dt, end_dt, player_id)
 
-def get_player_stats(first_name, last_name, year):
-    player = playerid_lookup(last_name, first_name)
-    if player.empty:
-        return None, "Player not found"
+STATCAST_FETCHERS = {
+    "batter": statcast_batter,
+    "pitcher": statcast_pitcher
+}
 
-    player_id = player.iloc[0]['key_mlbam']
+# Independent player loads within one request run concurrently, each bounded
+# by FETCH_TIMEOUT seconds
+FETCH_TIMEOUT = 120
+fetch_executor = ThreadPoolExecutor(max_workers=16)
+
+# Savant pulls go through statcast_ingest in month-long chunks. Chunks that
+# finished before a failed pull are kept under PARTIAL_FOLDER, so the retry
+# only fetches the rest.
+SAVANT_CHUNK_DAYS = 31
+SAVANT_WORKERS = 4
+# Savant requests in flight across every build in this process
+SAVANT_MAX_REQUESTS = 8
+savant_requests = threading.BoundedSemaphore(SAVANT_MAX_REQUESTS)
+PARTIAL_FOLDER = os.path.join(DATA_FOLDER, "statcast_partial")
+
+# Most seasons one season_weights card may blend
+MAX_BLEND_SEASONS = 10
+
+# Batch card requests run on their own pool, so a large batch queues behind
+# itself instead of in front of interactive loads on fetch_executor
+MAX_BATCH = 2000
+BATCH_TIMEOUT = 900
+batch_executor = ThreadPoolExecutor(max_workers=4)
+
+# Async mode: cache misses become background jobs that clients poll, with
+# identical requests sharing one job
+jobs = JobQueue(max_workers=8)
+MAX_JOB_WAIT = 30
+
+@api.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    if (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE) or (
+            request.headers.get('X-Profile') == '1' and (current_app.debug or PROFILE_HEADER_ENABLED)):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@api.after_app_request
+def record_request_metrics(response):
+    # Labelled by view name, without the "api." blueprint prefix
+    endpoint = request.endpoint.rpartition('.')[2] if request.endpoint else "unknown"
+    metrics.observe("request_seconds", time.perf_counter() - g.request_start, endpoint=endpoint, status=response.status_code)
+    size = response.calculate_content_length()
+    if size is not None:
+        metrics.observe("response_bytes", size, buckets=BYTES_BUCKETS, endpoint=endpoint)
+
+    if g.get('profiler') is not None:
+        g.profiler.disable()
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        path = os.path.join(PROFILE_FOLDER, f"{endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(g.profiler):x}.prof")
+        g.profiler.dump_stats(path)
+        response.headers['X-Profile-File'] = path
+    return response
+
+@api.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def season_dates(year):
+    """
+    First and last date a season card covers.
+    """
+    return f'{year}-03-25', f'{year}-10-31'
+
+def fetch_season_stats(year, player_id, player_type, start_dt=None, end_dt=None):
+    """
+    One role's events for a season (or the part of it between start_dt and
+    end_dt), read from the local Statcast store when the season has been
+    loaded and fetched from Savant otherwise.
+    """
+    season_start, season_end = season_dates(year)
+    start_dt, end_dt = start_dt or season_start, end_dt or season_end
+    source = "store" if statcast_store.has_season(year) else "savant"
+    with metrics.stage("fetch", source=source):
+        if source == "store":
+            stats = statcast_store.read_player(year, player_id, player_type, start_date=start_dt, end_date=end_dt)
+        else:
+            fetch = STATCAST_FETCHERS[player_type]
+
+            def fetch_chunk(chunk_start, chunk_end):
+                with savant_requests:
+                    return fetch(chunk_start, chunk_end, player_id)
+
+            stats = statcast_ingest.ingest(
+                fetch_chunk, start_dt, end_dt, os.path.join(PARTIAL_FOLDER, player_type, f"{player_id}_{start_dt}_{end_dt}"),
+                SAVANT_CHUNK_DAYS, SAVANT_WORKERS, save_every_chunk=False)
+    if stats is not None:
+        metrics.count("rows_processed_total", len(stats), stage="fetch")
+    return stats
+
+def resolve_player_id(first_name, last_name, year, player_type):
+    """
+    MLBAM id for a (name, season, role) request. Returns (player_id, error).
+    """
+    with metrics.stage("resolve"):
+        player, error = get_registry().resolve(first_name, last_name, year, player_type)
+    if error:
+        return None, error
+    if player['key_mlbam'] < 0:
+        return None, f"No MLBAM id on record for {first_name} {last_name}"
+    return player['key_mlbam'], None
+
+def get_player_stats_by_id(player_id, year, player_type, start_dt=None, end_dt=None):
+    """
+    Fetch only the requested role's events. Returns (stats, error); stats is
+    None without an error when the player has no events in that role.
+    """
     try:
-        batter_stats = statcast_batter(f'{year}-03-25', f'{year}-10-31', player_id)
-        pitcher_stats = statcast_pitcher(f'{year}-03-25', f'{year}-10-31', player_id)
-
-        if batter_stats.empty and pitcher_stats.empty:
-            return None, f"No stats available for {first_name} {last_name} in {year}"
-
-        return {
-            "batter": batter_stats if not batter_stats.empty else None,
-            "pitcher": pitcher_stats if not pitcher_stats.empty else None
-        }, None
+        stats = fetch_season_stats(year, player_id, player_type, start_dt, end_dt)
+        if stats is None or stats.empty:
+            return None, None
+        return stats, None
     except Exception as e:
         return None, str(e)
 
-@app.route('/api/get_both_stats', methods=['POST'])
-def get_both_stats():
-    data = request.json
-    batter_data = data.get('batter', {})
-    pitcher_data = data.get('pitcher', {})
+def get_player_stats(first_name, last_name, year, player_type):
+    if player_type not in STATCAST_FETCHERS:
+        return None, "Invalid player type. Use 'batter' or 'pitcher'."
 
+    player_id, error = resolve_player_id(first_name, last_name, year, player_type)
+    if error:
+        return None, error
+    return get_player_stats_by_id(player_id, year, player_type)
+
+def build_player_card(player_id, year, player_type):
+    """
+    Fetch and build one card. Returns (card, cacheable) for CardCache;
+    errors and missing roles are passed through but never cached. year may
+    be a CardWindow for a date-window or multi-season card.
+    """
+    if isinstance(year, CardWindow):
+        return build_window_card(player_id, year, player_type)
+
+    stats, error = get_player_stats_by_id(player_id, year, player_type)
+    if error:
+        return {"error": error}, False
+    if stats is None:
+        return None, False
+
+    # build_card, split so tallying and range computation are timed separately
+    with metrics.stage("count_tensor"):
+        counts, _ = count_tensor(stats, HAND_COLUMNS[player_type])
+    with metrics.stage("card_ranges"):
+        card = card_from_counts(counts[0])
+    metrics.count("rows_processed_total", len(stats), stage="build_card")
+    return card, True
+
+def build_window_card(player_id, window, player_type):
+    """
+    Build a card over a date window or a weighted blend of seasons. Each
+    season's counts come from its prefix-sum tensors when they have been
+    built (card_windows.py) and from a fetch of just that window otherwise;
+    they are weighted and summed before the ranges are computed. Like
+    statcast_ingest's chunks, a window that ends today or later can still
+    gain games, so its card is not cached.
+    """
+    today = date.today().isoformat()
+    total = None
+    cacheable = True
+    for year, weight in window.seasons:
+        season_start, season_end = season_dates(year)
+        start_dt, end_dt = window.start_date or season_start, window.end_date or season_end
+        cacheable = cacheable and end_dt < today
+        with metrics.stage("window_counts"):
+            counts = card_windows.window_counts(year, player_id, player_type, start_dt, end_dt)
+        if counts is None:
+            stats, error = get_player_stats_by_id(player_id, year, player_type, start_dt, end_dt)
+            if error:
+                return {"error": error}, False
+            if stats is None:
+                continue
+            with metrics.stage("count_tensor"):
+                counts = card_windows.trim_counts(count_tensor(stats, HAND_COLUMNS[player_type])[0][0])
+        counts = counts if weight == 1 else counts * weight
+        total = counts if total is None else total + counts
+
+    if total is None or not total.any():
+        return None, False
+    with metrics.stage("card_ranges"):
+        return card_from_counts(total), cacheable
+
+def card_window(player_data):
+    """
+    The window a request asks for: start_date / end_date (YYYY-MM-DD, within
+    one season) or season_weights ({"2022": 3, "2023": 4, "2024": 5}).
+    Returns (CardWindow, error); the window is None for a whole-season card.
+    """
+    season_weights = player_data.get('season_weights')
+    start_date, end_date = player_data.get('start_date'), player_data.get('end_date')
+    if season_weights:
+        if start_date or end_date:
+            return None, "season_weights cannot be combined with start_date or end_date"
+        try:
+            seasons = tuple(sorted((int(year), float(weight)) for year, weight in dict(season_weights).items()))
+        except (TypeError, ValueError):
+            return None, "season_weights must map seasons to numeric weights"
+        if (len(seasons) > MAX_BLEND_SEASONS or not all(math.isfinite(weight) and weight >= 0 for _, weight in seasons)
+                or not any(weight for _, weight in seasons)):
+            return None, f"season_weights needs 1 to {MAX_BLEND_SEASONS} seasons with finite, non-negative weights, not all zero"
+        return CardWindow(seasons, None, None), None
+
+    if not start_date and not end_date:
+        return None, None
+    try:
+        start = date.fromisoformat(start_date) if start_date else None
+        end = date.fromisoformat(end_date) if end_date else None
+    except (TypeError, ValueError):
+        return None, "start_date and end_date must be YYYY-MM-DD"
+    if start and end and (start.year != end.year or end < start):
+        return None, "start_date and end_date must be in order and in the same season"
+    year = (start or end).year
+    if end is None:
+        # Pinned, so an open window's key names the days it actually covers
+        end = min(date.fromisoformat(season_dates(year)[1]), date.today())
+        if start and end < start:
+            return None, "start_date must not be later than today or the end of its season"
+    return CardWindow(((year, 1.0),), start and start.isoformat(), end.isoformat()), None
+
+def card_key(player_data, player_type):
+    """
+    Card cache key (player_id, year, player_type) for a request's player,
+    with a CardWindow in place of the year for windowed cards.
+    Returns (key, error).
+    """
+    if player_type not in STATCAST_FETCHERS:
+        return None, "Invalid player type. Use 'batter' or 'pitcher'."
+    window, error = card_window(player_data)
+    if error:
+        return None, error
+    if window is not None:
+        # Names resolve against the latest season in the window
+        year = window.seasons[-1][0]
+    else:
+        try:
+            year = int(player_data.get('year'))
+        except (TypeError, ValueError):
+            return None, "A valid year is required"
+
+    player_id, error = resolve_player_id(player_data.get('first_name'), player_data.get('last_name'), year, player_type)
+    if error:
+        return None, error
+    return (player_id, window or year, player_type), None
+
+def load_player_card(player_data, player_type):
+    """
+    Return the card for a player/year/role from the card cache, building it
+    on a miss. Returns {"error": ...} when the lookup fails and None when the
+    player has no stats for that role.
+    """
+    key, error = card_key(player_data, player_type)
+    if error:
+        return {"error": error}
+    return load_card_by_id(*key)
+
+def load_card_by_id(player_id, year, player_type):
+    return card_cache.get_or_build(
+        (player_id, year, player_type),
+        lambda: build_player_card(player_id, year, player_type)
+    )
+
+def load_card_spec(spec):
+    """
+    Load one batch entry, by 'player_id' (MLBAM) when given and by name
+    otherwise.
+    """
+    player_type = spec.get('player_type')
+    if spec.get('player_id') is None:
+        return load_player_card(spec, player_type)
+
+    if player_type not in STATCAST_FETCHERS:
+        return {"error": "Invalid player type. Use 'batter' or 'pitcher'."}
+    window, error = card_window(spec)
+    if error:
+        return {"error": error}
+    try:
+        return load_card_by_id(int(spec['player_id']), window or int(spec.get('year')), player_type)
+    except (TypeError, ValueError):
+        return {"error": "player_id and year must be integers"}
+
+def roster_specs(team, year, player_type=None):
+    """
+    Batch specs for every player on a team in 2024allplayers.csv, one per
+    card role their appearances call for (optionally just one role). Players
+    without an MLBAM id get a spec carrying an error instead of falling back
+    to a name lookup that could find someone else.
+    """
+    specs = []
+    for player, roles in get_registry().roster(team):
+        for role in roles:
+            if player_type and role != player_type:
+                continue
+            spec = {
+                "first_name": player["name_first"],
+                "last_name": player["name_last"],
+                "key_retro": player["key_retro"],
+                "player_id": None,
+                "year": year,
+                "player_type": role
+            }
+            if player["key_mlbam"] >= 0:
+                spec["player_id"] = player["key_mlbam"]
+            else:
+                spec["error"] = f"No MLBAM id on record for {player['name_first']} {player['name_last']}"
+            specs.append(spec)
+    return specs
+
+def batch_line(index, spec, card):
+    """
+    One NDJSON line of a batch response.
+    """
+    line = {
+        "index": index,
+        "first_name": spec.get("first_name"),
+        "last_name": spec.get("last_name"),
+        "player_id": spec.get("player_id"),
+        "year": spec.get("year"),
+        "player_type": spec.get("player_type")
+    }
+    if card is None:
+        line["error"] = f"No {spec.get('player_type')} stats found for this player"
+    elif "error" in card:
+        line["error"] = card["error"]
+    else:
+        line["card"] = card
+    with metrics.stage("json_encode"):
+        encoded = json.dumps(line, separators=(',', ':')) + "\n"
+    metrics.count("response_bytes_streamed_total", len(encoded), endpoint="get_cards")
+    return encoded
+
+def load_player_cards(specs, timeout=FETCH_TIMEOUT):
+    """
+    Load several (player_data, player_type) cards concurrently, so the total
+    time is bounded by the slowest single load. A load still running after
+    timeout seconds is reported as an error.
+    """
+    futures = [fetch_executor.submit(load_player_card, player_data, player_type) for player_data, player_type in specs]
+    deadline = time.monotonic() + timeout
+
+    cards = []
+    for future, (player_data, player_type) in zip(futures, specs):
+        try:
+            cards.append(future.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            cards.append({"error": f"Timed out loading {player_type} stats after {timeout}s"})
+    return cards
+
+def wants_async():
+    """
+    Clients opt in to async mode with "Prefer: respond-async" or ?async=1.
+    """
+    return 'respond-async' in request.headers.get('Prefer', '') or request.args.get('async') in ('1', 'true')
+
+def is_cached(player_data, player_type):
+    """
+    True when a request for this card can be answered without building it:
+    the card is cached, or the request fails before any fetch.
+    """
+    key, error = card_key(player_data, player_type)
+    return error is not None or card_cache.get(key) is not None
+
+def job_accepted(job):
+    """
+    202 response pointing the client at a job to poll.
+    """
+    response = jsonify({**job.to_dict(), "poll": f"/api/jobs/{job.id}"})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response
+
+def requested_card_format():
+    """
+    The card payload format a request asks for (see card_format): ?format=
+    when given, else the best match for its Accept header, else json.
+    Returns (format, error).
+    """
+    formats = card_format.available_formats()
+    requested = request.args.get('format')
+    if requested:
+        if requested not in formats:
+            return None, f"Unsupported format '{requested}'; use one of {', '.join(formats)}"
+        return requested, None
+    mimetypes = {card_format.MIMETYPES[name]: name for name in formats}
+    return mimetypes.get(request.accept_mimetypes.best_match(list(mimetypes)), "json"), None
+
+def encoded_response(encoded, fmt):
+    """
+    Serve pre-encoded card bytes: 304 when the client's If-None-Match
+    already has them, gzip'd when it accepts gzip.
+    """
+    if request.if_none_match.contains_weak(encoded.etag):
+        response = Response(status=304)
+    elif 'gzip' in request.accept_encodings:
+        response = Response(encoded.gzipped or gzip.compress(encoded.body, compresslevel=6), mimetype=card_format.MIMETYPES[fmt])
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(encoded.body, mimetype=card_format.MIMETYPES[fmt])
+    response.set_etag(encoded.etag, weak=True)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def both_stats(batter_data, pitcher_data):
     results = {
         "batter": None,
         "pitcher": None
     }
 
-    # Process batter
-    if batter_data:
-        batter_filename = f"{batter_data['first_name']}_{batter_data['last_name']}_{batter_data['year']}_batter.json"
-        batter_filepath = os.path.join(DATA_FOLDER, batter_filename)
+    # Load batter and pitcher in parallel
+    specs = [(player_data, player_type) for player_type, player_data in
+             (("batter", batter_data), ("pitcher", pitcher_data)) if player_data]
+    for (_, player_type), card in zip(specs, load_player_cards(specs)):
+        results[player_type] = card
+    return results
+
+def formatted_both_stats(batter_data, pitcher_data, fmt):
+    """
+    both_stats for a background job, with the cards in fmt's layout. Poll
+    responses are JSON, so msgpack requests get the columnar cards msgpack
+    would carry.
+    """
+    results = both_stats(batter_data, pitcher_data)
+    if fmt == "json":
+        return results
+    return {player_type: card if card is None or "error" in card else card_format.columnar_card(card)
+            for player_type, card in results.items()}
+
+def job_card_key(player_data, player_type):
+    """
+    One card's part of an async job key: its card key, or the spec itself
+    when card_key rejects it, so different bad specs never share a job.
+    """
+    if not player_data:
+        return None
+    key, error = card_key(player_data, player_type)
+    return key if error is None else json.dumps(player_data, sort_keys=True, default=str)
+
+@api.route('/api/get_both_stats', methods=['POST'])
+def get_both_stats():
+    data = request.json
+    batter_data = data.get('batter', {})
+    pitcher_data = data.get('pitcher', {})
 
-        if os.path.isfile(batter_filepath):
-            with open(batter_filepath, 'r') as f:
-                results["batter"] = json.load(f)
-        else:
-            stats, error = get_player_stats(
-                batter_data['first_name'],
-                batter_data['last_name'],
-                batter_data['year']
-            )
-            if error:
-                results["batter"] = {"error": error}
-            elif stats and stats.get("batter") is not None:
-                batter_stats = stats["batter"]
-                batter_results = {
-                    "event_ranges": calculate_event_ranges_for_counts(batter_stats, "batter"),
-                    "count_frequencies": calculate_count_frequencies(batter_stats).to_dict(orient='records')
-                }
-                results["batter"] = batter_results
-
-                with open(batter_filepath, 'w') as f:
-                    json.dump(batter_results, f, indent=4)
-
-    # Process pitcher
-    if pitcher_data:
-        pitcher_filename = f"{pitcher_data['first_name']}_{pitcher_data['last_name']}_{pitcher_data['year']}_pitcher.json"
-        pitcher_filepath = os.path.join(DATA_FOLDER, pitcher_filename)
-
-        if os.path.isfile(pitcher_filepath):
-            with open(pitcher_filepath, 'r') as f:
-                results["pitcher"] = json.load(f)
-        else:
-            stats, error = get_player_stats(
-                pitcher_data['first_name'],
-                pitcher_data['last_name'],
-                pitcher_data['year']
-            )
-            if error:
-                results["pitcher"] = {"error": error}
-            elif stats and stats.get("pitcher") is not None:
-                pitcher_stats = stats["pitcher"]
-                pitcher_results = {
-                    "event_ranges": calculate_event_ranges_for_counts(pitcher_stats, "pitcher"),
-                    "count_frequencies": calculate_count_frequencies(pitcher_stats).to_dict(orient='records')
-                }
-                results["pitcher"] = pitcher_results
+    fmt, error = requested_card_format()
+    if error:
+        return jsonify({"error": error}), 406
+
+    if wants_async() and not all(is_cached(player_data, player_type) for player_type, player_data in
+                                 (("batter", batter_data), ("pitcher", pitcher_data)) if player_data):
+        job_key = ("get_both_stats", fmt) + tuple(
+            job_card_key(player_data, player_type)
+            for player_type, player_data in (("batter", batter_data), ("pitcher", pitcher_data))
+        )
+        job, _ = jobs.submit(job_key, lambda: formatted_both_stats(batter_data, pitcher_data, fmt))
+        return job_accepted(job)
+
+    results = both_stats(batter_data, pitcher_data)
+
+    # Stitch the cards' cached encodings together; only the envelope is new
+    parts = []
+    for player_type, player_data in (("batter", batter_data), ("pitcher", pitcher_data)):
+        key = card_key(player_data, player_type)[0] if player_data else None
+        parts.append((player_type, card_cache.encoded(key, results[player_type], fmt)))
+    body = card_format.envelope([(player_type, encoded.body) for player_type, encoded in parts], fmt)
+    etag = hashlib.sha1("".join(encoded.etag for _, encoded in parts).encode()).hexdigest()[:16]
+    return encoded_response(Encoded(body, None, f"{card_cache.version}-{fmt}-{etag}"), fmt)
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a background job. ?wait=<seconds> long-polls until the job
+    finishes or the wait (at most MAX_JOB_WAIT) runs out. Returns 200 with
+    the result or error once finished and 202 while it is pending.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_JOB_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    if wait:
+        job.wait(wait)
+    if job.status in ("queued", "running"):
+        return job_accepted(job)
+    return jsonify(job.to_dict())
+
+def player_hand(player_data, player_type):
+    """
+    Batting side for batters and throwing arm for pitchers: the request's
+    'bats'/'throws' field, else the registry's Retrosheet handedness, else 'R'.
+    """
+    field = 'bats' if player_type == "batter" else 'throws'
+    if player_data.get(field):
+        return player_data[field]
+    player, _ = get_registry().resolve(
+        player_data.get('first_name'), player_data.get('last_name'), player_data.get('year'), player_type
+    )
+    return (player and player[field]) or 'R'
 
-                with open(pitcher_filepath, 'w') as f:
-                    json.dump(pitcher_results, f, indent=4)
+@api.route('/api/players/search', methods=['GET'])
+def search_players():
+    query = request.args.get('q', '')
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    registry = get_registry()
+    players = registry.search(query, limit)
+    if not players and request.args.get('fuzzy', 'true') != 'false':
+        players = registry.fuzzy_search(query, limit)
+    return jsonify({"players": players})
+
+@api.route('/api/players/resolve', methods=['POST'])
+def resolve_players():
+    specs = request.json.get('players', [])
+    results = []
+    for player, error in get_registry().resolve_many(specs):
+        results.append({"error": error} if error else player)
+    return jsonify({"players": results})
+
+@api.route('/api/simulate', methods=['POST'])
+def simulate():
+    data = request.json
+    batter_data = data.get('batter', {})
+    pitcher_data = data.get('pitcher', {})
+    if not batter_data or not pitcher_data:
+        return jsonify({"error": "Both a batter and a pitcher are required"}), 400
 
-    return jsonify(results)
+    try:
+        n = int(data.get('n', 1_000_000))
+        seed = data.get('seed')
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "n and seed must be integers"}), 400
+    if not 0 < n <= MAX_SIMULATIONS:
+        return jsonify({"error": f"n must be between 1 and {MAX_SIMULATIONS}"}), 400
+
+    batter_hand = player_hand(batter_data, "batter")
+    pitcher_hand = player_hand(pitcher_data, "pitcher")
+    if batter_hand not in ('L', 'R', 'S', 'B') or pitcher_hand not in ('L', 'R'):
+        return jsonify({"error": "bats must be L, R or S and throws must be L or R"}), 400
+
+    cards = {}
+    specs = [(batter_data, "batter"), (pitcher_data, "pitcher")]
+    for (_, player_type), card in zip(specs, load_player_cards(specs)):
+        if card is None:
+            return jsonify({"error": f"No {player_type} stats found for this player"}), 400
+        if "error" in card:
+            return jsonify({"error": card["error"]}), 400
+        cards[player_type] = card
+
+    summary, error = simulate_matchup(cards["batter"], cards["pitcher"], n, batter_hand, pitcher_hand, seed)
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(summary)
+
+def dice_rolls(data):
+    """
+    The [n, 3] (count, card, event) dice of a roll request: the given
+    'rolls', or 'n' random ones (optionally seeded). Returns (rolls, error).
+    """
+    if data.get('rolls') is not None:
+        try:
+            rolls = np.asarray(data['rolls'], dtype=np.int64)
+        except (TypeError, ValueError, OverflowError):
+            return None, "rolls must be a list of [count roll, card roll, event roll] integers"
+        if rolls.ndim != 2 or rolls.shape[1] != 3 or not 0 < len(rolls) <= MAX_ROLLS:
+            return None, f"rolls must be a list of 1 to {MAX_ROLLS} [count roll, card roll, event roll] triples"
+        if rolls.min() < 0 or (rolls.max(axis=0) >= [1000, 100, 1000]).any():
+            return None, "count and event rolls must be 0-999 and card rolls 0-99"
+        return rolls, None
 
-# Keep the original endpoint for backward compatibility
-@app.route('/api/get_stats', methods=['POST'])
-def get_stats():
+    try:
+        n = int(data.get('n', 1))
+        seed = data.get('seed')
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError):
+        return None, "n and seed must be integers"
+    if not 0 < n <= MAX_ROLLS:
+        return None, f"n must be between 1 and {MAX_ROLLS}"
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, [1000, 100, 1000], size=(n, 3)), None
+
+@api.route('/api/roll', methods=['POST'])
+def roll():
+    """
+    Resolve dice against a batter and pitcher card the way the frontend
+    does, by lookups in the cards' dice tables. Results are codes into the
+    returned counts / cards / events lists, -1 where the dice land in a gap.
+    """
     data = request.json
-    first_name = data.get('first_name')
-    last_name = data.get('last_name')
-    year = data.get('year')
-    player_type = data.get('player_type')
+    batter_data = data.get('batter', {})
+    pitcher_data = data.get('pitcher', {})
+    if not batter_data or not pitcher_data:
+        return jsonify({"error": "Both a batter and a pitcher are required"}), 400
 
-    filename = f"{first_name}_{last_name}_{year}_{player_type}.json".replace(" ", "_")
-    filepath = os.path.join(DATA_FOLDER, filename)
+    rolls, error = dice_rolls(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    if os.path.isfile(filepath):
-        print(f"Loading data from {filepath}")
-        with open(filepath, 'r') as f:
-            return jsonify(json.load(f))
+    batter_hand = player_hand(batter_data, "batter")
+    pitcher_hand = player_hand(pitcher_data, "pitcher")
+    if batter_hand not in ('L', 'R', 'S', 'B') or pitcher_hand not in ('L', 'R'):
+        return jsonify({"error": "bats must be L, R or S and throws must be L or R"}), 400
+
+    cards = {}
+    specs = [(batter_data, "batter"), (pitcher_data, "pitcher")]
+    for (_, player_type), card in zip(specs, load_player_cards(specs)):
+        if card is None:
+            return jsonify({"error": f"No {player_type} stats found for this player"}), 400
+        if "error" in card:
+            return jsonify({"error": card["error"]}), 400
+        cards[player_type] = card
+
+    with metrics.stage("roll"):
+        counts, active_cards, events = resolve_rolls(cards["batter"], cards["pitcher"], rolls, batter_hand, pitcher_hand)
+    metrics.count("rows_processed_total", len(rolls), stage="roll")
+
+    def codes(values):
+        return np.where(values == NO_RESULT, -1, values.astype(np.int16)).tolist()
+
+    return jsonify({
+        "counts": COUNT_ORDER,
+        "cards": CARDS,
+        "events": ALL_EVENTS_ORDER,
+        "rolls": rolls.tolist(),
+        "count": codes(counts),
+        "card": active_cards.tolist(),
+        "event": codes(events),
+    })
 
-    stats, error = get_player_stats(first_name, last_name, year)
+def load_team(team_data):
+    """
+    Load the cards for a team of {"lineup": [batter, ...], "pitcher": pitcher}
+    player specs into the (card, hand) pairs game_simulator expects.
+    Returns (team, error).
+    """
+    lineup_data = team_data.get('lineup', [])
+    pitcher_data = team_data.get('pitcher')
+    if len(lineup_data) != LINEUP_SIZE or not pitcher_data:
+        return None, f"Each team needs a {LINEUP_SIZE}-man lineup and a pitcher"
+
+    specs = [(player_data, "batter") for player_data in lineup_data] + [(pitcher_data, "pitcher")]
+    loaded = []
+    for (player_data, player_type), card in zip(specs, load_player_cards(specs)):
+        name = f"{player_data.get('first_name')} {player_data.get('last_name')}"
+        if card is None:
+            return None, f"No {player_type} stats found for {name}"
+        if "error" in card:
+            return None, f"{name}: {card['error']}"
+        loaded.append((card, player_hand(player_data, player_type)))
+
+    return {"lineup": loaded[:-1], "pitcher": loaded[-1]}, None
+
+def load_teams(data):
+    """
+    Load the away and home teams of a game simulation request.
+    Returns (away, home, error).
+    """
+    teams = []
+    for side in ("away", "home"):
+        team, error = load_team(data.get(side) or {})
+        if error:
+            return None, None, f"{side.capitalize()} team: {error}"
+        teams.append(team)
+    return teams[0], teams[1], None
+
+@api.route('/api/simulate_games', methods=['POST'])
+def simulate_games_endpoint():
+    data = request.json
+    try:
+        n_games = int(data.get('games', 1000))
+        seed = int(data['seed']) if data.get('seed') is not None else None
+        workers = int(data['workers']) if data.get('workers') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "games, seed and workers must be integers"}), 400
+    if not 0 < n_games <= MAX_GAMES:
+        return jsonify({"error": f"games must be between 1 and {MAX_GAMES}"}), 400
+
+    away, home, error = load_teams(data)
     if error:
         return jsonify({"error": error}), 400
 
-    stats_data = stats.get(player_type)
-    if stats_data is None:
-        return jsonify({"error": f"No {player_type} stats found for this player"}), 400
+    try:
+        return jsonify(simulate_games(away, home, n_games, seed, workers))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    player_data = {
-        "event_ranges": calculate_event_ranges_for_counts(stats_data, player_type),
-        "count_frequencies": calculate_count_frequencies(stats_data).to_dict(orient='records')
-    }
+@api.route('/api/simulate_season', methods=['POST'])
+def simulate_season_endpoint():
+    data = request.json
+    try:
+        n_seasons = int(data.get('seasons', 1000))
+        games_per_season = int(data.get('games_per_season', GAMES_PER_SEASON))
+        seed = int(data['seed']) if data.get('seed') is not None else None
+        workers = int(data['workers']) if data.get('workers') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "seasons, games_per_season, seed and workers must be integers"}), 400
+    if n_seasons <= 0 or games_per_season <= 0 or n_seasons * games_per_season > MAX_GAMES:
+        return jsonify({"error": f"seasons x games_per_season must be between 1 and {MAX_GAMES}"}), 400
+
+    away, home, error = load_teams(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     try:
-        with open(filepath, 'w') as f:
-            json.dump(player_data, f, indent=4)
-    except Exception as e:
-        print(f"Error saving data to {filepath}: {e}")
+        return jsonify(simulate_seasons(away, home, n_seasons, games_per_season, seed, workers))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@api.route('/api/matchups', methods=['GET'])
+def get_matchups():
+    """
+    Lookups in a season's precomputed matchup matrix (matchup_matrix.py):
+    one pair with both batter_id and pitcher_id, otherwise a batter's row
+    or a pitcher's column sorted by metric ('woba' or an event's rate;
+    order=desc|asc), optionally only the top k.
+    """
+    try:
+        year = int(request.args.get('year', ALLPLAYERS_SEASON))
+        batter_id = int(request.args['batter_id']) if request.args.get('batter_id') else None
+        pitcher_id = int(request.args['pitcher_id']) if request.args.get('pitcher_id') else None
+        k = int(request.args['k']) if request.args.get('k') else None
+    except ValueError:
+        return jsonify({"error": "year, batter_id, pitcher_id and k must be integers"}), 400
+    metric = request.args.get('metric', 'woba')
+    order = request.args.get('order', 'desc')
+    if batter_id is None and pitcher_id is None:
+        return jsonify({"error": "A batter_id or pitcher_id is required"}), 400
+    if metric != 'woba' and metric not in ALL_EVENTS_ORDER:
+        return jsonify({"error": f"metric must be woba or one of {', '.join(ALL_EVENTS_ORDER)}"}), 400
+    if order not in ('asc', 'desc') or (k is not None and k <= 0):
+        return jsonify({"error": "order must be asc or desc and k must be positive"}), 400
+
+    matrix = load_matchup_matrix(year)
+    if matrix is None:
+        return jsonify({"error": f"No matchup matrix has been built for {year}"}), 404
+
+    if batter_id is not None and pitcher_id is not None:
+        matchup = matrix.pair(batter_id, pitcher_id)
+        if matchup is None:
+            return jsonify({"error": "Player not in the matchup matrix"}), 404
+        return jsonify({"year": year, "matchups": [matchup]})
+
+    player_id, role = (batter_id, "batter") if batter_id is not None else (pitcher_id, "pitcher")
+    matchups = matrix.matchups(player_id, role, metric, k, ascending=order == 'asc')
+    if matchups is None:
+        return jsonify({"error": "Player not in the matchup matrix"}), 404
+    return jsonify({"year": year, "metric": metric, "matchups": matchups})
+
+@api.route('/api/get_cards', methods=['POST'])
+def get_cards():
+    """
+    Build many cards in parallel and stream each as an NDJSON line as soon
+    as it is ready. Accepts {"players": [spec, ...]} where a spec is
+    {first_name, last_name} or {player_id}, plus year and player_type, or
+    {"team": "LAN", "year": 2024} for a whole roster.
+    """
+    data = request.json
+    from_roster = bool(data.get('team'))
+    if from_roster:
+        specs = roster_specs(data['team'], data.get('year', ALLPLAYERS_SEASON), data.get('player_type'))
+    else:
+        specs = data.get('players', [])
+
+    if not specs:
+        return jsonify({"error": "No players requested"}), 400
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        return jsonify({"error": "players must be a list of player objects"}), 400
+    if len(specs) > MAX_BATCH:
+        return jsonify({"error": f"At most {MAX_BATCH} cards per batch"}), 400
+
+    def generate():
+        futures = {}
+        for i, spec in enumerate(specs):
+            if from_roster and "error" in spec:
+                yield batch_line(i, spec, {"error": spec["error"]})
+            else:
+                futures[batch_executor.submit(load_card_spec, spec)] = i
+        try:
+            for future in as_completed(futures, timeout=BATCH_TIMEOUT):
+                i = futures[future]
+                try:
+                    card = future.result()
+                except Exception as e:
+                    card = {"error": str(e)}
+                yield batch_line(i, specs[i], card)
+        except FutureTimeoutError:
+            for future, i in futures.items():
+                if not future.done():
+                    yield batch_line(i, specs[i], {"error": f"Timed out after {BATCH_TIMEOUT}s"})
+        finally:
+            # Timed out or the client went away: drop the builds not started yet
+            for future in futures:
+                future.cancel()
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def card_job(key):
+    """
+    Background build for /api/get_stats: the card, or a JobError with the
+    message the synchronous endpoint would return.
+    """
+    card = load_card_by_id(*key)
+    if card is None:
+        raise JobError(f"No {key[2]} stats found for this player")
+    if "error" in card:
+        raise JobError(card["error"])
+    return card
 
-    return jsonify(player_data)
+# Keep the original endpoint for backward compatibility
+@api.route('/api/get_stats', methods=['POST'])
+def get_stats():
+    data = request.json
+    player_type = data.get('player_type')
+
+    fmt, error = requested_card_format()
+    if error:
+        return jsonify({"error": error}), 406
+    key, error = card_key(data, player_type)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if wants_async():
+        card = card_cache.get(key)
+        if card is None:
+            job, _ = jobs.submit(("get_stats",) + key, lambda: card_job(key))
+            return job_accepted(job)
+        return encoded_response(card_cache.encoded(key, card, fmt), fmt)
+
+    card = load_card_by_id(*key)
+    if card is None:
+        return jsonify({"error": f"No {player_type} stats found for this player"}), 400
+    if "error" in card:
+        return jsonify({"error": card["error"]}), 400
+
+    return encoded_response(card_cache.encoded(key, card, fmt), fmt)
+
+def warm_start(cards=PRELOAD_CARDS, formats=PRELOAD_FORMATS):
+    """
+    Warm this process before it forks workers: import the heavy libraries,
+    load the player registry and read up to `cards` of the most recently
+    built cards (encoded as `formats`) into the memory cache. The heap is
+    then frozen so the workers' garbage collections do not write to, and
+    un-share, the pages holding it.
+    """
+    with metrics.stage("preload", step="imports"):
+        for module in PRELOAD_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                print(f"Preload: skipping {module}: {e}")
+    with metrics.stage("preload", step="registry"):
+        registry = get_registry()
+    with metrics.stage("preload", step="cards"):
+        loaded = card_cache.warm(cards, formats) if cards else 0
+    gc.freeze()
+    print(f"Preloaded {len(registry)} players and {loaded} cards")
+
+def record_startup(phase, seconds):
+    metrics.observe("startup_seconds", seconds, phase=phase)
+
+def create_app(preload=False):
+    """
+    Build the Flask app. With preload=True the process is warmed first (see
+    warm_start()), for servers that fork workers after loading the app.
+    """
+    start = time.perf_counter()
+    flask_app = Flask(__name__)
+    flask_app.json = TimedJSONProvider(flask_app)
+    CORS(flask_app)
+    flask_app.register_blueprint(api)
+    record_startup("create_app", time.perf_counter() - start)
+
+    if preload:
+        start = time.perf_counter()
+        warm_start()
+        record_startup("preload", time.perf_counter() - start)
+    return flask_app
+
+record_startup("import", time.perf_counter() - IMPORT_START)
+
+# The default instance, for `flask run`, `gunicorn app:app` and importers
+# such as precompute_cards.py
+app = create_app(preload=PRELOAD)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Debug mode (and its reloader) stays the default for local runs;
+    # FLASK_DEBUG=0 turns it off
+    app.run(debug=os.environ.get("FLASK_DEBUG", "1") != "0")
@@ -0,0 +1,276 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import card_format
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER, EVENT_GROUPS, FIELD_OUT_BB_TYPES
+from metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# A card serialized for the wire: body, its gzip'd form and an ETag
+Encoded = namedtuple("Encoded", ["body", "gzipped", "etag"])
+
+# Bump when the card builder changes in a way the constants below don't capture
+ENGINE_VERSION = 2
+
+
+def card_version():
+    """
+    Short hash of everything that shapes a card, so cached cards are
+    invalidated automatically when EVENT_GROUPS or the event order changes.
+    """
+    spec = json.dumps([ENGINE_VERSION, ALL_EVENTS_ORDER, EVENT_GROUPS, FIELD_OUT_BB_TYPES, COUNT_ORDER], sort_keys=True)
+    return hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+
+def encode_card(card):
+    """
+    Compact on-disk format: minified JSON, gzip-compressed.
+    """
+    raw = json.dumps(card, separators=(',', ':')).encode()
+    return gzip.compress(raw, compresslevel=6), len(raw)
+
+
+def decode_card(data):
+    raw = gzip.decompress(data)
+    return json.loads(raw), len(raw)
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive inter-process lock held for the duration of the block, so
+    gunicorn workers missing on the same card build it only once.
+    """
+    with open(path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CardCache:
+    """
+    Two-tier card cache keyed by (player_id, season, role):
+      - an in-process LRU bounded by entry count and bytes (decoded JSON
+        plus any pre-encoded response bodies kept with the card)
+      - gzip'd JSON files under <folder>/<version>/<season>/<role>/<player_id>.json.gz
+    Concurrent misses for the same key are collapsed into one build, across
+    threads with a shared Future and across processes with a file lock kept
+    under <folder>/locks/, apart from the cards.
+    """
+
+    def __init__(self, folder, max_entries=4096, max_bytes=512 * 1024 * 1024, version=None):
+        self.folder = folder
+        self.version = version or card_version()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def path(self, key):
+        player_id, season, role = key
+        return os.path.join(self.folder, self.version, str(season), role, f"{player_id}.json.gz")
+
+    def lock_path(self, key):
+        player_id, season, role = key
+        return os.path.join(self.folder, "locks", self.version, str(season), role, f"{player_id}.lock")
+
+    def _remember(self, key, card, size):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            # [card, bytes held (card plus its encodings), {format: Encoded}]
+            self._entries[key] = [card, size, {}]
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits["memory"] += 1
+            return entry[0]
+
+    def encoded(self, key, card, fmt):
+        """
+        The card serialized in a card_format format, with its gzip'd bytes and
+        an ETag. Encoded once and kept beside the card in the memory tier, so
+        later hits skip serialization and compression; cards that are not in
+        memory (e.g. errors) are encoded without being kept.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is card and fmt in entry[2]:
+                return entry[2][fmt]
+
+        with metrics.stage("card_encode", format=fmt):
+            body = card_format.encode(card, fmt)
+            encoded = Encoded(body, gzip.compress(body, compresslevel=6),
+                              f"{self.version}-{fmt}-{hashlib.sha1(body).hexdigest()[:16]}")
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is card and fmt not in entry[2]:
+                entry[2][fmt] = encoded
+                added = len(encoded.body) + len(encoded.gzipped)
+                entry[1] += added
+                self._bytes += added
+                self._evict()
+        return encoded
+
+    def get_disk(self, key):
+        try:
+            with metrics.stage("cache_disk_read"), open(self.path(key), 'rb') as f:
+                card, size = decode_card(f.read())
+        except (FileNotFoundError, OSError, ValueError, EOFError):
+            return None
+        self._remember(key, card, size)
+        with self._lock:
+            self.hits["disk"] += 1
+        return card
+
+    def warm(self, limit, formats=()):
+        """
+        Read up to `limit` season cards from the disk tier into memory, most
+        recently built first, and encode each in `formats`. Window cards are
+        skipped since their keys cannot be rebuilt from the path. Returns the
+        number of cards loaded.
+        """
+        root = os.path.join(self.folder, self.version)
+        built = []
+        for folder, _, names in os.walk(root):
+            season, role = os.path.relpath(folder, root).rpartition(os.sep)[::2]
+            if not season.isdigit():
+                continue
+            for name in names:
+                if name.endswith(".json.gz"):
+                    path = os.path.join(folder, name)
+                    try:
+                        built.append((os.path.getmtime(path), (int(name[:-len(".json.gz")]), int(season), role)))
+                    except (OSError, ValueError):
+                        continue
+        built.sort(reverse=True)
+
+        loaded = 0
+        for _, key in built[:min(limit, self.max_entries)]:
+            try:
+                with open(self.path(key), 'rb') as f:
+                    card, size = decode_card(f.read())
+            except (OSError, ValueError, EOFError):
+                continue
+            self._remember(key, card, size)
+            for fmt in formats:
+                self.encoded(key, card, fmt)
+            loaded += 1
+        return loaded
+
+    def get(self, key):
+        """
+        Cached card or None, without building.
+        """
+        card = self.get_memory(key)
+        if card is None:
+            card = self.get_disk(key)
+        return card
+
+    def put(self, key, card):
+        """
+        Write a card to disk atomically (temp file + rename) and to memory.
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with metrics.stage("cache_disk_write"):
+            data, size = encode_card(card)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._remember(key, card, size)
+
+    def get_or_build(self, key, build):
+        """
+        Return the cached card for key, calling build() at most once across
+        concurrent callers on a miss. build returns (value, cacheable); only
+        cacheable values are stored, but every waiter receives the value.
+        """
+        card = self.get_memory(key)
+        if card is not None:
+            return card
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            value = self.get_disk(key)
+            if value is None:
+                value = self._build_locked(key, build)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _build_locked(self, key, build):
+        lock_path = self.lock_path(key)
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with file_lock(lock_path):
+            # Another worker may have finished the build while we waited
+            card = self.get_disk(key)
+            if card is not None:
+                return card
+
+            with self._lock:
+                self.misses += 1
+            value, cacheable = build()
+            if cacheable:
+                self.put(key, value)
+            return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "version": self.version,
+            }
@@ -0,0 +1,40 @@
+ALL_EVENTS_ORDER = [
+    "strikeout", "sac_fly_double_play", "double_play_combined", "field_out_ground_ball", "field_out_popup", "field_out_fly_ball", "field_out_line_drive",
+    "field_error", "truncated_pa", "catcher_interf", "walk", "hit_by_pitch",
+    "single", "double", "triple", "home_run"
+]
+
+# Update EVENT_GROUPS to only combine necessary events, leaving out field outs to be distinct
+EVENT_GROUPS = {
+    "grounded_into_double_play": "double_play_combined",
+    "sac_fly_double_play": "double_play_combined",
+    "double_play": "double_play_combined",
+    "sac_fly": "field_out_fly_ball",
+    "strikeout": "strikeout",
+    "strikeout_double_play": "strikeout",
+    "fielders_choice_out": "field_out_ground_ball",
+    "truncated_pa": "field_out_ground_ball",
+    "fielders_choice": "field_out_ground_ball",
+    "sac_bunt": "field_out_ground_ball",
+    "force_out": "field_out_ground_ball",
+    "intent_walk": "walk",
+    "walk": "walk",
+    "catcher_interf": "walk",
+    # You can add more mappings if necessary
+}
+
+# field_out is split further by batted ball type
+FIELD_OUT_BB_TYPES = {
+    "fly_ball": "field_out_fly_ball",
+    "popup": "field_out_popup",
+    "line_drive": "field_out_line_drive",
+    "ground_ball": "field_out_ground_ball",
+}
+
+COUNT_ORDER = ["(0-0)", "(0-1)", "(0-2)", "(1-0)", "(1-1)", "(1-2)", "(2-0)", "(2-1)", "(2-2)", "(3-0)", "(3-1)", "(3-2)"]
+
+# Column holding the opposing player's handedness for each card type
+HAND_COLUMNS = {
+    "batter": "p_throws",  # Left/right-handed pitchers
+    "pitcher": "stand",    # Left/right-handed batters
+}
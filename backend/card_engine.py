@@ -0,0 +1,358 @@
+import numpy as np
+
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER, EVENT_GROUPS, FIELD_OUT_BB_TYPES, HAND_COLUMNS
+from dice_tables import encode_tables, table_from_ends
+
+# Raw Statcast events that can land on a card. Kept in the same sorted order
+# that groupby('events') walks them, so per-event fractions are summed in
+# exactly the same order as the original loops and the floats match bit for bit.
+RAW_EVENTS = sorted(set(EVENT_GROUPS) | set(ALL_EVENTS_ORDER) | {"field_out"})
+BB_TYPES = sorted(FIELD_OUT_BB_TYPES)
+HANDS = ["L", "R"]  # hand index 2 collects rows with any other value
+
+
+def _build_slots():
+    """
+    Lay out one "source slot" per raw event (field_out gets one per bb_type)
+    and record which ALL_EVENTS_ORDER entry each slot feeds.
+    """
+    slot_events = []
+    raw_slots = []
+    for raw_event in RAW_EVENTS:
+        raw_slots.append(len(slot_events))
+        if raw_event == "field_out":
+            for bb_type in BB_TYPES:
+                slot_events.append(ALL_EVENTS_ORDER.index(FIELD_OUT_BB_TYPES[bb_type]))
+        else:
+            slot_events.append(ALL_EVENTS_ORDER.index(EVENT_GROUPS.get(raw_event, raw_event)))
+    return np.array(slot_events, dtype=np.int64), np.array(raw_slots, dtype=np.int64)
+
+
+SLOT_EVENTS, RAW_EVENT_SLOTS = _build_slots()
+FIELD_OUT_SLOT = RAW_EVENT_SLOTS[RAW_EVENTS.index("field_out")]
+# Rows that count toward a count's total but never map to a card event
+# (field_out without a bb_type, unknown events)
+UNMAPPED_SLOT = len(SLOT_EVENTS)
+N_SLOTS = UNMAPPED_SLOT + 1
+# Code -1 (not in RAW_EVENTS) and the OTHER_EVENT code both index the
+# trailing UNMAPPED_SLOT entry
+_RAW_CODE_TO_SLOT = np.append(RAW_EVENT_SLOTS, UNMAPPED_SLOT)
+
+# Fixed code table for compact frames: every raw event a card knows, plus a
+# catch-all for the rest so they still count toward a count's total
+OTHER_EVENT = "other"
+EVENT_CODES = RAW_EVENTS + [OTHER_EVENT]
+
+
+def _codes(column, categories):
+    """
+    Category codes of a column against a fixed code table (-1 when missing).
+    Categorical columns (compact frames, dictionary-encoded Parquet reads)
+    are recoded without materializing their strings.
+    """
+    import pandas as pd
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        if list(column.cat.categories) != categories:
+            column = column.cat.set_categories(categories)
+        return column.cat.codes.to_numpy()
+    return pd.Categorical(column.to_numpy(), categories=categories).codes
+
+
+def _hand_codes(column):
+    """
+    0 for 'L', 1 for 'R', 2 for anything else.
+    """
+    codes = _codes(column, HANDS)
+    return np.where(codes >= 0, codes, 2).astype(np.int64)
+
+
+def compact_events(stats, hand_column=None, extra_columns=()):
+    """
+    Shrink a Statcast frame to what the card builders read, one row per
+    plate appearance:
+      - events and bb_type as categoricals over the fixed EVENT_CODES and
+        BB_TYPES tables (int8 codes)
+      - balls and strikes as int8
+      - stand and p_throws as categoricals over HANDS, so each hand is one
+        code (0 = L, 1 = R, -1 = anything else)
+    Rows without an event or count are dropped and extra_columns are carried
+    along unchanged. With hand_column the rows are stably sorted by that
+    hand, so hand_views can slice each side out without copying.
+    """
+    import pandas as pd
+
+    keep = (
+        stats['events'].notna().to_numpy()
+        & stats['balls'].notna().to_numpy()
+        & stats['strikes'].notna().to_numpy()
+    )
+    event_codes = _codes(stats['events'], EVENT_CODES)[keep]
+    columns = {
+        'events': pd.Categorical.from_codes(np.where(event_codes >= 0, event_codes, len(RAW_EVENTS)), categories=EVENT_CODES),
+        'bb_type': pd.Categorical.from_codes(
+            _codes(stats['bb_type'], BB_TYPES)[keep] if 'bb_type' in stats else np.full(keep.sum(), -1), categories=BB_TYPES
+        ),
+        'balls': stats['balls'].to_numpy()[keep].astype(np.int8),
+        'strikes': stats['strikes'].to_numpy()[keep].astype(np.int8),
+    }
+    for column in ('stand', 'p_throws'):
+        if column in stats:
+            columns[column] = pd.Categorical.from_codes(_codes(stats[column], HANDS)[keep], categories=HANDS)
+    for column in extra_columns:
+        columns[column] = stats[column].to_numpy()[keep]
+
+    frame = pd.DataFrame(columns)
+    if hand_column is not None:
+        order = np.argsort(_hand_codes(frame[hand_column]), kind='stable')
+        frame = frame.take(order).reset_index(drop=True)
+    return frame
+
+
+def hand_views(frame, hand_column):
+    """
+    {'L': rows, 'R': rows, None: other rows} slices of a compact frame sorted
+    by hand_column. The slices share the frame's memory.
+    """
+    hands = _hand_codes(frame[hand_column])
+    if len(hands) and np.any(hands[1:] < hands[:-1]):
+        raise ValueError(f"Frame is not sorted by {hand_column}; build it with compact_events(stats, '{hand_column}')")
+    bounds = np.searchsorted(hands, [0, 1, 2, 3])
+    return {hand: frame.iloc[bounds[i]:bounds[i + 1]] for i, hand in enumerate(HANDS + [None])}
+
+
+def count_tensor(stats, hand_column=None, group_column=None):
+    """
+    Cross-tabulate every row with a non-null 'events' value in a single pass.
+    stats may be a raw Statcast frame or a compact_events frame.
+
+    Returns (counts, group_keys) where counts is an int64 array shaped
+    [group, hand, balls, strikes, slot]. hand is 0 for 'L', 1 for 'R' and 2 for
+    anything else (or for every row when hand_column is None). Without a
+    group_column there is exactly one group and group_keys is [None].
+    """
+    import pandas as pd
+
+    keep = (
+        stats['events'].notna().to_numpy()
+        & stats['balls'].notna().to_numpy()
+        & stats['strikes'].notna().to_numpy()
+    )
+    balls = stats['balls'].to_numpy()[keep].astype(np.int64)
+    strikes = stats['strikes'].to_numpy()[keep].astype(np.int64)
+
+    slots = _RAW_CODE_TO_SLOT[_codes(stats['events'], EVENT_CODES)[keep]]
+
+    field_out = slots == FIELD_OUT_SLOT
+    if field_out.any():
+        bb_codes = _codes(stats['bb_type'], BB_TYPES)[keep][field_out]
+        slots[field_out] = np.where(bb_codes >= 0, FIELD_OUT_SLOT + bb_codes, UNMAPPED_SLOT)
+
+    if hand_column is not None:
+        hands = _hand_codes(stats[hand_column])[keep]
+    else:
+        hands = np.full(len(slots), 2, dtype=np.int64)
+
+    if group_column is not None:
+        groups, group_keys = pd.factorize(stats[group_column].to_numpy()[keep], sort=True)
+        has_group = groups >= 0
+        groups, hands, balls, strikes, slots = (
+            groups[has_group], hands[has_group], balls[has_group], strikes[has_group], slots[has_group]
+        )
+        group_keys = list(group_keys.tolist())
+    else:
+        groups = np.zeros(len(slots), dtype=np.int64)
+        group_keys = [None]
+
+    n_balls = max(4, int(balls.max()) + 1) if len(balls) else 4
+    n_strikes = max(3, int(strikes.max()) + 1) if len(strikes) else 3
+    shape = (len(group_keys), 3, n_balls, n_strikes, N_SLOTS)
+
+    flat_index = (((groups * 3 + hands) * n_balls + balls) * n_strikes + strikes) * N_SLOTS + slots
+    counts = np.bincount(flat_index, minlength=int(np.prod(shape))).reshape(shape)
+    return counts, group_keys
+
+
+def event_values(counts):
+    """
+    Turn [..., slot] counts into [..., event] decimal values (share of the
+    count's plate appearances) ordered like ALL_EVENTS_ORDER.
+    """
+    totals = counts.sum(axis=-1, keepdims=True)
+    fractions = counts / np.where(totals == 0, 1, totals)
+    values = np.zeros(counts.shape[:-1] + (len(ALL_EVENTS_ORDER),))
+    # Accumulate slot by slot in RAW_EVENTS order, like the original += loop
+    for slot, event_index in enumerate(SLOT_EVENTS):
+        values[..., event_index] += fractions[..., slot]
+    return values, totals[..., 0]
+
+
+def _event_bounds(counts):
+    """
+    Decimal values, totals, presence and die-face range starts / ends
+    [..., balls, strikes, event] for [..., balls, strikes, slot] counts.
+    """
+    values, totals = event_values(counts)
+    present = values > 0
+    sizes = np.where(present, (values * 1000).astype(np.int64), 0)
+    running = np.minimum(np.cumsum(sizes, axis=-1), 999)
+    starts = np.concatenate([np.zeros(running.shape[:-1] + (1,), dtype=np.int64), running[..., :-1]], axis=-1)
+    ends = starts + sizes - 1
+    return values, totals, present, starts, ends
+
+
+def ranges_from_counts(counts):
+    """
+    Build event_ranges records from one hand's [balls, strikes, slot] counts.
+    """
+    return _ranges_from_bounds(*_event_bounds(counts))
+
+
+def _ranges_from_bounds(values, totals, present, starts, ends):
+    bar_widths = (values * 100).astype(np.int64)
+
+    event_ranges = []
+    for balls, strikes in zip(*np.nonzero(totals)):
+        event_indexes = np.flatnonzero(present[balls, strikes])
+        if not len(event_indexes):
+            continue
+
+        balls, strikes = int(balls), int(strikes)
+        count_label = f"({balls}-{strikes})"
+        decimal_values = values[balls, strikes, event_indexes].tolist()
+        range_starts = starts[balls, strikes, event_indexes].tolist()
+        range_ends = ends[balls, strikes, event_indexes].tolist()
+        widths = bar_widths[balls, strikes, event_indexes].tolist()
+
+        grouped_data = [
+            {
+                'balls': balls,
+                'strikes': strikes,
+                'event': ALL_EVENTS_ORDER[event_index],
+                'decimal_value': decimal_value,
+                'range_start': range_start,
+                'range_end': range_end,
+                'count_label': count_label,
+                'chances': round(decimal_value * 100, 2),
+                'chance_bar_width': width
+            }
+            for event_index, decimal_value, range_start, range_end, width in zip(
+                event_indexes.tolist(), decimal_values, range_starts, range_ends, widths
+            )
+        ]
+
+        # Adjust the last range to end at 999 if necessary
+        grouped_data[-1]['range_end'] = 999
+        event_ranges.extend(grouped_data)
+
+    return event_ranges
+
+
+def event_table_from_counts(counts):
+    """
+    The [count, face] dice table (see dice_tables) of one hand's
+    [balls, strikes, slot] counts, resolving each roll the way the
+    ranges_from_counts records do.
+    """
+    _, _, present, starts, ends = _event_bounds(counts)
+    return _event_tables(present, ends)
+
+
+def _event_tables(present, ends):
+    """
+    [..., count, face] dice tables from _event_bounds presence and range ends.
+    """
+    present, ends = present[..., :4, :3, :], ends[..., :4, :3, :]
+    n_events = present.shape[-1]
+    # Only present events have records, and the last one is stretched to 999
+    last = n_events - 1 - np.argmax(present[..., ::-1], axis=-1)
+    ends = np.where(present, np.minimum(ends, 999), -1)
+    np.put_along_axis(ends, last[..., None], np.where(present.any(axis=-1), 999, -1)[..., None], axis=-1)
+    return table_from_ends(ends.reshape(ends.shape[:-3] + (len(COUNT_ORDER), n_events)), np.arange(n_events))
+
+
+def _count_bounds(counts):
+    """
+    Balls, strikes and die-face range starts / ends of the counts in
+    COUNT_ORDER with plate appearances, or None when there are none.
+    """
+    total_counts = counts.sum()
+    if total_counts == 0:
+        return None
+
+    balls, strikes = np.nonzero(counts)
+    known = (balls < 4) & (strikes < 3)
+    balls, strikes = balls[known], strikes[known]
+
+    percentage = (counts[balls, strikes] / total_counts) * 100
+    sizes = ((percentage / 100) * 1000).astype(np.int64)
+    running = np.minimum(np.cumsum(sizes), 999)
+    starts = np.concatenate([[0], running[:-1]]).astype(np.int64)
+    ends = np.where(starts + sizes > 999, 999, starts + sizes - 1)
+    return balls, strikes, starts, ends
+
+
+def count_table_from_counts(counts):
+    """
+    The [face] count-roll dice table of [balls, strikes] plate appearance
+    counts, matching count_frequencies_from_counts.
+    """
+    bounds = _count_bounds(counts)
+    if bounds is None:
+        return table_from_ends(np.full(1, -1), [0])
+    balls, strikes, _, ends = bounds
+    return table_from_ends(ends, balls * 3 + strikes)
+
+
+def count_frequencies_from_counts(counts):
+    """
+    Build count_frequencies records from [balls, strikes] plate appearance
+    counts. Counts outside COUNT_ORDER still weigh into the percentages but are
+    not returned.
+    """
+    bounds = _count_bounds(counts)
+    if bounds is None:
+        return []
+    balls, strikes, starts, ends = bounds
+
+    return [
+        {'count_label': f"({b}-{s})", 'range_start': start, 'range_end': end}
+        for b, s, start, end in zip(balls.tolist(), strikes.tolist(), starts.tolist(), ends.tolist())
+    ]
+
+
+def card_from_counts(counts):
+    """
+    Build a player card from one player's [hand, balls, strikes, slot] counts,
+    with its dice lookup tables.
+    """
+    # Both hands' ranges and tables come from one set of bounds
+    values, totals, present, starts, ends = _event_bounds(counts[:2])
+    tables = _event_tables(present, ends)
+    count_counts = counts.sum(axis=(0, 3))
+    return {
+        "event_ranges": {
+            "lefty": _ranges_from_bounds(values[0], totals[0], present[0], starts[0], ends[0]),
+            "righty": _ranges_from_bounds(values[1], totals[1], present[1], starts[1], ends[1])
+        },
+        "count_frequencies": count_frequencies_from_counts(count_counts),
+        "dice_tables": encode_tables({"lefty": tables[0], "righty": tables[1]}, count_table_from_counts(count_counts)),
+    }
+
+
+def build_card(stats, player_type):
+    """
+    Build the card for a single player's Statcast frame.
+    """
+    counts, _ = count_tensor(stats, HAND_COLUMNS[player_type])
+    return card_from_counts(counts[0])
+
+
+def build_cards(stats, player_type, player_column=None):
+    """
+    Build cards for many players from one concatenated Statcast frame.
+    Players are keyed by player_column, which defaults to the Statcast id
+    column for the role ('batter' or 'pitcher').
+    """
+    counts, player_ids = count_tensor(stats, HAND_COLUMNS[player_type], player_column or player_type)
+    return {player_id: card_from_counts(counts[i]) for i, player_id in enumerate(player_ids)}
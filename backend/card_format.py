@@ -0,0 +1,147 @@
+"""
+Wire formats for card payloads.
+
+  - json: the card as jsonify returns it (the default)
+  - columnar: one array per field plus count and event dictionaries. Fields
+    that follow from the others (balls, strikes, count_label, chances,
+    chance_bar_width) are dropped; expand_card restores them exactly. The
+    dice tables are already compact and pass through as they are.
+  - msgpack: the columnar card as MessagePack, when msgpack is installed
+
+A columnar card looks like:
+    {"format": "columnar/1",
+     "counts": ["(0-0)", ...], "events": ["strikeout", ...],
+     "event_ranges": {"lefty": {"count": [0, 0, ...], "event": [2, 3, ...],
+                                "decimal_value": [...], "range_start": [...], "range_end": [...]},
+                      "righty": {...}},
+     "count_frequencies": {"count": [...], "range_start": [...], "range_end": [...]},
+     "dice_tables": {...}}
+"""
+import json
+import re
+
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER
+
+try:
+    import msgpack
+except ImportError:  # Optional: the msgpack format is offered only when installed
+    msgpack = None
+
+COLUMNAR_VERSION = "columnar/1"
+MIMETYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.icore.card+json",
+    "msgpack": "application/vnd.icore.card+msgpack",
+}
+RANGE_FIELDS = ("decimal_value", "range_start", "range_end")
+COUNT_LABEL = re.compile(r"\((\d+)-(\d+)\)")
+
+
+def available_formats():
+    return [name for name in MIMETYPES if name != "msgpack" or msgpack is not None]
+
+
+def _count_dictionary(card):
+    """
+    COUNT_ORDER, plus any out-of-range counts (e.g. "(4-2)") the card has.
+    """
+    labels = {record['count_label'] for records in card.get("event_ranges", {}).values() for record in records}
+    labels.update(record['count_label'] for record in card.get("count_frequencies", []))
+    return COUNT_ORDER + sorted(labels - set(COUNT_ORDER))
+
+
+def columnar_card(card):
+    """
+    A card in the columnar format.
+    """
+    counts = _count_dictionary(card)
+    count_index = {label: i for i, label in enumerate(counts)}
+    event_index = {event: i for i, event in enumerate(ALL_EVENTS_ORDER)}
+
+    event_ranges = {}
+    for side, records in card.get("event_ranges", {}).items():
+        columns = {
+            "count": [count_index[record['count_label']] for record in records],
+            "event": [event_index[record['event']] for record in records],
+        }
+        for field in RANGE_FIELDS:
+            columns[field] = [record[field] for record in records]
+        event_ranges[side] = columns
+
+    count_frequencies = card.get("count_frequencies", [])
+    columnar = {
+        "format": COLUMNAR_VERSION,
+        "counts": counts,
+        "events": ALL_EVENTS_ORDER,
+        "event_ranges": event_ranges,
+        "count_frequencies": {
+            "count": [count_index[record['count_label']] for record in count_frequencies],
+            "range_start": [record['range_start'] for record in count_frequencies],
+            "range_end": [record['range_end'] for record in count_frequencies],
+        },
+    }
+    if "dice_tables" in card:
+        columnar["dice_tables"] = card["dice_tables"]
+    return columnar
+
+
+def expand_card(columnar):
+    """
+    Rebuild the record-per-row card from a columnar one.
+    """
+    counts, events = columnar["counts"], columnar["events"]
+    balls_strikes = [tuple(int(n) for n in COUNT_LABEL.fullmatch(label).groups()) for label in counts]
+
+    event_ranges = {}
+    for side, columns in columnar["event_ranges"].items():
+        records = []
+        for count, event, decimal_value, range_start, range_end in zip(
+                columns["count"], columns["event"], *(columns[field] for field in RANGE_FIELDS)):
+            balls, strikes = balls_strikes[count]
+            records.append({
+                'balls': balls,
+                'strikes': strikes,
+                'event': events[event],
+                'decimal_value': decimal_value,
+                'range_start': range_start,
+                'range_end': range_end,
+                'count_label': counts[count],
+                'chances': round(decimal_value * 100, 2),
+                'chance_bar_width': int(decimal_value * 100)
+            })
+        event_ranges[side] = records
+
+    frequencies = columnar["count_frequencies"]
+    card = {
+        "event_ranges": event_ranges,
+        "count_frequencies": [
+            {'count_label': counts[count], 'range_start': range_start, 'range_end': range_end}
+            for count, range_start, range_end in zip(frequencies["count"], frequencies["range_start"], frequencies["range_end"])
+        ],
+    }
+    if "dice_tables" in columnar:
+        card["dice_tables"] = columnar["dice_tables"]
+    return card
+
+
+def encode(value, fmt):
+    """
+    Serialize a card, or an error dict or None, in one of the formats. JSON
+    bytes match what jsonify produces outside debug mode.
+    """
+    if value is not None and fmt != "json" and "error" not in value:
+        value = columnar_card(value)
+    if fmt == "msgpack":
+        return msgpack.packb(value, use_bin_type=True)
+    return (json.dumps(value, separators=(',', ':'), sort_keys=True) + "\n").encode()
+
+
+def envelope(parts, fmt):
+    """
+    Combine already-encoded values into one {name: value} object without
+    decoding them.
+    """
+    if fmt == "msgpack":
+        # A fixmap header: envelopes hold a handful of entries
+        return bytes([0x80 | len(parts)]) + b"".join(msgpack.packb(name, use_bin_type=True) + part for name, part in parts)
+    return b"{" + b",".join(json.dumps(name).encode() + b":" + part.rstrip(b"\n") for name, part in parts) + b"}\n"
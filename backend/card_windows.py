@@ -0,0 +1,220 @@
+"""
+Per-day count tensors with prefix sums, for cards over any date window or
+weighted blend of seasons.
+
+For each stored Statcast season and role, every player's plate appearances
+are tallied per game day into [hand, balls, strikes, slot] tensors (the
+count_tensor layout, limited to the twelve real counts). These are then
+accumulated, so the counts for any date range take one subtraction of two
+rows:
+    counts(start, end) = prefix[last day <= end] - prefix[last day < start]
+
+The tensors are stored under data/windows/season=<year>/<role>/:
+  - prefix.npy: [row, hand, balls, strikes, slot] running totals, one
+    leading zero row per player and then one row per day the player
+    appeared (uint16, or uint32 if a season total needs it)
+  - days.npy: the game day of each row (days since 1970-01-01)
+  - index.json: player id -> [first row, end row)
+Both arrays are memory-mapped on read.
+
+Usage:
+    python card_windows.py 2024
+    python card_windows.py 2022 --through 2024
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import statcast_store
+from card_constants import HAND_COLUMNS
+from card_engine import N_SLOTS, count_tensor
+
+STORE_FOLDER = os.path.join("data", "windows")
+# [hand, balls, strikes, slot] per row
+CELL_SHAPE = (3, 4, 3, N_SLOTS)
+PLAYERS_PER_CHUNK = 64
+NO_DAY = np.iinfo(np.int32).min
+
+_cache_lock = threading.Lock()
+_seasons = {}
+
+
+class CardWindow(namedtuple("CardWindow", ["seasons", "start_date", "end_date"])):
+    """
+    What a windowed card covers: seasons as ((year, weight), ...) and, for a
+    single season, optional ISO start/end dates. str() is a stable label
+    used in card cache keys and paths.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        label = "+".join(f"{year}x{weight:g}" for year, weight in self.seasons)
+        if self.start_date or self.end_date:
+            label += f"_{self.start_date or ''}_{self.end_date or ''}"
+        return label
+
+
+def season_folder(year, role):
+    return os.path.join(STORE_FOLDER, f"season={year}", role)
+
+
+def has_season(year, role):
+    return os.path.isfile(os.path.join(season_folder(year, role), "index.json"))
+
+
+def day_number(date):
+    """
+    Days since 1970-01-01 for a date string, date or Timestamp.
+    """
+    import pandas as pd
+
+    return int(pd.Timestamp(date).to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def trim_counts(counts):
+    """
+    A count_tensor player slice [hand, balls, strikes, slot] cut to the
+    twelve real counts, the shape window counts have.
+    """
+    return counts[:, :CELL_SHAPE[1], :CELL_SHAPE[2]]
+
+
+def build_season(year, role):
+    """
+    Tally and store one season's per-day prefix sums for a role from the
+    Statcast store.
+    """
+    stats = statcast_store.read_season(year, role, extra_columns=[role, 'game_date'])
+    if stats is None:
+        raise FileNotFoundError(f"Statcast season {year} is not in the store; load it with statcast_store.py first")
+
+    players = stats[role].to_numpy()
+    days = stats['game_date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    order = np.lexsort((days, players))
+    stats, players, days = stats.take(order).reset_index(drop=True), players[order], days[order]
+
+    # One group per (player, day); each player's rows are preceded by a
+    # zero row, so player k's groups sit k + 1 rows further down
+    new_group = np.r_[True, (players[1:] != players[:-1]) | (days[1:] != days[:-1])] if len(players) else np.array([], dtype=bool)
+    groups = np.cumsum(new_group) - 1
+    group_players, group_days = players[new_group], days[new_group]
+    player_ids, player_first_group, player_groups = np.unique(group_players, return_index=True, return_counts=True)
+    player_first_row = player_first_group + np.arange(len(player_ids))
+    n_rows = len(group_days) + len(player_ids)
+
+    folder = season_folder(year, role)
+    os.makedirs(folder, exist_ok=True)
+    dtype = np.uint16 if len(players) == 0 or np.bincount(np.searchsorted(player_ids, players)).max() < 65536 else np.uint32
+    prefix = np.lib.format.open_memmap(os.path.join(folder, "prefix.npy.tmp"), mode='w+', dtype=dtype, shape=(n_rows,) + CELL_SHAPE)
+    row_days = np.full(n_rows, NO_DAY, dtype=np.int32)
+
+    group_rows = np.arange(len(group_days)) + np.repeat(np.arange(len(player_ids)) + 1, player_groups)
+    row_days[group_rows] = group_days
+    prefix[player_first_row] = 0
+
+    row_starts = np.r_[np.flatnonzero(np.r_[True, players[1:] != players[:-1]]), len(players)] if len(players) else np.array([0])
+    for chunk_start in range(0, len(player_ids), PLAYERS_PER_CHUNK):
+        chunk_players = slice(chunk_start, min(chunk_start + PLAYERS_PER_CHUNK, len(player_ids)))
+        rows = slice(row_starts[chunk_players.start], row_starts[chunk_players.stop])
+        chunk = stats.iloc[rows].assign(group=groups[rows])
+        counts, group_keys = count_tensor(chunk, HAND_COLUMNS[role], 'group')
+        counts = counts[:, :, :CELL_SHAPE[1], :CELL_SHAPE[2]]
+
+        # Running totals restart at each player's first day
+        running = np.cumsum(counts, axis=0)
+        first = player_first_group[chunk_players] - group_keys[0]
+        before = np.concatenate([np.zeros((1,) + CELL_SHAPE, dtype=running.dtype), running[first[1:] - 1]])
+        running -= np.repeat(before, player_groups[chunk_players], axis=0)
+        prefix[group_rows[group_keys[0]:group_keys[-1] + 1]] = running
+
+    prefix.flush()
+    del prefix
+    with open(os.path.join(folder, "days.npy.tmp"), 'wb') as f:
+        np.save(f, row_days)
+    for name in ("prefix.npy", "days.npy"):
+        os.replace(os.path.join(folder, f"{name}.tmp"), os.path.join(folder, name))
+
+    index = {
+        "year": year,
+        "role": role,
+        "players": {str(player_id): [int(first), int(first + n + 1)]
+                    for player_id, first, n in zip(player_ids.tolist(), player_first_row, player_groups)},
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    # index.json goes last: readers key their cached arrays on it
+    with open(os.path.join(folder, "index.json.tmp"), 'w') as f:
+        json.dump(index, f)
+    os.replace(os.path.join(folder, "index.json.tmp"), os.path.join(folder, "index.json"))
+    print(f"Stored {n_rows} {role} day rows for {len(player_ids)} players for {year} in {folder}")
+
+
+def _load(year, role):
+    """
+    (prefix, days, index) for a season and role, memory-mapped and cached
+    until rebuilt; None when not built.
+    """
+    folder = season_folder(year, role)
+    index_path = os.path.join(folder, "index.json")
+    if not os.path.isfile(index_path):
+        return None
+    mtime = os.path.getmtime(index_path)
+    with _cache_lock:
+        cached = _seasons.get((year, role))
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    with open(index_path, 'r') as f:
+        index = {int(player_id): bounds for player_id, bounds in json.load(f)["players"].items()}
+    season = (
+        np.load(os.path.join(folder, "prefix.npy"), mmap_mode='r'),
+        np.load(os.path.join(folder, "days.npy"), mmap_mode='r'),
+        index,
+    )
+    with _cache_lock:
+        _seasons[(year, role)] = (mtime, season)
+    return season
+
+
+def window_counts(year, player_id, role, start_date=None, end_date=None):
+    """
+    A player's [hand, balls, strikes, slot] counts between two dates
+    (inclusive; open-ended when None) of one season, as int64. Returns None
+    when the season's prefix sums have not been built, and zeros when the
+    player has no events in the window.
+    """
+    season = _load(year, role)
+    if season is None:
+        return None
+    prefix, days, index = season
+    bounds = index.get(int(player_id))
+    if bounds is None:
+        return np.zeros(CELL_SHAPE, dtype=np.int64)
+
+    first, end = bounds
+    player_days = days[first + 1:end]
+    before = np.searchsorted(player_days, day_number(start_date), side='left') if start_date else 0
+    through = np.searchsorted(player_days, day_number(end_date), side='right') if end_date else len(player_days)
+    through = max(through, before)  # An empty window when end_date precedes start_date
+    return prefix[first + through].astype(np.int64) - prefix[first + before].astype(np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-day prefix-sum count tensors for stored Statcast seasons")
+    parser.add_argument("year", type=int, help="First season to build")
+    parser.add_argument("--through", type=int, help="Last season to build (default: only the first)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for year in range(args.year, (args.through or args.year) + 1):
+        for role in statcast_store.ROLES:
+            build_season(year, role)
+    print(f"Built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Dense dice lookup tables for cards.
+
+A card's range records say which slice of a 1000-sided die (faces 0-999)
+each count or event covers. Resolving a roll against the records means
+scanning them; the tables here hold the answer for every face instead, as
+uint8 codes:
+  - one [count, face] table per card side ('lefty', 'righty'), rows in
+    COUNT_ORDER, codes indexing ALL_EVENTS_ORDER
+  - one [face] table for the count roll, codes indexing COUNT_ORDER
+NO_RESULT marks faces no range covers. Where ranges overlap the first one
+wins, like the frontend's find().
+
+Cards carry their tables base64-encoded:
+    "dice_tables": {"format": "uint8/base64", "counts": [...COUNT_ORDER],
+                    "events": [...ALL_EVENTS_ORDER],
+                    "lefty": "<12 x 1000 bytes>", "righty": "...", "count": "<1000 bytes>"}
+"""
+import base64
+
+import numpy as np
+
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER
+
+DICE_FACES = 1000
+NO_RESULT = 255
+TABLES_FORMAT = "uint8/base64"
+SIDES = ("lefty", "righty")
+
+
+def roll_table(ranges, labels, label_key):
+    """
+    Map each of the 1000 die faces to an index into labels, -1 where no range
+    covers the roll. The first matching range wins, like the frontend's find().
+    """
+    table = np.full(DICE_FACES, -1, dtype=np.int64)
+    label_index = {label: i for i, label in enumerate(labels)}
+    for record in ranges:
+        index = label_index.get(record[label_key])
+        if index is None:
+            continue
+        start = max(record['range_start'], 0)
+        end = min(record['range_end'], DICE_FACES - 1)
+        if end < start:
+            continue
+        faces = table[start:end + 1]
+        faces[faces < 0] = index
+    return table
+
+
+def table_from_ends(ends, codes):
+    """
+    Lookup tables [..., face] from the range ends [..., range] of ranges laid
+    end to end from face 0, as card_engine builds them (-1 for an empty
+    range). A face resolves to the code of the first range reaching it.
+    """
+    reach = np.clip(np.maximum.accumulate(ends, axis=-1), -1, DICE_FACES - 1)
+    # Faces each range adds to the reach so far, then the uncovered tail
+    covered = np.diff(reach, axis=-1, prepend=-1)
+    tail = DICE_FACES - 1 - reach[..., -1:]
+    counts = np.concatenate([covered, tail], axis=-1)
+    values = np.broadcast_to(np.append(np.asarray(codes, dtype=np.uint8), np.uint8(NO_RESULT)), counts.shape)
+    return np.repeat(values.ravel(), counts.ravel()).reshape(counts.shape[:-1] + (DICE_FACES,))
+
+
+def encode_tables(side_tables, count_table):
+    """
+    The dice_tables entry of a card from its per-side [count, face] event
+    tables and its [face] count table.
+    """
+    tables = {"format": TABLES_FORMAT, "counts": COUNT_ORDER, "events": ALL_EVENTS_ORDER}
+    for side in SIDES:
+        tables[side] = base64.b64encode(np.ascontiguousarray(side_tables[side], dtype=np.uint8)).decode()
+    tables["count"] = base64.b64encode(np.ascontiguousarray(count_table, dtype=np.uint8)).decode()
+    return tables
+
+
+def _decode(text, shape):
+    return np.frombuffer(base64.b64decode(text), dtype=np.uint8).reshape(shape)
+
+
+def compile_tables(card):
+    """
+    Build the tables from a card's range records, for cards cached or posted
+    without them.
+    """
+    def as_codes(table):
+        return np.where(table < 0, NO_RESULT, table).astype(np.uint8)
+
+    tables = {}
+    for side in SIDES:
+        records = card.get("event_ranges", {}).get(side, [])
+        tables[side] = np.stack([
+            as_codes(roll_table([r for r in records if r['count_label'] == count_label], ALL_EVENTS_ORDER, 'event'))
+            for count_label in COUNT_ORDER
+        ])
+    tables["count"] = as_codes(roll_table(card.get("count_frequencies", []), COUNT_ORDER, 'count_label'))
+    return tables
+
+
+def card_tables(card):
+    """
+    {'lefty': [count, face], 'righty': [count, face], 'count': [face]} uint8
+    tables for a card: decoded from its dice_tables when it has current ones
+    and compiled from its records otherwise.
+    """
+    encoded = card.get("dice_tables")
+    if (not encoded or encoded.get("format") != TABLES_FORMAT
+            or encoded.get("counts") != COUNT_ORDER or encoded.get("events") != ALL_EVENTS_ORDER):
+        return compile_tables(card)
+    tables = {side: _decode(encoded[side], (len(COUNT_ORDER), DICE_FACES)) for side in SIDES}
+    tables["count"] = _decode(encoded["count"], (DICE_FACES,))
+    return tables
@@ -1,21 +1,21 @@
 import argparse
-from pybaseball import playerid_lookup
+from player_registry import get_registry
 
 # Function to get player bio information
 def get_player_bio(first_name, last_name):
     try:
-        # Get player ID lookup for a given name
-        player_df = playerid_lookup(last_name, first_name)
+        # Get every registry match for the given name
+        players = get_registry().lookup(first_name, last_name)
 
-        if player_df.empty:
+        if not players:
             print(f"No player found with name: {first_name} {last_name}")
             return None
         
         # Display available bio data
-        for _, player in player_df.iterrows():
+        for player in players:
             print(f"Player ID: {player['key_mlbam']}")
             print(f"Name: {player['name_first']} {player['name_last']}")
-            print(f"Birth Year: {player['birth_year']}")
+            print(f"Bats/Throws: {player['bats']}/{player['throws']}")
             print(f"Debut Year: {player['mlb_played_first']}")
             print()
 
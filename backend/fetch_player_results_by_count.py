@@ -1,23 +1,34 @@
 import sys
 import pandas as pd
-from pybaseball import playerid_lookup, statcast_pitcher, statcast_batter
+from pybaseball import statcast_pitcher, statcast_batter
+
+import statcast_store
+from player_registry import get_registry
 
 def get_player_stats(first_name, last_name, year, player_type):
-    # Look up player ID using pybaseball
-    player = playerid_lookup(last_name, first_name)
-    if player.empty:
-        return {"error": "Player not found"}
+    # Look up player ID in the player registry
+    player, error = get_registry().resolve(first_name, last_name, year, player_type)
+    if error:
+        return {"error": error}
+
+    player_id = player['key_mlbam']  # Get MLBAM player ID
+    if player_id < 0:
+        return {"error": f"No MLBAM id on record for {first_name} {last_name}"}
 
-    player_id = player.iloc[0]['key_mlbam']  # Get MLBAM player ID
+    if player_type not in ('batter', 'pitcher'):
+        return {"error": "Invalid player type. Use 'batter' or 'pitcher'."}
 
-    # Fetch Statcast stats for this player for a specific year
+    # Fetch Statcast stats for this player for a specific year, from the
+    # local store when the season has been loaded
     try:
-        if player_type == 'pitcher':
+        stats = statcast_store.read_player(
+            year, player_id, player_type, columns=['events', 'balls', 'strikes'],
+            start_date=f'{year}-03-01', end_date=f'{year}-10-31'
+        )
+        if stats is None and player_type == 'pitcher':
             stats = statcast_pitcher(f'{year}-03-01', f'{year}-10-31', player_id)
-        elif player_type == 'batter':
+        elif stats is None:
             stats = statcast_batter(f'{year}-03-01', f'{year}-10-31', player_id)
-        else:
-            return {"error": "Invalid player type. Use 'batter' or 'pitcher'."}
 
         if stats.empty:
             return {"error": f"No stats available for {first_name} {last_name} in {year}"}
@@ -1,17 +1,21 @@
 import sys
 import pandas as pd
-from pybaseball import playerid_lookup, statcast_pitcher, get_splits
+from pybaseball import statcast_pitcher, get_splits
+
+from player_registry import get_registry
 
 def get_player_stats(first_name, last_name):
-    # Look up player ID using pybaseball
-    player = playerid_lookup(last_name, first_name)
-    if player.empty:
-        return {"error": "Player not found"}
+    # Look up player ID in the player registry
+    player, error = get_registry().resolve(first_name, last_name, player_type="pitcher")
+    if error:
+        return {"error": error}
     
-    player_id = player.iloc[0]['key_mlbam']  # Get MLBAM player ID
+    bbref_id = player['key_bbref']  # Splits are keyed by Baseball-Reference ID
+    if not bbref_id:
+        return {"error": f"No Baseball-Reference id on record for {first_name} {last_name}"}
 
     # Fetch stats for this player (use career range or specific dates as needed)
-    stats = get_splits('maddugr95', pitching_splits = True)
+    stats = get_splits(bbref_id, pitching_splits = True)
 
     # Convert stats DataFrame to dictionary
     return stats.to_dict(orient='records')
@@ -0,0 +1,311 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from card_constants import ALL_EVENTS_ORDER
+from simulator import compile_matchup
+
+LINEUP_SIZE = 9
+REGULATION_INNINGS = 9
+MAX_INNINGS = 30  # Games still tied after this many innings are recorded as ties
+GAMES_PER_SEASON = 162
+MAX_GAMES = 2_000_000
+BATCH_GAMES = 50_000
+MIN_GAMES_PER_WORKER = 5_000
+
+EVENT_INDEX = {event: i for i, event in enumerate(ALL_EVENTS_ORDER)}
+FIRST, SECOND, THIRD = 1, 2, 4
+
+_executor = None
+
+
+def _force_walk(bases):
+    """
+    Batter to first; only forced runners move. Returns (bases, runs).
+    """
+    if not bases & FIRST:
+        return bases | FIRST, 0
+    if not bases & SECOND:
+        return bases | FIRST | SECOND, 0
+    if not bases & THIRD:
+        return FIRST | SECOND | THIRD, 0
+    return bases, 1
+
+
+def _advance(bases, n_bases, batter_to=None):
+    """
+    Move every runner n_bases ahead and put the batter on batter_to
+    (None when the batter is out). Returns (bases, runs).
+    """
+    runs = 0
+    new_bases = 0
+    for base_number, flag in ((1, FIRST), (2, SECOND), (3, THIRD)):
+        if bases & flag:
+            if base_number + n_bases >= 4:
+                runs += 1
+            else:
+                new_bases |= 1 << (base_number + n_bases - 1)
+    if batter_to is not None:
+        if batter_to >= 4:
+            runs += 1
+        else:
+            new_bases |= 1 << (batter_to - 1)
+    return new_bases, runs
+
+
+def transition(event, outs, bases):
+    """
+    Base-out state transition for one plate appearance. Returns
+    (outs, bases, runs). The model is deliberately simple:
+      - on hits and errors every runner advances as many bases as the batter
+      - walks, hit by pitch and catcher interference only move forced runners
+      - fly ball outs score a runner from third with fewer than two outs
+      - ground ball outs move every runner up one base with fewer than two outs
+      - double plays retire the batter and the runner on first (a plain ground
+        out when first base is empty)
+    Runs never score on a play that makes the third out.
+    """
+    runs = 0
+    if event in ("walk", "hit_by_pitch", "catcher_interf"):
+        bases, runs = _force_walk(bases)
+    elif event in ("single", "field_error"):
+        bases, runs = _advance(bases, 1, 1)
+    elif event == "double":
+        bases, runs = _advance(bases, 2, 2)
+    elif event == "triple":
+        bases, runs = _advance(bases, 3, 3)
+    elif event == "home_run":
+        bases, runs = _advance(bases, 4, 4)
+    elif event in ("double_play_combined", "sac_fly_double_play") and bases & FIRST and outs < 2:
+        outs += 2
+        bases, runs = _advance(bases & ~FIRST, 1)
+    elif event in ("field_out_ground_ball", "double_play_combined", "sac_fly_double_play") and outs < 2:
+        outs += 1
+        bases, runs = _advance(bases, 1)
+    elif event == "field_out_fly_ball" and outs < 2 and bases & THIRD:
+        outs += 1
+        bases, runs = bases & ~THIRD, 1
+    else:
+        # Strikeouts, popups, line drives, truncated plate appearances and
+        # any out with two down
+        outs += 1
+
+    if outs >= 3:
+        return 3, 0, 0
+    return outs, bases, runs
+
+
+def build_transition_tables():
+    """
+    [event, state] lookup tables for next outs, next bases and runs scored,
+    where state = outs * 8 + bases.
+    """
+    shape = (len(ALL_EVENTS_ORDER), 24)
+    next_outs = np.zeros(shape, dtype=np.int8)
+    next_bases = np.zeros(shape, dtype=np.int8)
+    runs = np.zeros(shape, dtype=np.int8)
+    for event, e in EVENT_INDEX.items():
+        for outs in range(3):
+            for bases in range(8):
+                next_outs[e, outs * 8 + bases], next_bases[e, outs * 8 + bases], runs[e, outs * 8 + bases] = (
+                    transition(event, outs, bases)
+                )
+    return next_outs, next_bases, runs
+
+
+NEXT_OUTS, NEXT_BASES, RUNS = build_transition_tables()
+
+
+def compile_lineup(lineup, opposing_pitcher):
+    """
+    [slot, event] cumulative outcome probabilities for a batting order facing
+    one pitcher. lineup is a list of (batter_card, bats) and opposing_pitcher
+    is (pitcher_card, throws).
+    """
+    pitcher_card, throws = opposing_pitcher
+    cdf = np.zeros((len(lineup), len(ALL_EVENTS_ORDER)))
+    for slot, (batter_card, bats) in enumerate(lineup):
+        compiled = compile_matchup(batter_card, pitcher_card, bats, throws)
+        if compiled is None:
+            raise ValueError(f"Lineup slot {slot + 1} cannot resolve a plate appearance against this pitcher")
+        cdf[slot] = np.cumsum(compiled["probabilities"].sum(axis=(0, 1)))
+    cdf[:, -1] = 1.0
+    return cdf
+
+
+def compile_teams(away, home):
+    """
+    Stack both lineups into a [team, slot, event] CDF; team 0 is the away
+    side. Each team is {"lineup": [(card, bats), ...], "pitcher": (card, throws)}.
+    """
+    return np.stack([
+        compile_lineup(away["lineup"], home["pitcher"]),
+        compile_lineup(home["lineup"], away["pitcher"]),
+    ])
+
+
+def play_games(cdf, home_team, rng):
+    """
+    Play one batch of games in lockstep, one plate appearance per step for
+    every unfinished game. home_team[g] is the team index (0/1) at home in
+    game g. Returns int16 scores shaped [game, team].
+    """
+    n_games = len(home_team)
+    lineup_size = cdf.shape[1]
+    scores = np.zeros((n_games, 2), dtype=np.int16)
+    slots = np.zeros((n_games, 2), dtype=np.int64)
+    inning = np.ones(n_games, dtype=np.int16)
+    half = np.zeros(n_games, dtype=np.int8)   # 0 = top, 1 = bottom
+    outs = np.zeros(n_games, dtype=np.int8)
+    bases = np.zeros(n_games, dtype=np.int8)
+    active = np.arange(n_games)
+
+    while len(active):
+        batting = np.where(half[active] == 0, 1 - home_team[active], home_team[active])
+        slot = slots[active, batting]
+
+        # Inverse-CDF draw against each game's current batter
+        draws = rng.random(len(active))
+        events = (draws[:, None] >= cdf[batting, slot]).sum(axis=1)
+
+        state = outs[active].astype(np.int64) * 8 + bases[active]
+        outs[active] = NEXT_OUTS[events, state]
+        bases[active] = NEXT_BASES[events, state]
+        scores[active, batting] += RUNS[events, state]
+        slots[active, batting] = (slot + 1) % lineup_size
+
+        home_score = scores[active, home_team[active]]
+        away_score = scores[active, 1 - home_team[active]]
+        late = inning[active] >= REGULATION_INNINGS
+        walk_off = late & (half[active] == 1) & (home_score > away_score)
+
+        side_retired = outs[active] >= 3
+        finished = walk_off | (side_retired & late & (
+            ((half[active] == 0) & (home_score > away_score))
+            | ((half[active] == 1) & (home_score != away_score))
+            | ((half[active] == 1) & (inning[active] >= MAX_INNINGS))
+        ))
+
+        switch = active[side_retired & ~finished]
+        outs[switch] = 0
+        bases[switch] = 0
+        inning[switch] += half[switch]
+        half[switch] = 1 - half[switch]
+
+        active = active[~finished]
+
+    return scores
+
+
+def _simulate_chunk(cdf, home_team, seed_sequence, batch_games=BATCH_GAMES):
+    """
+    Worker entry point: play the given games in vectorized batches with the
+    worker's own RNG stream.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    scores = np.empty((len(home_team), 2), dtype=np.int16)
+    for start in range(0, len(home_team), batch_games):
+        end = start + batch_games
+        scores[start:end] = play_games(cdf, home_team[start:end], rng)
+    return scores
+
+
+def get_executor():
+    """
+    Shared process pool, created on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _executor
+
+
+def simulate_schedule(cdf, home_team, seed=None, workers=None):
+    """
+    Play every game in home_team across the process pool, one seeded RNG
+    stream per worker, and merge the scores back in schedule order. Results
+    are reproducible for a given seed and worker count.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(home_team) // MIN_GAMES_PER_WORKER))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = np.array_split(home_team, workers)
+
+    if workers == 1:
+        return _simulate_chunk(cdf, chunks[0], seeds[0])
+
+    futures = [
+        get_executor().submit(_simulate_chunk, cdf, chunk, chunk_seed)
+        for chunk, chunk_seed in zip(chunks, seeds)
+    ]
+    return np.concatenate([future.result() for future in futures])
+
+
+def summarize_games(scores, home_team):
+    """
+    Win/loss and scoring summary for a set of games, from the away team's
+    (team 0) and home team's (team 1) perspective.
+    """
+    n_games = len(scores)
+    margin = scores[:, 0].astype(np.int64) - scores[:, 1]
+    runs = scores.sum(axis=0)
+    return {
+        "games": n_games,
+        "wins": {"away": int((margin > 0).sum()), "home": int((margin < 0).sum())},
+        "ties": int((margin == 0).sum()),
+        "win_pct": {"away": float((margin > 0).mean()), "home": float((margin < 0).mean())},
+        "runs_per_game": {"away": float(runs[0] / n_games), "home": float(runs[1] / n_games)},
+    }
+
+
+def simulate_games(away, home, n_games, seed=None, workers=None):
+    """
+    Play n_games between two teams with the home team always at home.
+    """
+    cdf = compile_teams(away, home)
+    home_team = np.ones(n_games, dtype=np.int64)
+
+    start = time.perf_counter()
+    scores = simulate_schedule(cdf, home_team, seed, workers)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize_games(scores, home_team)
+    summary["seed"] = seed
+    summary["elapsed_seconds"] = elapsed
+    return summary
+
+
+def simulate_seasons(away, home, n_seasons, games_per_season=GAMES_PER_SEASON, seed=None, workers=None):
+    """
+    Replay a games_per_season series between two teams n_seasons times,
+    alternating home field, and summarize the distribution of season wins.
+    "away" and "home" in the summary name the two input teams.
+    """
+    cdf = compile_teams(away, home)
+    home_team = np.tile(np.arange(games_per_season, dtype=np.int64) % 2 ^ 1, n_seasons)
+
+    start = time.perf_counter()
+    scores = simulate_schedule(cdf, home_team, seed, workers)
+    elapsed = time.perf_counter() - start
+
+    margin = (scores[:, 0].astype(np.int64) - scores[:, 1]).reshape(n_seasons, games_per_season)
+    season_wins = np.stack([(margin > 0).sum(axis=1), (margin < 0).sum(axis=1)])
+    percentiles = [5, 25, 50, 75, 95]
+
+    summary = summarize_games(scores, home_team)
+    summary["seasons"] = n_seasons
+    summary["games_per_season"] = games_per_season
+    summary["season_wins"] = {
+        team: {
+            "mean": float(season_wins[i].mean()),
+            "std": float(season_wins[i].std()),
+            "percentiles": dict(zip(map(str, percentiles), np.percentile(season_wins[i], percentiles).tolist())),
+            "season_win_share": float((season_wins[i] > season_wins[1 - i]).mean()),
+        }
+        for i, team in enumerate(["away", "home"])
+    }
+    summary["seed"] = seed
+    summary["elapsed_seconds"] = elapsed
+    return summary
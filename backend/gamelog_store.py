@@ -0,0 +1,248 @@
+"""
+Local columnar store of Retrosheet game logs.
+
+A season is loaded once, from a GLyyyy.TXT file already on disk or from a
+single Retrosheet download. It is written under data/gamelogs/season=<year>/
+as two files:
+  - games.parquet: one row per game, every game-log column
+  - appearances.parquet: one row per player per game (lineup slots,
+    starting pitchers and pitching decisions), sorted by player id
+
+The appearance index is held in memory per season. A player x season-range
+query then slices that player's game numbers directly and takes only those
+rows from the games table, without touching other players' rows.
+
+Usage:
+    python gamelog_store.py 1998
+    python gamelog_store.py 1998 --file GL1998.TXT
+    python gamelog_store.py 1990 --through 1999 --folder retrosheet/gamelogs
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_FOLDER = os.path.join("data", "gamelogs")
+SIDES = ("visiting", "home")
+LINEUP_SLOTS = range(1, 10)
+DECISION_ROLES = ("winning_pitcher", "losing_pitcher", "save_pitcher")
+
+_cache_lock = threading.Lock()
+_season_indexes = {}
+_games_tables = {}
+
+
+def gamelog_columns():
+    """
+    pybaseball's game-log column names, with visiting_3_id (mislabelled
+    there as a second visiting_2_id) fixed.
+    """
+    from pybaseball.retrosheet import gamelog_columns as columns
+
+    return ["visiting_3_id" if column == "visiting_2_id.1" else column for column in columns]
+
+
+def season_folder(year):
+    return os.path.join(STORE_FOLDER, f"season={year}")
+
+
+def has_season(year):
+    return all(os.path.isfile(os.path.join(season_folder(year), name)) for name in ("games.parquet", "appearances.parquet"))
+
+
+def seasons():
+    """
+    Seasons currently in the store, in order.
+    """
+    if not os.path.isdir(STORE_FOLDER):
+        return []
+    years = [int(name.split("=", 1)[1]) for name in os.listdir(STORE_FOLDER) if name.startswith("season=")]
+    return sorted(year for year in years if has_season(year))
+
+
+def build_appearances(games):
+    """
+    One row per (player, game) appearance the game log records: the 18
+    starting lineup slots, both starting pitchers and the three pitching
+    decisions. Sorted by player id, then game.
+    """
+    parts = []
+    for side_number, side in enumerate(SIDES):
+        for slot in LINEUP_SLOTS:
+            parts.append(pd.DataFrame({
+                "player_id": games[f"{side}_{slot}_id"],
+                "game": np.arange(len(games), dtype=np.int32),
+                "side": np.int8(side_number),
+                "batting_order": np.int8(slot),
+                "position": pd.to_numeric(games[f"{side}_{slot}_pos"], errors="coerce").fillna(0).astype(np.int8),
+                "role": "lineup",
+            }))
+        parts.append(pd.DataFrame({
+            "player_id": games[f"{side}_starting_pitcher_id"],
+            "game": np.arange(len(games), dtype=np.int32),
+            "side": np.int8(side_number),
+            "batting_order": np.int8(0),
+            "position": np.int8(1),
+            "role": "starting_pitcher",
+        }))
+
+    # Decisions go to the winning side's staff, except the loss
+    home_won = (games["home_score"] > games["visiting_score"]).to_numpy()
+    for role in DECISION_ROLES:
+        side = np.where(home_won, 1, 0) if role != "losing_pitcher" else np.where(home_won, 0, 1)
+        parts.append(pd.DataFrame({
+            "player_id": games[f"{role}_id"],
+            "game": np.arange(len(games), dtype=np.int32),
+            "side": side.astype(np.int8),
+            "batting_order": np.int8(0),
+            "position": np.int8(1),
+            "role": role,
+        }))
+
+    parts = [part[part["player_id"].notna() & (part["player_id"] != "")] for part in parts]
+    appearances = pd.concat([part for part in parts if len(part)], ignore_index=True)
+    appearances = appearances.astype({"player_id": str})
+    return appearances.sort_values(["player_id", "game"], kind="stable").reset_index(drop=True)
+
+
+def write_season(year, games):
+    """
+    Store one season's game logs and its player appearance index. Files are
+    written to temporary names and renamed into place.
+    """
+    games = games.reset_index(drop=True)
+    games = games.assign(date=pd.to_datetime(games["date"].astype(str), format="%Y%m%d"))
+    # Mixed-type text columns (e.g. "misc") need a single Arrow type
+    for column in games.columns[games.dtypes == object]:
+        games[column] = games[column].astype("string")
+
+    folder = season_folder(year)
+    os.makedirs(folder, exist_ok=True)
+    tables = {
+        "games.parquet": pa.Table.from_pandas(games, preserve_index=False),
+        "appearances.parquet": pa.Table.from_pandas(build_appearances(games), preserve_index=False),
+    }
+    for name, table in tables.items():
+        path = os.path.join(folder, name)
+        pq.write_table(table, f"{path}.tmp", compression="zstd")
+        os.replace(f"{path}.tmp", path)
+
+    print(f"Stored {len(games)} games and {tables['appearances.parquet'].num_rows} appearances for {year} in {folder}")
+
+
+def load_season_from_file(year, path):
+    """
+    Store a season from a Retrosheet GLyyyy.TXT file on disk.
+    """
+    games = pd.read_csv(path, header=None, names=gamelog_columns(), sep=",", quotechar='"', low_memory=False)
+    write_season(year, games)
+
+
+def load_season_from_retrosheet(year):
+    """
+    Download one season's game logs from Retrosheet once and store it.
+    """
+    from pybaseball import retrosheet
+
+    games = retrosheet.season_game_logs(year)
+    games.columns = gamelog_columns()
+    write_season(year, games)
+
+
+def _cached(cache, path, load):
+    """
+    Per-file cache entry, reloaded when the file changes.
+    """
+    mtime = os.path.getmtime(path)
+    with _cache_lock:
+        cached = cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    value = load(path)
+    with _cache_lock:
+        cache[path] = (mtime, value)
+    return value
+
+
+def _load_index(path):
+    """
+    player id -> (start, end) into the season's sorted appearance arrays.
+    """
+    appearances = pq.read_table(path).to_pandas()
+    player_ids = appearances["player_id"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, player_ids[1:] != player_ids[:-1]]) if len(player_ids) else np.array([], dtype=int)
+    ends = np.r_[starts[1:], len(player_ids)]
+    index = {player_ids[start]: (start, end) for start, end in zip(starts.tolist(), ends.tolist())}
+    columns = {column: appearances[column].to_numpy() for column in ("game", "side", "batting_order", "position", "role")}
+    return index, columns
+
+
+def read_player_games(player_id, start_season, end_season=None, columns=None):
+    """
+    Every game a player appears in from start_season through end_season
+    (inclusive; defaults to start_season), one row per game, oldest first.
+    Adds season, side ("visiting"/"home"), batting_order (0 when not in the
+    starting lineup), position and roles (e.g. "lineup", or
+    "starting_pitcher,winning_pitcher"). Seasons not in the store are
+    skipped; columns limits which game-log columns are returned.
+    """
+    end_season = start_season if end_season is None else end_season
+    frames = []
+    for year in range(start_season, end_season + 1):
+        if not has_season(year):
+            continue
+        folder = season_folder(year)
+        index, appearances = _cached(_season_indexes, os.path.join(folder, "appearances.parquet"), _load_index)
+        if player_id not in index:
+            continue
+        start, end = index[player_id]
+
+        # A player can appear more than once per game (a starter who also
+        # gets the decision); collapse those rows onto the game
+        games = appearances["game"][start:end]
+        first = np.r_[True, games[1:] != games[:-1]]
+        game_numbers = games[first]
+        roles = [",".join(group) for group in np.split(appearances["role"][start:end], np.flatnonzero(first)[1:])]
+
+        table = _cached(_games_tables, os.path.join(folder, "games.parquet"), pq.read_table)
+        if columns is not None:
+            table = table.select(list(columns))
+        frame = table.take(pa.array(game_numbers)).to_pandas()
+        frame.insert(0, "season", year)
+        frame["side"] = np.array(SIDES)[appearances["side"][start:end][first]]
+        frame["batting_order"] = appearances["batting_order"][start:end][first]
+        frame["position"] = appearances["position"][start:end][first]
+        frame["roles"] = roles
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=["season"] + list(columns or []) + ["side", "batting_order", "position", "roles"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load Retrosheet game logs into the local game-log store")
+    parser.add_argument("year", type=int, help="First season to load")
+    parser.add_argument("--through", type=int, help="Last season to load (default: only the first)")
+    parser.add_argument("--file", help="GLyyyy.TXT file to load (single season)")
+    parser.add_argument("--folder", help="Folder of GLyyyy.TXT files to load instead of downloading")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for year in range(args.year, (args.through or args.year) + 1):
+        if args.file:
+            load_season_from_file(year, args.file)
+        elif args.folder:
+            load_season_from_file(year, os.path.join(args.folder, f"GL{year}.TXT"))
+        else:
+            load_season_from_retrosheet(year)
+    print(f"Loaded in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
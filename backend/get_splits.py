@@ -1,16 +1,15 @@
-import os
-from pybaseball import retrosheet
+import gamelog_store
 
 
-# This will list available seasons for which game logs are present
-available_seasons = retrosheet.available_game_log_seasons()
-print(available_seasons)
+# This will list the seasons already loaded into the local game-log store
+print(gamelog_store.seasons())
 
-# Download Retrosheet game logs for the year 1998
-games_1998 = retrosheet.season_game_logs(1998)
+# Load the Retrosheet game logs for 1998 once; later runs read the local store
+if not gamelog_store.has_season(1998):
+    gamelog_store.load_season_from_retrosheet(1998)
 
-# Filter for Ken Griffey Jr.
-ken_griffey_games = games_1998[(games_1998['BAT_ID'] == 'griffke02')]  # Use Retrosheet ID for Ken Griffey Jr.
+# Ken Griffey Jr.'s games, straight from the store's player index
+ken_griffey_games = gamelog_store.read_player_games('griffke02', 1998)  # Use Retrosheet ID for Ken Griffey Jr.
 
 # Display some data
 print(ken_griffey_games)
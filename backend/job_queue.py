@@ -0,0 +1,102 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobError(Exception):
+    """
+    Raised by a job function to fail the job with a user-facing message.
+    """
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """
+        Block until the job finishes or timeout seconds pass; True if done.
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        job = {"job_id": self.id, "status": self.status}
+        if self.status == "done":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+        return job
+
+
+class JobQueue:
+    """
+    Background jobs on a local thread pool, standing in for a broker. Jobs
+    are keyed by what they compute: submitting a key that is already queued
+    or running returns the existing job, so identical concurrent requests
+    share one build. Finished jobs are kept for ttl seconds for polling.
+    """
+
+    def __init__(self, max_workers=8, ttl=600):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}
+
+    def submit(self, key, fn):
+        """
+        Run fn() in the background unless a job for key is already pending.
+        Returns (job, created).
+        """
+        with self._lock:
+            self._prune()
+            job = self._active.get(key)
+            if job is not None:
+                return job, False
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active[key] = job
+        self._executor.submit(self._run, job, fn)
+        return job, True
+
+    def _run(self, job, fn):
+        job.status = "running"
+        try:
+            job.result = fn()
+            job.status = "done"
+        except JobError as e:
+            job.error = str(e)
+            job.status = "failed"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            job._done.set()
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return statuses
@@ -0,0 +1,290 @@
+"""
+League-wide batter x pitcher matchup matrix.
+
+Every card of a season is stacked into dense die-face tensors
+[player, side, count, event]. These are the same faces the simulator and
+the frontend roll. Each batter/pitcher pair is then combined in closed form
+with the pitcher's count_frequencies and the card_preference.json weights,
+exactly as compile_matchup does for one pair. The result is each pair's
+outcome distribution and its expected wOBA.
+
+The matrix is stored under data/matchups/season=<year>/:
+  - events.npy: float32 [batter, pitcher, event] outcome probabilities
+    (ALL_EVENTS_ORDER)
+  - woba.npy: float32 [batter, pitcher] expected wOBA per plate appearance
+  - index.json: player ids and hands, the event order and the weights used
+Both arrays are opened memory-mapped, so a row, column, pair or top-k
+lookup reads only the cells it needs. Pairs whose cards resolve no dice
+roll are NaN.
+
+Usage:
+    python matchup_matrix.py 2024
+    python matchup_matrix.py 2024 --min-pa 50
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import statcast_store
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER
+from card_engine import build_cards
+from dice_tables import card_tables
+from simulator import face_counts, load_card_preferences
+
+STORE_FOLDER = os.path.join("data", "matchups")
+SIDES = ("lefty", "righty")
+
+# Linear weights per plate-appearance outcome (FanGraphs, 2024). Walks
+# include the intentional walks and catcher interference the cards fold into
+# "walk"; reaching on an error counts as an out, as in wOBA.
+WOBA_WEIGHTS = {
+    "walk": 0.689, "hit_by_pitch": 0.720, "single": 0.882,
+    "double": 1.254, "triple": 1.590, "home_run": 2.050,
+}
+# A batter who bats from each side in at least this share of plate
+# appearances is treated as a switch hitter
+SWITCH_HITTER_SHARE = 0.05
+PITCHER_BLOCK = 256
+
+_cache_lock = threading.Lock()
+_matrices = {}
+
+
+def season_folder(year):
+    return os.path.join(STORE_FOLDER, f"season={year}")
+
+
+def stack_cards(cards, player_ids):
+    """
+    Dense die-face tensors for a list of cards: faces [player, side (lefty,
+    righty), count, event] and the count roll's faces [player, count].
+    """
+    faces = np.zeros((len(player_ids), len(SIDES), len(COUNT_ORDER), len(ALL_EVENTS_ORDER)), dtype=np.int32)
+    count_faces = np.zeros((len(player_ids), len(COUNT_ORDER)), dtype=np.int32)
+    for i, player_id in enumerate(player_ids):
+        tables = card_tables(cards[player_id])
+        faces[i] = face_counts(np.stack([tables[side] for side in SIDES]), len(ALL_EVENTS_ORDER))
+        count_faces[i] = face_counts(tables["count"], len(COUNT_ORDER))
+    return faces, count_faces
+
+
+def season_cards(year, role, min_pa=0):
+    """
+    Cards and handedness for every player of a role with at least min_pa
+    plate appearances in a stored season. Returns (player_ids, cards, hands).
+    hands are 'L'/'R', or 'S' for batters seen batting from both sides.
+    """
+    stats = statcast_store.read_season(year, role)
+    if stats is None:
+        raise FileNotFoundError(f"Statcast season {year} is not in the store; load it with statcast_store.py first")
+
+    cards = build_cards(stats, role)
+    player_ids, groups = np.unique(stats[role].to_numpy(), return_inverse=True)
+    own_hand = stats["stand" if role == "batter" else "p_throws"].cat.codes.to_numpy()
+    lefty = np.bincount(groups, weights=own_hand == 0, minlength=len(player_ids))
+    righty = np.bincount(groups, weights=own_hand == 1, minlength=len(player_ids))
+    plate_appearances = np.bincount(groups, minlength=len(player_ids))
+
+    if role == "batter":
+        switch = np.minimum(lefty, righty) >= SWITCH_HITTER_SHARE * np.maximum(lefty + righty, 1)
+        hands = np.where(switch, "S", np.where(righty >= lefty, "R", "L"))
+    else:
+        hands = np.where(righty >= lefty, "R", "L")
+
+    keep = plate_appearances >= min_pa
+    player_ids = [int(player_id) for player_id in player_ids[keep]]
+    return player_ids, {player_id: cards[player_id] for player_id in player_ids}, hands[keep].tolist()
+
+
+def matchup_weights(batter_faces, batter_sides, pitcher_faces, pitcher_count_faces, pitcher_side, preferences):
+    """
+    Integer dice weights [batter, pitcher, event] for a block of pitchers
+    who all throw with one hand (pitcher_side, the side read off the batter
+    cards). batter_sides is the side of each pitcher card that faces each
+    batter (0 lefty, 1 righty).
+
+    Per pair and event this is compile_matchup's weight summed over counts
+    and cards:
+        sum_c count_faces[p, c] * (pitcher_weight[c] * pitcher_faces[p, side_b, c, e]
+                                   + batter_weight[c] * batter_faces[b, side_p, c, e])
+    """
+    pitcher_weight = np.array([preferences[label]["pitcher"] for label in COUNT_ORDER], dtype=np.int64)
+    batter_weight = np.array([preferences[label]["batter"] for label in COUNT_ORDER], dtype=np.int64)
+    count_faces = pitcher_count_faces.astype(np.int64)
+
+    # Pitcher-card term: depends on the batter only through which side of
+    # the pitcher card is read
+    pitcher_term = np.einsum('pc,psce->spe', count_faces * pitcher_weight, pitcher_faces)
+    # Batter-card term: a [batter, count x event] by [pitcher, count] product
+    batter_term = np.einsum('pc,bce->bpe', count_faces * batter_weight, batter_faces[:, pitcher_side])
+    return batter_term + pitcher_term[batter_sides]
+
+
+def build_matrix(year, min_pa=0, preferences=None, folder=None):
+    """
+    Build and store the season's matchup matrix. Returns the folder.
+    """
+    if preferences is None:
+        preferences = load_card_preferences()
+    folder = folder or season_folder(year)
+    os.makedirs(folder, exist_ok=True)
+
+    start = time.perf_counter()
+    batter_ids, batter_cards, batter_hands = season_cards(year, "batter", min_pa)
+    pitcher_ids, pitcher_cards, pitcher_hands = season_cards(year, "pitcher", min_pa)
+    batter_faces, _ = stack_cards(batter_cards, batter_ids)
+    pitcher_faces, pitcher_count_faces = stack_cards(pitcher_cards, pitcher_ids)
+    print(f"Stacked {len(batter_ids)} batter and {len(pitcher_ids)} pitcher cards in {time.perf_counter() - start:.1f}s")
+
+    woba_weights = np.array([WOBA_WEIGHTS.get(event, 0.0) for event in ALL_EVENTS_ORDER])
+    shape = (len(batter_ids), len(pitcher_ids))
+    events = np.lib.format.open_memmap(os.path.join(folder, "events.npy.tmp"), mode='w+', dtype=np.float32, shape=shape + (len(ALL_EVENTS_ORDER),))
+    woba = np.lib.format.open_memmap(os.path.join(folder, "woba.npy.tmp"), mode='w+', dtype=np.float32, shape=shape)
+
+    batter_hands_array = np.array(batter_hands)
+    pitcher_hands_array = np.array(pitcher_hands)
+    for pitcher_side, hand in enumerate("LR"):
+        # Switch hitters bat from the side opposite the pitcher
+        batter_sides = np.where(batter_hands_array == "S", 1 - pitcher_side, (batter_hands_array == "R").astype(int))
+        hand_pitchers = np.flatnonzero(pitcher_hands_array == hand)
+        for block_start in range(0, len(hand_pitchers), PITCHER_BLOCK):
+            block = hand_pitchers[block_start:block_start + PITCHER_BLOCK]
+            weights = matchup_weights(batter_faces, batter_sides, pitcher_faces[block], pitcher_count_faces[block],
+                                      pitcher_side, preferences)
+            resolved = weights.sum(axis=2, keepdims=True).astype(np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                probabilities = np.where(resolved > 0, weights / resolved, np.nan)
+            events[:, block] = probabilities
+            woba[:, block] = probabilities @ woba_weights
+
+    events.flush()
+    woba.flush()
+    del events, woba
+    for name in ("events.npy", "woba.npy"):
+        os.replace(os.path.join(folder, f"{name}.tmp"), os.path.join(folder, name))
+
+    index = {
+        "year": year,
+        "batter_ids": batter_ids,
+        "batter_hands": batter_hands,
+        "pitcher_ids": pitcher_ids,
+        "pitcher_hands": pitcher_hands,
+        "events": ALL_EVENTS_ORDER,
+        "woba_weights": WOBA_WEIGHTS,
+        "card_preferences": preferences,
+        "min_pa": min_pa,
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    # index.json goes last: readers key their cached matrix on it
+    with open(os.path.join(folder, "index.json.tmp"), 'w') as f:
+        json.dump(index, f)
+    os.replace(os.path.join(folder, "index.json.tmp"), os.path.join(folder, "index.json"))
+
+    print(f"Stored a {shape[0]} x {shape[1]} matchup matrix for {year} in {folder} ({time.perf_counter() - start:.1f}s)")
+    return folder
+
+
+class MatchupMatrix:
+    """
+    A stored season's matrix, memory-mapped read-only.
+    """
+
+    def __init__(self, folder):
+        with open(os.path.join(folder, "index.json"), 'r') as f:
+            self.index = json.load(f)
+        self.events = np.load(os.path.join(folder, "events.npy"), mmap_mode='r')
+        self.woba = np.load(os.path.join(folder, "woba.npy"), mmap_mode='r')
+        self.batter_ids = np.array(self.index["batter_ids"], dtype=np.int64)
+        self.pitcher_ids = np.array(self.index["pitcher_ids"], dtype=np.int64)
+        self.batter_rows = {player_id: i for i, player_id in enumerate(self.index["batter_ids"])}
+        self.pitcher_columns = {player_id: i for i, player_id in enumerate(self.index["pitcher_ids"])}
+        self.event_index = {event: i for i, event in enumerate(self.index["events"])}
+
+    def _entry(self, batter, pitcher, woba, events):
+        return {
+            "batter_id": int(self.batter_ids[batter]),
+            "pitcher_id": int(self.pitcher_ids[pitcher]),
+            "woba": None if np.isnan(woba) else round(float(woba), 4),
+            "events": {event: round(float(rate), 5) for event, rate in zip(self.index["events"], events)}
+            if not np.isnan(woba) else None,
+        }
+
+    def pair(self, batter_id, pitcher_id):
+        """
+        One matchup, or None when either player is not in the matrix.
+        """
+        batter = self.batter_rows.get(batter_id)
+        pitcher = self.pitcher_columns.get(pitcher_id)
+        if batter is None or pitcher is None:
+            return None
+        return self._entry(batter, pitcher, self.woba[batter, pitcher], self.events[batter, pitcher])
+
+    def matchups(self, player_id, role, metric="woba", k=None, ascending=False):
+        """
+        A batter's row (every pitcher) or a pitcher's column (every batter),
+        sorted by metric ('woba' or an event's rate), optionally only the top
+        k. Pairs without a resolvable matchup sort last. Returns None when
+        the player is not in the matrix.
+        """
+        if role == "batter":
+            i = self.batter_rows.get(player_id)
+            if i is None:
+                return None
+            woba, events = self.woba[i], self.events[i]
+            batters, pitchers = np.full(len(woba), i), np.arange(len(woba))
+        else:
+            j = self.pitcher_columns.get(player_id)
+            if j is None:
+                return None
+            woba, events = self.woba[:, j], self.events[:, j]
+            batters, pitchers = np.arange(len(woba)), np.full(len(woba), j)
+
+        if metric == "woba":
+            values = np.asarray(woba, dtype=np.float64)
+        else:
+            values = np.asarray(events[:, self.event_index[metric]], dtype=np.float64)
+        keys = np.where(np.isnan(values), np.inf, values if ascending else -values)
+
+        if k is not None and k < len(keys):
+            order = np.argpartition(keys, k)[:k]
+            order = order[np.argsort(keys[order], kind='stable')]
+        else:
+            order = np.argsort(keys, kind='stable')
+
+        return [self._entry(batters[n], pitchers[n], woba[n], events[n]) for n in order]
+
+
+def load_matrix(year):
+    """
+    The stored matrix for a season (cached, reopened when it is rebuilt), or
+    None when none has been built.
+    """
+    folder = season_folder(year)
+    index_path = os.path.join(folder, "index.json")
+    if not os.path.isfile(index_path):
+        return None
+    mtime = os.path.getmtime(index_path)
+    with _cache_lock:
+        cached = _matrices.get(year)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    matrix = MatchupMatrix(folder)
+    with _cache_lock:
+        _matrices[year] = (mtime, matrix)
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the batter x pitcher matchup matrix for a stored Statcast season")
+    parser.add_argument("year", type=int, help="Season to build (must be in the Statcast store)")
+    parser.add_argument("--min-pa", type=int, default=0, help="Leave out players with fewer plate appearances")
+    args = parser.parse_args()
+    build_matrix(args.year, args.min_pa)
+
+
+if __name__ == "__main__":
+    main()
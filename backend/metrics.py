@@ -0,0 +1,133 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+    with metrics.stage("fetch", source="store"):
+        ...
+    metrics.count("rows_processed_total", len(frame), stage="fetch")
+    metrics.observe("response_bytes", len(body), endpoint="get_stats")
+
+Every metric is labelled and thread-safe; render() produces the
+text/plain; version=0.0.4 format served on /metrics.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "icore_"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+HELP = {
+    "stage_seconds": "Time spent in each backend stage",
+    "request_seconds": "HTTP request latency by endpoint and status",
+    "response_bytes": "HTTP response payload size by endpoint",
+    "response_bytes_streamed_total": "Bytes sent on streaming (NDJSON) responses",
+    "rows_processed_total": "Statcast rows processed by stage",
+    "card_cache_total": "Card cache lookups by result",
+    "startup_seconds": "App startup time by phase (import, create_app, preload)",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self, name):
+        lines = []
+        for labels, (bucket_counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_label_text(labels)} {total}")
+            lines.append(f"{name}_count{_label_text(labels)} {count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(key, value)
+
+    def count(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """
+        Time the block into stage_seconds{stage=name}.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=name, **labels)
+
+    def add_collector(self, collect):
+        """
+        Register a callable returning [(name, labels dict, value)] counters
+        read at render time, for components that keep their own counts.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        counters = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, {})[labels] = value
+            lines = []
+            for name, histogram in sorted(self._histograms.items()):
+                full_name = PREFIX + name
+                lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} histogram")
+                lines.extend(histogram.render(full_name))
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                counters.setdefault(name, {})[_label_key(labels)] = value
+
+        for name, series in sorted(counters.items()):
+            full_name = PREFIX + name
+            lines.append(f"# HELP {full_name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {full_name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{full_name}{_label_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,379 @@
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+ALLPLAYERS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2024allplayers.csv")
+# key_retro -> key_mlbam for the allplayers rows, used when the Chadwick
+# register cannot be loaded (e.g. a trimmed export of the register)
+ID_MAP_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "player_ids.csv")
+ALLPLAYERS_SEASON = 2024
+ID_KEYS = ("mlbam", "retro", "bbref", "fangraphs")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """
+    Lowercase, strip accents and punctuation, join runs of initials and
+    collapse whitespace so "J. D. Martínez" and "jd martinez" share a key.
+    """
+    if not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    name = re.sub(r"[^a-z0-9 ]+", "", name.replace("-", " "))
+
+    tokens = []
+    joining_initials = False
+    for token in name.split():
+        if len(token) == 1 and joining_initials:
+            tokens[-1] += token
+        else:
+            tokens.append(token)
+            joining_initials = len(token) == 1
+    return " ".join(tokens)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_register():
+    """
+    The Chadwick register via pybaseball (cached to disk after the first
+    download), or None when it cannot be loaded.
+    """
+    try:
+        from pybaseball import chadwick_register
+        return chadwick_register(save=True)
+    except Exception as e:
+        print(f"Could not load the Chadwick register, using local players only: {e}")
+        return None
+
+
+def load_allplayers(path=ALLPLAYERS_CSV):
+    """
+    Retrosheet's season player list: ids, handedness, team and appearances.
+    """
+    import pandas as pd
+
+    if not os.path.isfile(path):
+        return None
+    players = pd.read_csv(path, dtype={'id': str, 'bat': str, 'throw': str, 'team': str})
+    return players.rename(columns={
+        'id': 'key_retro', 'first': 'name_first', 'last': 'name_last',
+        'bat': 'bats', 'throw': 'throws'
+    })
+
+
+def load_id_map(path=ID_MAP_CSV):
+    """
+    key_retro -> key_mlbam pairs from a local CSV, or None when there is none.
+    """
+    import pandas as pd
+
+    if not os.path.isfile(path):
+        return None
+    ids = pd.read_csv(path, dtype={'key_retro': str})
+    return ids[['key_retro', 'key_mlbam']].dropna().drop_duplicates('key_retro')
+
+
+def merge_sources(register, allplayers, id_map=None):
+    """
+    One row per player: the register's ids and career span, joined on the
+    Retrosheet id with handedness, team and appearances from allplayers.
+    Players only present in allplayers keep their Retrosheet id alone.
+    Without the register, MLBAM ids come from id_map.
+    """
+    import pandas as pd
+
+    local_columns = ['key_retro', 'name_first', 'name_last', 'bats', 'throws', 'team', 'g', 'g_p', 'first_g', 'last_g']
+    if allplayers is not None:
+        allplayers = allplayers[[c for c in local_columns if c in allplayers.columns]]
+        # A player traded mid-season has one row per team; keep the latest
+        allplayers = allplayers.sort_values('last_g').drop_duplicates('key_retro', keep='last')
+
+    if register is None:
+        table = allplayers.copy()
+        if id_map is not None:
+            table = table.merge(id_map, on='key_retro', how='left')
+        season = (table['last_g'] // 10000).astype(int)
+        table['mlb_played_first'] = season
+        table['mlb_played_last'] = season
+    elif allplayers is None:
+        table = register.copy()
+    else:
+        extra = allplayers.drop(columns=['name_first', 'name_last', 'first_g', 'last_g'])
+        table = register.merge(extra, on='key_retro', how='left')
+        local_only = allplayers[~allplayers['key_retro'].isin(register['key_retro'])]
+        if len(local_only):
+            local_only = local_only.assign(
+                mlb_played_first=(local_only['last_g'] // 10000).astype(int),
+                mlb_played_last=(local_only['last_g'] // 10000).astype(int)
+            )
+            table = pd.concat([table, local_only], ignore_index=True)
+
+    return table.reset_index(drop=True)
+
+
+class PlayerRegistry:
+    """
+    Player names and ids held in flat arrays, with dict indexes for O(1)
+    exact-name and id lookups, a sorted key array for prefix (type-ahead)
+    search and a trigram index for fuzzy search.
+    """
+
+    def __init__(self, table, rosters=None):
+        n = len(table)
+        self.rosters = rosters or {}
+        self.name_first = table['name_first'].fillna("").astype(str).to_numpy()
+        self.name_last = table['name_last'].fillna("").astype(str).to_numpy()
+        self.key_mlbam = self._int_column(table, 'key_mlbam', -1)
+        self.key_fangraphs = self._int_column(table, 'key_fangraphs', -1)
+        self.key_retro = self._str_column(table, 'key_retro')
+        self.key_bbref = self._str_column(table, 'key_bbref')
+        self.played_first = self._int_column(table, 'mlb_played_first', 0).astype(np.int16)
+        self.played_last = self._int_column(table, 'mlb_played_last', 0).astype(np.int16)
+        self.bats = self._str_column(table, 'bats')
+        self.throws = self._str_column(table, 'throws')
+        self.team = self._str_column(table, 'team')
+        self.games = self._int_column(table, 'g', 0).astype(np.int32)
+        self.games_pitched = self._int_column(table, 'g_p', 0).astype(np.int32)
+
+        self.name_keys = np.array(
+            [normalize_name(f"{first} {last}") for first, last in zip(self.name_first, self.name_last)], dtype=object
+        )
+
+        self.by_name = {}
+        for i, key in enumerate(self.name_keys):
+            self.by_name.setdefault(key, []).append(i)
+
+        self.by_id = {
+            "mlbam": {int(v): i for i, v in enumerate(self.key_mlbam) if v >= 0},
+            "fangraphs": {int(v): i for i, v in enumerate(self.key_fangraphs) if v >= 0},
+            "retro": {v: i for i, v in enumerate(self.key_retro) if v},
+            "bbref": {v: i for i, v in enumerate(self.key_bbref) if v},
+        }
+
+        # Prefix index over both "first last" and "last first" orderings
+        last_first = [normalize_name(f"{last} {first}") for first, last in zip(self.name_first, self.name_last)]
+        prefix_keys = np.array(list(self.name_keys) + last_first, dtype=object)
+        prefix_rows = np.concatenate([np.arange(n), np.arange(n)])
+        order = np.argsort(prefix_keys, kind='stable')
+        self.prefix_keys = prefix_keys[order].astype(str)
+        self.prefix_rows = prefix_rows[order]
+
+        postings = {}
+        self.trigram_counts = np.zeros(n, dtype=np.int32)
+        for i, key in enumerate(self.name_keys):
+            grams = _trigrams(key)
+            self.trigram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    @staticmethod
+    def _int_column(table, column, missing):
+        import pandas as pd
+
+        if column not in table.columns:
+            return np.full(len(table), missing, dtype=np.int64)
+        return pd.to_numeric(table[column], errors='coerce').fillna(missing).astype(np.int64).to_numpy()
+
+    @staticmethod
+    def _str_column(table, column):
+        if column not in table.columns:
+            return np.full(len(table), "", dtype=object)
+        return table[column].fillna("").astype(str).to_numpy(dtype=object)
+
+    def __len__(self):
+        return len(self.name_keys)
+
+    def player(self, i):
+        """
+        Plain dict for one registry row.
+        """
+        return {
+            "name_first": self.name_first[i],
+            "name_last": self.name_last[i],
+            "key_mlbam": int(self.key_mlbam[i]),
+            "key_retro": self.key_retro[i],
+            "key_bbref": self.key_bbref[i],
+            "key_fangraphs": int(self.key_fangraphs[i]),
+            "mlb_played_first": int(self.played_first[i]),
+            "mlb_played_last": int(self.played_last[i]),
+            "bats": self.bats[i],
+            "throws": self.throws[i],
+            "team": self.team[i],
+        }
+
+    def lookup(self, first_name, last_name):
+        """
+        Every player whose normalized name matches exactly.
+        """
+        return [self.player(i) for i in self.by_name.get(normalize_name(f"{first_name} {last_name}"), [])]
+
+    def cross_ids(self, value, key="mlbam"):
+        """
+        Map an id of one kind ("mlbam", "retro", "bbref" or "fangraphs") to
+        the player's full record, or None.
+        """
+        if key not in self.by_id:
+            raise ValueError(f"key must be one of {ID_KEYS}")
+        if key in ("mlbam", "fangraphs"):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None
+        i = self.by_id[key].get(value)
+        return None if i is None else self.player(i)
+
+    def _rank(self, rows, year, player_type):
+        """
+        Order candidates: active in the season, plausible for the role (from
+        Retrosheet appearances), has an MLBAM id, then most recent.
+        """
+        def score(i):
+            active = year is not None and self.played_first[i] <= year <= self.played_last[i]
+            pitched = self.games_pitched[i] > 0
+            fielded = self.games[i] > self.games_pitched[i]
+            role_fit = (player_type == "pitcher" and pitched) or (player_type == "batter" and fielded)
+            return (active, role_fit, self.key_mlbam[i] >= 0, self.played_last[i])
+        return sorted(rows, key=score, reverse=True)
+
+    def resolve(self, first_name, last_name, year=None, player_type=None):
+        """
+        Pick the one player a (name, season, role) request means. Returns
+        (player, error). When several players still tie after ranking, the
+        first is used and the alternatives are logged.
+        """
+        rows = self.by_name.get(normalize_name(f"{first_name} {last_name}"), [])
+        if not rows:
+            return None, "Player not found"
+
+        try:
+            year = int(year) if year is not None else None
+        except (TypeError, ValueError):
+            year = None
+
+        ranked = self._rank(rows, year, player_type)
+        if len(ranked) > 1:
+            print(f"{first_name} {last_name} matches {len(ranked)} players; using "
+                  f"{self.key_mlbam[ranked[0]]} over {[int(self.key_mlbam[i]) for i in ranked[1:]]}")
+        return self.player(ranked[0]), None
+
+    def resolve_many(self, specs):
+        """
+        Resolve a list of {"first_name", "last_name", "year", "player_type"}
+        specs, e.g. a whole roster, in one call.
+        """
+        return [
+            self.resolve(spec.get('first_name'), spec.get('last_name'), spec.get('year'), spec.get('player_type'))
+            for spec in specs
+        ]
+
+    def roster(self, team):
+        """
+        Every player who appeared for a team in the allplayers season, with
+        the card roles their appearances call for.
+        """
+        players = []
+        for key_retro, roles in self.rosters.get(team.upper(), []):
+            i = self.by_id["retro"].get(key_retro)
+            if i is not None:
+                players.append((self.player(i), roles))
+        return players
+
+    def search(self, prefix, limit=10):
+        """
+        Type-ahead: players whose "first last" or "last first" name starts
+        with prefix, by binary search over the sorted keys.
+        """
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        start = np.searchsorted(self.prefix_keys, prefix, side='left')
+        end = np.searchsorted(self.prefix_keys, prefix + "\x7f", side='left')
+
+        seen = []
+        for i in self.prefix_rows[start:end]:
+            if i not in seen:
+                seen.append(i)
+                if len(seen) == limit:
+                    break
+        return [self.player(i) for i in seen]
+
+    def fuzzy_search(self, query, limit=5):
+        """
+        Closest names by trigram Dice similarity, for typos.
+        """
+        key = normalize_name(query)
+        grams = [gram for gram in _trigrams(key) if gram in self.postings]
+        if not grams:
+            return []
+
+        shared = np.bincount(np.concatenate([self.postings[gram] for gram in grams]), minlength=len(self))
+        scores = 2 * shared / (len(_trigrams(key)) + self.trigram_counts)
+        top = np.argpartition(-scores, min(limit, len(self) - 1))[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [dict(self.player(i), score=float(scores[i])) for i in top if shared[i] > 0]
+
+
+def player_roles(games, games_pitched):
+    """
+    Card roles from appearances: a pitcher card for anyone who pitched and a
+    batter card for anyone who appeared other than as a pitcher.
+    """
+    roles = []
+    if games > games_pitched:
+        roles.append("batter")
+    if games_pitched > 0:
+        roles.append("pitcher")
+    return roles
+
+
+def build_rosters(allplayers):
+    """
+    team -> [(key_retro, roles)] from allplayers; a traded player is listed
+    on every team they appeared for.
+    """
+    rosters = {}
+    if allplayers is None:
+        return rosters
+    for key_retro, team, games, games_pitched in zip(
+        allplayers['key_retro'], allplayers['team'], allplayers['g'], allplayers['g_p']
+    ):
+        rosters.setdefault(str(team).upper(), []).append((key_retro, player_roles(games, games_pitched)))
+    return rosters
+
+
+def build_registry(register=None, allplayers=None, id_map=None):
+    if register is None:
+        register = load_register()
+    if allplayers is None:
+        allplayers = load_allplayers()
+    if register is None and allplayers is None:
+        raise RuntimeError("No player sources available: the Chadwick register and 2024allplayers.csv both failed to load")
+    if register is None:
+        # 2024allplayers.csv has no MLBAM ids, and without them no card can be built
+        id_map = id_map if id_map is not None else load_id_map()
+        if id_map is None:
+            raise RuntimeError(f"The Chadwick register failed to load and {ID_MAP_CSV} does not exist; "
+                               "one of them is needed for the MLBAM ids Statcast is queried by")
+    return PlayerRegistry(merge_sources(register, allplayers, id_map), build_rosters(allplayers))
+
+
+def get_registry():
+    """
+    Process-wide registry, loaded on first use.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = build_registry()
+    return _registry
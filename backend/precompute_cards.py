@@ -0,0 +1,182 @@
+"""
+Build every card for a season ahead of time so interactive requests are
+cache hits.
+
+Walks every player in 2024allplayers.csv (a batter card for anyone who
+appeared other than as a pitcher, a pitcher card for anyone with g_p > 0),
+builds the cards across a process pool and writes them into the card cache.
+Progress is appended to a JSONL file as each card finishes, so an
+interrupted run picks up where it stopped. Players with no stats yet are
+tried again on every run. --refresh rebuilds every card, replacing the
+cached ones, e.g. to pick up the games played since the last run.
+
+Usage:
+    python precompute_cards.py --year 2024 --workers 8
+    python precompute_cards.py --team LAN --retry-failed
+    python precompute_cards.py --year 2024 --refresh
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import app
+from player_registry import ALLPLAYERS_SEASON, get_registry
+
+DONE_STATUSES = ("built", "cached")
+
+
+def card_jobs(year, team=None, player_type=None):
+    """
+    One (player_id, year, role) job per card, deduplicated across the teams
+    a traded player appeared for. Players without an MLBAM id are returned
+    separately since Statcast cannot be queried for them.
+    """
+    registry = get_registry()
+    teams = [team.upper()] if team else sorted(registry.rosters)
+    jobs, skipped, seen = [], [], set()
+    for team_code in teams:
+        for player, roles in registry.roster(team_code):
+            for role in roles:
+                if player_type and role != player_type:
+                    continue
+                if (player["key_retro"], role) in seen:
+                    continue
+                seen.add((player["key_retro"], role))
+                if player["key_mlbam"] < 0:
+                    skipped.append(f"{player['name_first']} {player['name_last']} ({player['key_retro']})")
+                else:
+                    jobs.append((player["key_mlbam"], year, role))
+    return jobs, skipped
+
+
+def job_key(job):
+    player_id, year, role = job
+    return f"{player_id}/{year}/{role}"
+
+
+def read_progress(path):
+    """
+    Latest status per job key from a previous run's progress file.
+    """
+    progress = {}
+    if not os.path.isfile(path):
+        return progress
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interrupted run
+            progress[entry["key"]] = entry["status"]
+    return progress
+
+
+def precompute_card(player_id, year, player_type, refresh=False):
+    """
+    Worker entry point: make sure one card is in the cache, rebuilding it
+    over any cached copy with refresh. Returns (status, error, seconds).
+    """
+    start = time.perf_counter()
+    key = (player_id, year, player_type)
+    if not refresh and app.card_cache.get(key) is not None:
+        return "cached", None, time.perf_counter() - start
+
+    try:
+        if refresh:
+            card, cacheable = app.build_player_card(*key)
+            if cacheable:
+                app.card_cache.put(key, card)
+        else:
+            card = app.load_card_by_id(*key)
+    except Exception as e:
+        return "error", str(e), time.perf_counter() - start
+
+    if card is None:
+        return "no_stats", None, time.perf_counter() - start
+    if "error" in card:
+        return "error", card["error"], time.perf_counter() - start
+    return "built", None, time.perf_counter() - start
+
+
+def run(jobs, workers, progress_path, retry_failed=False, refresh=False):
+    """
+    Build the pending jobs on a pool of at most `workers` processes, logging
+    each result to progress_path. With refresh every job is pending and
+    rebuilt, whatever earlier runs logged. Returns a summary dict.
+    """
+    progress = {} if refresh else read_progress(progress_path)
+    done = set(DONE_STATUSES) if retry_failed else set(DONE_STATUSES) | {"error"}
+    pending = [job for job in jobs if progress.get(job_key(job)) not in done]
+    print(f"{len(jobs)} cards, {len(jobs) - len(pending)} already done, {len(pending)} to build with {workers} workers")
+
+    statuses = Counter()
+    errors = []
+    build_seconds = 0.0
+    start = time.perf_counter()
+
+    os.makedirs(os.path.dirname(progress_path) or ".", exist_ok=True)
+    with open(progress_path, 'a') as log, ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(precompute_card, *job, refresh): job for job in pending}
+        for completed, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                status, error, seconds = future.result()
+            except Exception as e:  # The worker process itself died
+                status, error, seconds = "error", str(e), 0.0
+
+            statuses[status] += 1
+            build_seconds += seconds
+            if error:
+                errors.append({"key": job_key(job), "error": error})
+            log.write(json.dumps({"key": job_key(job), "status": status, "error": error, "seconds": round(seconds, 3)}) + "\n")
+            log.flush()
+
+            if completed % 100 == 0 or completed == len(pending):
+                elapsed = time.perf_counter() - start
+                print(f"{completed}/{len(pending)} cards in {elapsed:.1f}s ({completed / elapsed:.1f}/s)")
+
+    elapsed = time.perf_counter() - start
+    return {
+        "cards": len(jobs),
+        "previously_done": len(jobs) - len(pending),
+        "processed": len(pending),
+        "statuses": dict(statuses),
+        "elapsed_seconds": round(elapsed, 2),
+        "cards_per_second": round(len(pending) / elapsed, 2) if elapsed > 0 else None,
+        "mean_card_seconds": round(build_seconds / len(pending), 3) if pending else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute every player card for a season into the card cache")
+    parser.add_argument("--year", type=int, default=ALLPLAYERS_SEASON, help="Season to build cards for")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Maximum number of worker processes")
+    parser.add_argument("--team", help="Only build cards for one team code (e.g. LAN)")
+    parser.add_argument("--player-type", choices=["batter", "pitcher"], help="Only build one card role")
+    parser.add_argument("--progress", help="Progress log (default data/precompute_<year>.jsonl)")
+    parser.add_argument("--report", help="Write the summary report as JSON to this path")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry cards that errored on a previous run")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild every card, replacing cached ones and ignoring earlier progress")
+    args = parser.parse_args()
+
+    progress_path = args.progress or os.path.join(app.DATA_FOLDER, f"precompute_{args.year}.jsonl")
+    jobs, skipped = card_jobs(args.year, args.team, args.player_type)
+    summary = run(jobs, max(1, args.workers), progress_path, args.retry_failed, args.refresh)
+    summary["skipped_without_mlbam_id"] = skipped
+
+    print(f"Done: {summary['statuses']} in {summary['elapsed_seconds']}s; "
+          f"{len(summary['errors'])} errors, {len(skipped)} players without an MLBAM id")
+    for error in summary["errors"][:20]:
+        print(f"  {error['key']}: {error['error']}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(summary, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
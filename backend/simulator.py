@@ -0,0 +1,233 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER
+from dice_tables import NO_RESULT, card_tables
+
+CARD_PREFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "src", "card_preference.json")
+
+CARDS = ["pitcher", "batter"]
+BATCH_SIZE = 1 << 20
+MAX_SIMULATIONS = 100_000_000
+MAX_ROLLS = 1_000_000
+Z_95 = 1.959963984540054
+
+
+def load_card_preferences(path=CARD_PREFERENCE_FILE):
+    """
+    Load the per-count pitcher/batter card weights shared with the frontend.
+    """
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def face_counts(table, n_labels):
+    """
+    Number of die faces that resolve to each label, per row of a [..., face]
+    table. Codes outside 0..n_labels - 1 (faces that resolve to nothing) are
+    not counted.
+    """
+    table = np.asarray(table, dtype=np.int64)
+    rows = table.reshape(-1, table.shape[-1])
+    valid = (rows >= 0) & (rows < n_labels)
+    codes = rows + np.arange(len(rows))[:, None] * n_labels
+    return np.bincount(codes[valid], minlength=len(rows) * n_labels).reshape(table.shape[:-1] + (n_labels,))
+
+
+def event_faces(card, hand):
+    """
+    [count, event] die-face counts for one side ('lefty'/'righty') of a card.
+    """
+    return face_counts(card_tables(card)[hand], len(ALL_EVENTS_ORDER))
+
+
+def card_sides(batter_hand, pitcher_hand):
+    """
+    Which side of each card applies for a matchup: the pitcher card is read
+    against the batter's hand and the batter card against the pitcher's.
+    Switch hitters ('S' or 'B') bat from the side opposite the pitcher.
+    Returns (pitcher card side, batter card side).
+    """
+    if batter_hand in ("S", "B"):
+        batter_hand = "R" if pitcher_hand == "L" else "L"
+    side = {"L": "lefty", "R": "righty"}
+    return side[batter_hand], side[pitcher_hand]
+
+
+def compile_matchup(batter_card, pitcher_card, batter_hand="R", pitcher_hand="R", preferences=None):
+    """
+    Compile a matchup into a Walker alias table over the flattened
+    (count, active card, event) cells, following the frontend's three dice:
+    the count roll on the pitcher's count_frequencies, the 0-99 roll against
+    card_preference.json and the event roll on the active card. Returns
+    thresholds and aliases for sampling in O(1) per draw, plus the cell
+    probabilities and their shape.
+
+    Dice combinations that resolve to nothing (gaps in a card) are redrawn;
+    their share of the roll space is reported as unresolved_rate.
+    """
+    if preferences is None:
+        preferences = load_card_preferences()
+
+    pitcher_card_side, batter_card_side = card_sides(batter_hand, pitcher_hand)
+    count_faces = face_counts(card_tables(pitcher_card)["count"], len(COUNT_ORDER))
+    card_weights = np.array([
+        [preferences[label]["pitcher"] for label in COUNT_ORDER],
+        [preferences[label]["batter"] for label in COUNT_ORDER],
+    ], dtype=np.int64)
+    faces = np.stack([event_faces(pitcher_card, pitcher_card_side), event_faces(batter_card, batter_card_side)])
+
+    # Integer weights out of 1000 * 100 * 1000 dice combinations, [count, card, event]
+    weights = count_faces[:, None, None] * card_weights.T[:, :, None] * faces.transpose(1, 0, 2)
+    resolved = int(weights.sum())
+    if resolved == 0:
+        return None
+
+    probabilities = weights / resolved
+    thresholds, aliases = alias_table(probabilities.ravel())
+    return {
+        "thresholds": thresholds,
+        "aliases": aliases,
+        "probabilities": probabilities,
+        "shape": weights.shape,
+        "unresolved_rate": 1 - resolved / (1000 * 100 * 1000),
+    }
+
+
+def resolve_rolls(batter_card, pitcher_card, rolls, batter_hand="R", pitcher_hand="R", preferences=None):
+    """
+    Resolve a batch of the frontend's three dice with table lookups. rolls is
+    [n, 3]: the count roll (0-999) on the pitcher's count_frequencies, the
+    0-99 roll against card_preference.json and the event roll (0-999) on the
+    active card. Returns (count, card, event) code arrays indexing
+    COUNT_ORDER, CARDS and ALL_EVENTS_ORDER; count and event are NO_RESULT
+    where the dice land in a gap in a card.
+    """
+    if preferences is None:
+        preferences = load_card_preferences()
+
+    pitcher_card_side, batter_card_side = card_sides(batter_hand, pitcher_hand)
+    pitcher_tables, batter_tables = card_tables(pitcher_card), card_tables(batter_card)
+    pitcher_shares = np.array([preferences[label]["pitcher"] for label in COUNT_ORDER])
+
+    rolls = np.asarray(rolls, dtype=np.int64).reshape(-1, 3)
+    counts = pitcher_tables["count"][rolls[:, 0]]
+    resolved = counts != NO_RESULT
+    rows = np.where(resolved, counts, 0)
+    cards = (rolls[:, 1] >= pitcher_shares[rows]).astype(np.uint8)
+    events = np.where(
+        cards == CARDS.index("batter"),
+        batter_tables[batter_card_side][rows, rolls[:, 2]],
+        pitcher_tables[pitcher_card_side][rows, rolls[:, 2]],
+    )
+    events[~resolved] = NO_RESULT
+    return counts, cards, events
+
+
+def alias_table(probabilities):
+    """
+    Build a Walker/Vose alias table so each draw costs O(1) regardless of how
+    many cells the matchup has. Cell i is kept when the fractional part of the
+    scaled uniform is below thresholds[i], otherwise aliases[i] is used.
+    """
+    n_cells = len(probabilities)
+    scaled = probabilities * n_cells
+    thresholds = np.ones(n_cells)
+    aliases = np.arange(n_cells, dtype=np.intp)
+
+    small = [i for i in range(n_cells) if scaled[i] < 1.0]
+    large = [i for i in range(n_cells) if scaled[i] >= 1.0]
+    while small and large:
+        lo = small.pop()
+        hi = large.pop()
+        thresholds[lo] = scaled[lo]
+        aliases[lo] = hi
+        scaled[hi] = (scaled[hi] + scaled[lo]) - 1.0
+        (small if scaled[hi] < 1.0 else large).append(hi)
+    # Anything left over is 1.0 up to rounding and keeps its own cell
+    return thresholds, aliases
+
+
+def simulate_plate_appearances(compiled, n, seed=None, batch_size=BATCH_SIZE):
+    """
+    Draw n plate appearances in vectorized batches and return the
+    [count, card, event] tally.
+    """
+    rng = np.random.default_rng(seed)
+    thresholds = compiled["thresholds"]
+    aliases = compiled["aliases"]
+    n_cells = len(thresholds)
+    tally = np.zeros(n_cells, dtype=np.int64)
+    remaining = n
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        scaled = rng.random(size) * n_cells
+        cells = scaled.astype(np.intp)
+        cells = np.where(scaled - cells < thresholds[cells], cells, aliases[cells])
+        tally += np.bincount(cells, minlength=n_cells)
+        remaining -= size
+    return tally.reshape(compiled["shape"])
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """
+    Wilson score interval for a binomial proportion (vectorized).
+    """
+    p = successes / n
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return center - half_width, center + half_width
+
+
+def summarize(tally, compiled):
+    """
+    Aggregate a [count, card, event] tally into outcome rates with 95%
+    confidence intervals, plus the count and active-card mix.
+    """
+    n = int(tally.sum())
+    event_totals = tally.sum(axis=(0, 1))
+    low, high = wilson_interval(event_totals, n)
+    expected = compiled["probabilities"].sum(axis=(0, 1))
+
+    outcomes = {
+        event: {
+            "count": int(event_totals[i]),
+            "rate": float(event_totals[i] / n),
+            "ci_low": float(low[i]),
+            "ci_high": float(high[i]),
+            "expected_rate": float(expected[i])
+        }
+        for i, event in enumerate(ALL_EVENTS_ORDER)
+    }
+    count_totals = tally.sum(axis=(1, 2))
+    card_totals = tally.sum(axis=(0, 2))
+    return {
+        "plate_appearances": n,
+        "outcomes": outcomes,
+        "counts": {label: float(count_totals[i] / n) for i, label in enumerate(COUNT_ORDER)},
+        "active_card": {card: float(card_totals[i] / n) for i, card in enumerate(CARDS)},
+        "unresolved_rate": compiled["unresolved_rate"],
+    }
+
+
+def simulate_matchup(batter_card, pitcher_card, n, batter_hand="R", pitcher_hand="R", seed=None):
+    """
+    Compile a matchup, simulate n plate appearances and summarize them.
+    """
+    compiled = compile_matchup(batter_card, pitcher_card, batter_hand, pitcher_hand)
+    if compiled is None:
+        return None, "Cards do not resolve any plate appearance for this matchup"
+
+    start = time.perf_counter()
+    tally = simulate_plate_appearances(compiled, n, seed)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(tally, compiled)
+    summary["seed"] = seed
+    summary["elapsed_seconds"] = elapsed
+    summary["pa_per_second"] = n / elapsed if elapsed > 0 else None
+    return summary, None
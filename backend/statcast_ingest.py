@@ -0,0 +1,203 @@
+"""
+Resumable, chunked Statcast ingestion.
+
+A date range is split into chunks that are fetched on a bounded thread pool.
+A failing chunk is retried with exponential backoff and jitter. Each chunk
+is written to its own Parquet file as soon as it completes, so a run that
+dies or gives up on a chunk keeps everything it fetched, and a rerun only
+fetches the chunks that are missing. Chunks that end today or later are not
+saved, since Savant is still adding games to them.
+
+The data source is any fetch(start_dt, end_dt) -> DataFrame callable, e.g.
+    lambda start_dt, end_dt: statcast_batter(start_dt, end_dt, player_id)
+so the pipeline runs just as well against a local stand-in that injects
+failures (benchmarks/synthetic.py has one).
+
+Usage:
+    python statcast_ingest.py 2024 --chunk-days 7 --workers 4 --folder data/statcast/chunks/2024
+"""
+import argparse
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+
+from metrics import metrics
+
+CHUNK_DAYS = 7
+WORKERS = 4
+RETRIES = 4
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class IngestError(Exception):
+    """
+    Raised when some chunks still fail after their retries. The chunks that
+    did complete are saved, so rerunning the same ingest picks up from here.
+    """
+
+    def __init__(self, failed, completed, total):
+        self.failed = failed
+        self.completed = completed
+        self.total = total
+        first_start, first_end, first_error = failed[0]
+        super().__init__(
+            f"{len(failed)} of {total} date chunks failed after retries "
+            f"(first: {first_start} to {first_end}: {first_error}); {completed} completed chunks are saved for a retry"
+        )
+
+
+def date_chunks(start_dt, end_dt, chunk_days=CHUNK_DAYS):
+    """
+    Consecutive (start, end) ISO date pairs covering start_dt..end_dt
+    inclusive, each at most chunk_days long.
+    """
+    start, end = date.fromisoformat(str(start_dt)), date.fromisoformat(str(end_dt))
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+        chunks.append((start.isoformat(), chunk_end.isoformat()))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def chunk_path(folder, start_dt, end_dt):
+    return os.path.join(folder, f"{start_dt}_{end_dt}.parquet")
+
+
+def fetch_with_retry(fetch, start_dt, end_dt, retries=RETRIES, backoff=BACKOFF_SECONDS, sleep=time.sleep):
+    """
+    fetch(start_dt, end_dt), retried up to `retries` times on any exception.
+    The waits are jittered and double each time: backoff x 1, 2, 4, ...
+    (capped at MAX_BACKOFF_SECONDS). The last exception is re-raised.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fetch(start_dt, end_dt)
+        except Exception:
+            if attempt == retries:
+                raise
+            metrics.count("ingest_retries_total")
+            sleep(min(backoff * 2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.5))
+
+
+def _arrow_safe(frame):
+    """
+    Object columns holding mixed types (Statcast has a few) as strings, so
+    Parquet can store them.
+    """
+    import pandas as pd
+
+    for column in frame.columns[frame.dtypes == object]:
+        if pd.api.types.infer_dtype(frame[column], skipna=True) not in ("string", "empty"):
+            frame[column] = frame[column].map(lambda value: value if value is None or pd.isna(value) else str(value))
+    return frame
+
+
+def save_chunk(path, frame):
+    """
+    Write a chunk to a temporary file and rename it into place, so a chunk
+    file on disk is always complete.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    _arrow_safe(frame.reset_index(drop=True)).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def ingest(fetch, start_dt, end_dt, folder, chunk_days=CHUNK_DAYS, workers=WORKERS, retries=RETRIES,
+           backoff=BACKOFF_SECONDS, keep_chunks=False, save_every_chunk=True, today=None, sleep=time.sleep):
+    """
+    Fetch start_dt..end_dt in chunks, saving each finished chunk under
+    folder and skipping chunks already saved there. Returns the combined
+    frame in date order. Raises IngestError once every chunk has been tried
+    if any still failed. The chunk files are removed after a complete run
+    unless keep_chunks is set.
+
+    With save_every_chunk=False, finished chunks are only written when the
+    run fails. This suits small pulls, where a crash loses little, and it
+    keeps the Parquet writes off the success path.
+    """
+    import pandas as pd
+
+    today = today or date.today().isoformat()
+    chunks = date_chunks(start_dt, end_dt, chunk_days)
+    frames = {}
+    pending = []
+    for chunk in chunks:
+        path = chunk_path(folder, *chunk)
+        if os.path.isfile(path):
+            frames[chunk] = pd.read_parquet(path)
+        else:
+            pending.append(chunk)
+    if len(pending) < len(chunks):
+        print(f"Resuming: {len(chunks) - len(pending)} of {len(chunks)} chunks already saved in {folder}")
+
+    def fetch_chunk(chunk):
+        with metrics.stage("ingest_chunk"):
+            frame = fetch_with_retry(fetch, *chunk, retries=retries, backoff=backoff, sleep=sleep)
+            frame = frame if frame is not None else pd.DataFrame()
+            if save_every_chunk and chunk[1] < today:
+                save_chunk(chunk_path(folder, *chunk), frame)
+        return frame
+
+    failed = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ingest") as executor:
+            futures = {executor.submit(fetch_chunk, chunk): chunk for chunk in pending}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    frames[chunk] = future.result()
+                except Exception as e:
+                    failed.append((*chunk, f"{type(e).__name__}: {e}"))
+        metrics.count("ingest_chunks_total", len(pending) - len(failed), result="fetched")
+        metrics.count("ingest_chunks_total", len(failed), result="failed")
+
+    if failed:
+        if not save_every_chunk:
+            for chunk in pending:
+                if chunk in frames and chunk[1] < today:
+                    save_chunk(chunk_path(folder, *chunk), frames[chunk])
+        raise IngestError(sorted(failed), len(frames), len(chunks))
+
+    parts = [frames[chunk] for chunk in chunks if len(frames[chunk])]
+    combined = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    if not keep_chunks:
+        shutil.rmtree(folder, ignore_errors=True)
+    return combined
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch a Statcast date range from Baseball Savant in resumable chunks")
+    parser.add_argument("year", type=int, help="Season to fetch (March through November)")
+    parser.add_argument("--folder", required=True, help="Folder for the saved chunks (reuse it to resume)")
+    parser.add_argument("--output", help="Write the combined events to this Parquet file")
+    parser.add_argument("--chunk-days", type=int, default=CHUNK_DAYS, help="Days per chunk")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Chunks fetched at once")
+    parser.add_argument("--retries", type=int, default=RETRIES, help="Retries per chunk")
+    args = parser.parse_args()
+
+    from pybaseball import statcast
+    from statcast_store import SEASON_END, SEASON_START
+
+    start = time.perf_counter()
+    try:
+        frame = ingest(lambda start_dt, end_dt: statcast(start_dt, end_dt, verbose=False, parallel=False),
+                       f"{args.year}-{SEASON_START}", f"{args.year}-{SEASON_END}", args.folder,
+                       args.chunk_days, args.workers, args.retries, keep_chunks=True)
+    except IngestError as e:
+        print(f"{e}. Rerun the same command to resume.")
+        raise SystemExit(1)
+    if args.output:
+        frame.to_parquet(args.output, index=False)
+    print(f"Fetched {len(frame)} rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
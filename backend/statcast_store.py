@@ -0,0 +1,239 @@
+"""
+Local columnar store of Statcast plate-appearance events.
+
+A season is bulk-loaded once (from pybaseball.statcast or from a local
+CSV/Parquet dump) and written as one Parquet file per role under
+data/statcast/season=<year>/<role>.parquet. Each file is sorted by the role's
+player id and holds exactly one row group per player, so a card build reads a
+single row group with only the columns it needs instead of fetching the
+season over the network.
+
+Usage:
+    python statcast_store.py 2024
+    python statcast_store.py 2024 --file statcast_2024.csv
+"""
+import argparse
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+import statcast_ingest
+from card_constants import HAND_COLUMNS
+from card_engine import compact_events
+
+STORE_FOLDER = os.path.join("data", "statcast")
+ROLES = ("batter", "pitcher")
+
+# Everything we keep from the ~90 Statcast columns
+STORE_COLUMNS = ["game_date", "game_pk", "batter", "pitcher", "events", "bb_type", "balls", "strikes", "stand", "p_throws"]
+# What the card builders actually read
+CARD_COLUMNS = ["events", "bb_type", "balls", "strikes", "stand", "p_throws"]
+
+SEASON_START = "03-01"
+SEASON_END = "11-30"
+
+_index_lock = threading.Lock()
+_row_group_indexes = {}
+
+
+def season_path(year, role):
+    return os.path.join(STORE_FOLDER, f"season={year}", f"{role}.parquet")
+
+
+def has_season(year):
+    """
+    True when both role files for the season have been loaded.
+    """
+    return all(os.path.isfile(season_path(year, role)) for role in ROLES)
+
+
+def prepare_frame(frame):
+    """
+    Keep only plate-appearance-ending pitches and the stored columns.
+    """
+    import pandas as pd
+
+    frame = frame.loc[frame['events'].notna(), [c for c in STORE_COLUMNS if c in frame.columns]]
+    frame = frame.assign(game_date=pd.to_datetime(frame['game_date']))
+    return frame
+
+
+def write_season(year, frame):
+    """
+    Write one season's events as a Parquet file per role, with one row group
+    per player. Files are written to a temporary name and renamed into place.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    frame = prepare_frame(frame)
+    os.makedirs(os.path.dirname(season_path(year, ROLES[0])), exist_ok=True)
+
+    for role in ROLES:
+        role_frame = frame.sort_values([role, 'game_date'], kind='stable')
+        table = pa.Table.from_pandas(role_frame, preserve_index=False)
+        player_ids = role_frame[role].to_numpy()
+        starts = np.flatnonzero(np.r_[True, player_ids[1:] != player_ids[:-1]]) if len(player_ids) else []
+        ends = np.r_[starts[1:], len(player_ids)] if len(player_ids) else []
+
+        path = season_path(year, role)
+        tmp_path = f"{path}.tmp"
+        with pq.ParquetWriter(tmp_path, table.schema, compression='zstd') as writer:
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+        os.replace(tmp_path, path)
+
+    print(f"Stored {len(frame)} events for {year} in {os.path.dirname(season_path(year, ROLES[0]))}")
+
+
+def fetch_events(start_dt, end_dt):
+    """
+    One date range of league-wide Statcast events, trimmed to the stored
+    columns.
+    """
+    from pybaseball import statcast
+
+    frame = statcast(start_dt, end_dt, verbose=False, parallel=False)
+    return prepare_frame(frame) if len(frame) else frame
+
+
+def load_season_from_statcast(year, chunk_days=statcast_ingest.CHUNK_DAYS, workers=statcast_ingest.WORKERS):
+    """
+    Pull a whole season from Baseball Savant in resumable date chunks and
+    store it. Finished chunks are kept under data/statcast/chunks/ until the
+    season is written, so a failed or interrupted load resumes where it
+    stopped.
+    """
+    folder = os.path.join(STORE_FOLDER, "chunks", f"season={year}")
+    frame = statcast_ingest.ingest(fetch_events, f"{year}-{SEASON_START}", f"{year}-{SEASON_END}", folder,
+                                   chunk_days, workers, keep_chunks=True)
+    write_season(year, frame)
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def load_season_from_file(year, path):
+    """
+    Store a season from a local CSV or Parquet Statcast dump.
+    """
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path, columns=STORE_COLUMNS)
+    else:
+        frame = pd.read_csv(path, usecols=lambda column: column in STORE_COLUMNS)
+    write_season(year, frame)
+
+
+def _row_group_index(path):
+    """
+    Return (player id -> row group, file metadata) for a role file, cached
+    until the file changes so warm reads skip parsing the footer.
+    """
+    import pyarrow.parquet as pq
+
+    mtime = os.path.getmtime(path)
+    with _index_lock:
+        cached = _row_group_indexes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+
+    parquet_file = pq.ParquetFile(path)
+    role = os.path.splitext(os.path.basename(path))[0]
+    column = parquet_file.schema_arrow.get_field_index(role)
+    index = {}
+    for i in range(parquet_file.metadata.num_row_groups):
+        statistics = parquet_file.metadata.row_group(i).column(column).statistics
+        index[statistics.min] = i
+
+    with _index_lock:
+        _row_group_indexes[path] = (mtime, index, parquet_file.metadata)
+    return index, parquet_file.metadata
+
+
+def read_player(year, player_id, role, columns=CARD_COLUMNS, start_date=None, end_date=None):
+    """
+    Read one player's events for a season and role. Only the player's row
+    group and the requested columns are decoded. Returns None when the season
+    has not been loaded, and an empty frame when the player has no events.
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    path = season_path(year, role)
+    if not os.path.isfile(path):
+        return None
+
+    read_columns = list(columns)
+    if (start_date or end_date) and 'game_date' not in read_columns:
+        read_columns.append('game_date')
+
+    index, metadata = _row_group_index(path)
+    row_group = index.get(int(player_id))
+    if row_group is None:
+        return pd.DataFrame(columns=list(columns))
+
+    frame = pq.ParquetFile(path, metadata=metadata).read_row_group(row_group, columns=read_columns).to_pandas()
+    if start_date or end_date:
+        in_window = np.ones(len(frame), dtype=bool)
+        if start_date:
+            in_window &= (frame['game_date'] >= pd.Timestamp(start_date)).to_numpy()
+        if end_date:
+            in_window &= (frame['game_date'] <= pd.Timestamp(end_date)).to_numpy()
+        frame = frame.loc[in_window, list(columns)]
+    return frame.reset_index(drop=True)
+
+
+def read_season(year, role, extra_columns=None, start_date=None, end_date=None):
+    """
+    Every event of a season for a role as one compact_events frame, sorted by
+    the role's split hand and carrying the player id column (plus any other
+    extra_columns). String columns are read dictionary-encoded, so the
+    full-width object frame is never built. Returns None when the season has
+    not been loaded.
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    path = season_path(year, role)
+    if not os.path.isfile(path):
+        return None
+
+    extra_columns = list(extra_columns or [role])
+    read_columns = list(dict.fromkeys(CARD_COLUMNS + extra_columns + (['game_date'] if start_date or end_date else [])))
+    table = pq.read_table(path, columns=read_columns, read_dictionary=['events', 'bb_type', 'stand', 'p_throws'])
+    frame = table.to_pandas()
+    if start_date or end_date:
+        in_window = np.ones(len(frame), dtype=bool)
+        if start_date:
+            in_window &= (frame['game_date'] >= pd.Timestamp(start_date)).to_numpy()
+        if end_date:
+            in_window &= (frame['game_date'] <= pd.Timestamp(end_date)).to_numpy()
+        frame = frame.loc[in_window]
+    return compact_events(frame, HAND_COLUMNS[role], extra_columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a Statcast season into the local event store")
+    parser.add_argument("year", type=int, help="Season to load")
+    parser.add_argument("--file", help="Local CSV or Parquet Statcast dump to load instead of Baseball Savant")
+    parser.add_argument("--chunk-days", type=int, default=statcast_ingest.CHUNK_DAYS, help="Days per Savant request")
+    parser.add_argument("--workers", type=int, default=statcast_ingest.WORKERS, help="Savant requests in flight at once")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.file:
+        load_season_from_file(args.year, args.file)
+    else:
+        try:
+            load_season_from_statcast(args.year, args.chunk_days, args.workers)
+        except statcast_ingest.IngestError as e:
+            print(f"{e}. Rerun the same command to resume.")
+            raise SystemExit(1)
+    print(f"Loaded {args.year} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
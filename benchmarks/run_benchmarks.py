@@ -0,0 +1,369 @@
+"""
+Offline benchmarks for card building, error aggregation and the card API.
+
+Every case runs on synthetic data from synthetic.py. The API cases go
+through the Flask test client, with pybaseball's Statcast fetchers and the
+Chadwick register replaced by local stand-ins, and the ingest cases fetch
+from a stand-in that fails a share of calls, so nothing touches the
+network. The startup case times a fresh interpreter importing the app and
+fails if pandas, pyarrow or pybaseball are imported along with it.
+
+Each case runs once to warm up and then `--repeat` timed rounds. Results
+are compared with the stored medians in baselines.json.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --only card/ --repeat 10
+    python benchmarks/run_benchmarks.py --save            # refresh baselines.json
+    python benchmarks/run_benchmarks.py --check 1.25      # exit 1 on a >25% slowdown
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+REPO_FOLDER = os.path.dirname(BENCHMARK_FOLDER)
+sys.path[:0] = [BENCHMARK_FOLDER, os.path.join(REPO_FOLDER, "backend"), REPO_FOLDER]
+
+import numpy as np
+import pandas as pd
+
+import synthetic
+from card_engine import build_card, build_cards, compact_events
+
+BASELINES_JSON = os.path.join(BENCHMARK_FOLDER, "baselines.json")
+YEAR = 2024
+
+CASES = []
+_frames = {}
+
+
+def case(name, rounds=None):
+    """
+    Register a benchmark. The decorated function does any one-off setup and
+    returns the callable to time, or (setup, run) when run needs fresh state
+    (e.g. an empty cache) before every round; setup is not timed.
+    """
+    def register(fn):
+        CASES.append((name, rounds, fn))
+        return fn
+    return register
+
+
+def frame(scale):
+    if scale not in _frames:
+        _frames[scale] = synthetic.scale_frame(scale)
+    return _frames[scale]
+
+
+# Card building
+
+@case("card/compact_events/league")
+def compact_league():
+    stats = frame("league")
+    return lambda: compact_events(stats, "stand", ("batter",))
+
+
+@case("card/build_card/player")
+def build_card_player():
+    stats = frame("player")
+    return lambda: build_card(stats, "batter")
+
+
+@case("card/build_card/player_compact")
+def build_card_player_compact():
+    stats = compact_events(frame("player"), "stand")
+    return lambda: build_card(stats, "batter")
+
+
+@case("card/build_cards/team")
+def build_cards_team():
+    stats = frame("team")
+    return lambda: build_cards(stats, "batter")
+
+
+@case("card/build_cards/league")
+def build_cards_league():
+    stats = frame("league")
+    return lambda: build_cards(stats, "batter")
+
+
+@case("card/build_cards/league_compact")
+def build_cards_league_compact():
+    stats = compact_events(frame("league"), "stand", ("batter",))
+    return lambda: build_cards(stats, "batter")
+
+
+@case("card/calculate_ranges/player")
+def calculate_ranges_player():
+    import app
+
+    stats = frame("player")
+    lefties = stats[stats["p_throws"] == "L"]
+    return lambda: app.calculate_ranges(lefties)
+
+
+@case("card/calculate_count_frequencies/player")
+def calculate_count_frequencies_player():
+    import app
+
+    stats = frame("player")
+    return lambda: app.calculate_count_frequencies(stats)
+
+
+# Error aggregation over one season of Retrosheet plays
+
+def plays_csv():
+    path = os.path.join(os.getcwd(), "plays.csv")
+    if not os.path.isfile(path):
+        synthetic.write_plays_csv(path)
+    return path
+
+
+@case("errors/process_event_files/season")
+def process_event_files_season():
+    import player_errors
+
+    path = plays_csv()
+    return lambda: player_errors.process_event_files([path], workers=1)
+
+
+@case("errors/process_event_data/season", rounds=3)
+def process_event_data_season():
+    import player_errors
+
+    path = plays_csv()
+    return lambda: player_errors.process_event_data(path)
+
+
+# End-to-end API handling with local stand-ins for pybaseball
+
+BATTER_ID, PITCHER_ID = 600001, 500001
+STANDINS = {}
+
+
+def standin_app():
+    """
+    Import app with the Statcast fetchers and player registry pointed at
+    synthetic data. Returns (app module, test client).
+    """
+    import app
+    import player_registry
+
+    if not STANDINS:
+        batter = synthetic.pitch_frame(650, batters=1, pitchers=300, seed=1).assign(batter=BATTER_ID)
+        pitcher = synthetic.pitch_frame(750, batters=400, pitchers=1, seed=2).assign(pitcher=PITCHER_ID)
+        STANDINS.update(batter=synthetic.StatcastStandIn(batter, "batter"),
+                        pitcher=synthetic.StatcastStandIn(pitcher, "pitcher"))
+        app.STATCAST_FETCHERS.update(STANDINS)
+        register = synthetic.chadwick_register(pd.concat([batter.head(1), pitcher.head(1)]))
+        player_registry._registry = player_registry.build_registry(register=register)
+    return app, app.app.test_client()
+
+
+def player_spec(player_id, player_type):
+    return {"first_name": f"First{player_id}", "last_name": f"Last{player_id}", "year": YEAR, "player_type": player_type}
+
+
+def fresh_card_cache(app):
+    from card_cache import CardCache
+
+    folder = os.path.join(os.getcwd(), "data", "cards")
+    shutil.rmtree(folder, ignore_errors=True)
+    app.card_cache = CardCache(folder)
+
+
+def post(client, path, body):
+    response = client.post(path, json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+@case("api/get_stats/cold")
+def get_stats_cold():
+    app, client = standin_app()
+    body = player_spec(BATTER_ID, "batter")
+    return lambda: fresh_card_cache(app), lambda: post(client, "/api/get_stats", body)
+
+
+@case("api/get_stats/warm")
+def get_stats_warm():
+    app, client = standin_app()
+    body = player_spec(BATTER_ID, "batter")
+    return lambda: post(client, "/api/get_stats", body)
+
+
+@case("api/get_both_stats/cold")
+def get_both_stats_cold():
+    app, client = standin_app()
+    body = {"batter": player_spec(BATTER_ID, "batter"), "pitcher": player_spec(PITCHER_ID, "pitcher")}
+    return lambda: fresh_card_cache(app), lambda: post(client, "/api/get_both_stats", body)
+
+
+@case("api/get_both_stats/warm")
+def get_both_stats_warm():
+    app, client = standin_app()
+    body = {"batter": player_spec(BATTER_ID, "batter"), "pitcher": player_spec(PITCHER_ID, "pitcher")}
+    return lambda: post(client, "/api/get_both_stats", body)
+
+
+@case("api/roll/batch")
+def roll_batch():
+    app, client = standin_app()
+    body = {"batter": player_spec(BATTER_ID, "batter"), "pitcher": player_spec(PITCHER_ID, "pitcher"),
+            "n": 100_000, "seed": 0}
+    return lambda: post(client, "/api/roll", body)
+
+
+# Cold start: a fresh interpreter importing the app, as a worker boot or a
+# reloader restart does
+
+# Libraries the app must leave to the code paths that need them
+LAZY_MODULES = ("pandas", "pyarrow", "pybaseball")
+STARTUP_SCRIPT = f"""
+import sys
+import app
+app.create_app()
+eager = [module for module in {LAZY_MODULES!r} if module in sys.modules]
+if eager:
+    sys.exit("imported at startup: " + ", ".join(eager))
+"""
+
+
+def start_app():
+    env = {**os.environ, "PYTHONPATH": os.path.join(REPO_FOLDER, "backend")}
+    env.pop("ICORE_PRELOAD", None)
+    result = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"App startup failed: {(result.stderr or result.stdout).strip()[-500:]}")
+
+
+@case("startup/import_app", rounds=5)
+def startup_import_app():
+    return start_app
+
+
+# Chunked Statcast ingestion against a local stand-in
+
+def ingest_case(failure_rate):
+    import statcast_ingest
+
+    standin = synthetic.StatcastStandIn(frame("team"), failure_rate=failure_rate, seed=3)
+    folder = os.path.join(os.getcwd(), "data", "ingest")
+    start_dt = synthetic.SEASON_START.date().isoformat()
+    end_dt = (synthetic.SEASON_START + pd.Timedelta(days=synthetic.SEASON_DAYS - 1)).date().isoformat()
+    # backoff=0: time the chunking, retries and chunk files, not the waits
+    return (lambda: shutil.rmtree(folder, ignore_errors=True),
+            lambda: statcast_ingest.ingest(standin, start_dt, end_dt, folder, retries=8, backoff=0))
+
+
+@case("ingest/season/team")
+def ingest_season_team():
+    return ingest_case(0.0)
+
+
+@case("ingest/season/team_flaky")
+def ingest_season_team_flaky():
+    return ingest_case(0.2)
+
+
+def time_case(fn, repeat):
+    prepared = fn()
+    setup, run = prepared if isinstance(prepared, tuple) else (None, prepared)
+    timings = []
+    for round_number in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if round_number:  # The first round is a warm-up
+            timings.append(elapsed)
+    return {"min": min(timings), "median": statistics.median(timings), "rounds": len(timings)}
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def read_baselines(path=BASELINES_JSON):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f).get("cases", {})
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:10.2f} ms" if seconds < 1 else f"{seconds:10.3f} s "
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmarks and compare them with the stored baselines")
+    parser.add_argument("--only", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per case (slow cases may use fewer)")
+    parser.add_argument("--save", action="store_true", help="Write the results to baselines.json")
+    parser.add_argument("--check", type=float, metavar="RATIO",
+                        help="Exit 1 if any case's median is more than RATIO times its baseline")
+    parser.add_argument("--output", help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+
+    baselines = read_baselines()
+    selected = [(name, rounds, fn) for name, rounds, fn in CASES if not args.only or args.only in name]
+    results = {}
+    regressions = []
+
+    # The app writes its data folder (cards, profiles) relative to the
+    # working directory, so run everything in a scratch folder
+    workdir = tempfile.mkdtemp(prefix="icore-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        print(f"{'case':45} {'median':>13} {'min':>13} {'baseline':>13} {'ratio':>7}")
+        for name, rounds, fn in selected:
+            result = time_case(fn, min(args.repeat, rounds or args.repeat))
+            results[name] = {key: round(value, 6) if isinstance(value, float) else value for key, value in result.items()}
+
+            baseline = baselines.get(name, {}).get("median")
+            ratio = result["median"] / baseline if baseline else None
+            if ratio and args.check and ratio > args.check:
+                regressions.append(name)
+            print(f"{name:45} {format_seconds(result['median'])} {format_seconds(result['min'])} "
+                  f"{format_seconds(baseline) if baseline else '':>13} {f'{ratio:.2f}x' if ratio else '':>7}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"created": time.strftime("%Y-%m-%d"), "machine": machine_info(), "cases": results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    if args.save:
+        if args.only:
+            # Keep the stored numbers for cases that were not run
+            report["cases"] = {**baselines, **results}
+        with open(BASELINES_JSON, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Saved {len(results)} baselines to {BASELINES_JSON}")
+
+    if regressions:
+        print(f"{len(regressions)} cases slower than {args.check}x their baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Synthetic Statcast and Retrosheet data for offline benchmarks.
+
+Pitch frames have the columns the card pipeline reads from statcast_batter /
+statcast_pitcher (plus ids and dates), one row per pitch with events set on
+the last pitch of each plate appearance. Outcome, batted-ball, count and
+handedness mixes are close to a recent MLB season so that group sizes and
+category cardinalities match real data. Everything is seeded.
+
+StatcastStandIn serves a pitch frame through the statcast / statcast_batter
+/ statcast_pitcher call signature and can inject failures and latency, for
+exercising statcast_ingest without the network.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Share of plate appearances ending in each event, roughly 2023-24 MLB
+EVENT_WEIGHTS = {
+    "field_out": 0.330, "strikeout": 0.224, "single": 0.141, "walk": 0.082, "double": 0.043,
+    "home_run": 0.030, "grounded_into_double_play": 0.019, "force_out": 0.018, "hit_by_pitch": 0.011,
+    "field_error": 0.008, "sac_fly": 0.006, "triple": 0.0035, "fielders_choice_out": 0.002,
+    "fielders_choice": 0.002, "sac_bunt": 0.002, "intent_walk": 0.002, "truncated_pa": 0.002,
+    "double_play": 0.001, "strikeout_double_play": 0.001, "catcher_interf": 0.0005, "sac_fly_double_play": 0.0001,
+}
+# Batted-ball type mix for balls in play
+BB_TYPE_WEIGHTS = {"ground_ball": 0.43, "fly_ball": 0.25, "line_drive": 0.21, "popup": 0.07, None: 0.04}
+NOT_IN_PLAY = {"strikeout", "walk", "hit_by_pitch", "intent_walk", "truncated_pa", "catcher_interf", "strikeout_double_play"}
+# Final-count marginals for plate appearances that are not a walk or strikeout
+BALLS_WEIGHTS = [0.36, 0.30, 0.21, 0.13]
+STRIKES_WEIGHTS = [0.27, 0.36, 0.37]
+BATTER_RIGHT_SHARE = 0.57
+PITCHER_RIGHT_SHARE = 0.72
+
+# Plate appearances per scale: one everyday player, one team season and a
+# full league season
+SCALES = {
+    "player": {"plate_appearances": 650, "batters": 1, "pitchers": 300},
+    "team": {"plate_appearances": 6_200, "batters": 26, "pitchers": 700},
+    "league": {"plate_appearances": 184_000, "batters": 650, "pitchers": 850},
+}
+
+SEASON_START = pd.Timestamp("2024-03-28")
+SEASON_DAYS = 186
+
+
+def _choice(rng, weights, size):
+    values = list(weights)
+    p = np.array(list(weights.values()), dtype=float)
+    codes = rng.choice(len(values), size=size, p=p / p.sum())
+    return np.array(values, dtype=object)[codes]
+
+
+def plate_appearances(n, batters=1, pitchers=300, seed=0):
+    """
+    One row per plate appearance: the terminal pitch's events, bb_type,
+    count, handedness, ids and date.
+    """
+    rng = np.random.default_rng(seed)
+    events = _choice(rng, EVENT_WEIGHTS, n)
+    in_play = ~np.isin(events, list(NOT_IN_PLAY))
+    bb_type = np.where(in_play, _choice(rng, BB_TYPE_WEIGHTS, n), None)
+
+    balls = rng.choice(4, size=n, p=BALLS_WEIGHTS)
+    strikes = rng.choice(3, size=n, p=STRIKES_WEIGHTS)
+    balls[(events == "walk")] = 3
+    strikes[(events == "strikeout") | (events == "strikeout_double_play")] = 2
+
+    # Handedness is a property of the player; a tenth of batters switch-hit
+    # and bat opposite the pitcher
+    batter_ids = 600000 + rng.permutation(100000)[:batters]
+    pitcher_ids = 500000 + rng.permutation(100000)[:pitchers]
+    batter_index = rng.integers(0, batters, n)
+    pitcher_index = rng.integers(0, pitchers, n)
+    pitcher_right = rng.random(pitchers) < PITCHER_RIGHT_SHARE
+    batter_right = rng.random(batters) < BATTER_RIGHT_SHARE
+    switch = rng.random(batters) < 0.1
+    p_throws = np.where(pitcher_right[pitcher_index], "R", "L")
+    stand = np.where(switch[batter_index], np.where(p_throws == "R", "L", "R"),
+                     np.where(batter_right[batter_index], "R", "L"))
+
+    days = np.sort(rng.integers(0, SEASON_DAYS, n))
+    return pd.DataFrame({
+        "game_date": SEASON_START + pd.to_timedelta(days, unit="D"),
+        "game_pk": 745000 + days * 15 + rng.integers(0, 15, n),
+        "batter": batter_ids[batter_index],
+        "pitcher": pitcher_ids[pitcher_index],
+        "events": events,
+        "bb_type": bb_type,
+        "balls": balls,
+        "strikes": strikes,
+        "stand": stand.astype(object),
+        "p_throws": p_throws.astype(object),
+    })
+
+
+def pitch_frame(n_plate_appearances, batters=1, pitchers=300, seed=0):
+    """
+    Pitch-level frame in Statcast's layout: about 3.9 rows per plate
+    appearance, with events and bb_type only on the last pitch and balls /
+    strikes giving the count before each pitch. Rows are newest first, as
+    Savant returns them.
+    """
+    rng = np.random.default_rng(seed + 1)
+    pas = plate_appearances(n_plate_appearances, batters, pitchers, seed)
+    final_balls = pas["balls"].to_numpy()
+    final_strikes = pas["strikes"].to_numpy()
+    # Pitches to reach the final count, plus fouls with two strikes
+    fouls = np.where(final_strikes == 2, rng.geometric(0.62, len(pas)) - 1, 0)
+    pitches = final_balls + final_strikes + fouls + 1
+
+    pa_index = np.repeat(np.arange(len(pas)), pitches)
+    starts = np.repeat(np.cumsum(pitches) - pitches, pitches)
+    pitch_number = np.arange(len(pa_index)) - starts + 1
+    last = pitch_number == pitches[pa_index]
+
+    # Walk the count up towards the final count: balls and strikes arrive in
+    # proportion, fouls are spent at two strikes
+    progress = (pitch_number - 1) / np.maximum(pitches[pa_index] - 1, 1)
+    balls = np.floor(progress * final_balls[pa_index]).astype(np.int64)
+    strikes = np.minimum(np.floor(progress * (final_strikes[pa_index] + fouls[pa_index])), final_strikes[pa_index]).astype(np.int64)
+    balls[last] = final_balls[pa_index[last]]
+    strikes[last] = final_strikes[pa_index[last]]
+
+    frame = pas.iloc[pa_index].reset_index(drop=True)
+    frame["events"] = np.where(last, frame["events"].to_numpy(), None)
+    frame["bb_type"] = np.where(last, frame["bb_type"].to_numpy(), None)
+    frame["balls"] = balls
+    frame["strikes"] = strikes
+    frame["at_bat_number"] = pa_index + 1
+    frame["pitch_number"] = pitch_number
+    return frame.iloc[::-1].reset_index(drop=True)
+
+
+def scale_frame(scale, seed=0):
+    """
+    pitch_frame at one of the SCALES presets.
+    """
+    spec = SCALES[scale]
+    return pitch_frame(spec["plate_appearances"], spec["batters"], spec["pitchers"], seed)
+
+
+class StatcastStandIn:
+    """
+    A local Baseball Savant. Calling it with (start_dt, end_dt) returns the
+    frame's rows on those dates (inclusive), newest first; with a player id
+    as well, only that player's rows in `role`. The first `fail_first`
+    calls, and after that a `failure_rate` share of calls at random, raise
+    ConnectionError instead. Each call sleeps `latency` seconds first.
+    Thread-safe; `calls` and `failures` count what happened.
+    """
+
+    def __init__(self, frame, role="batter", failure_rate=0.0, fail_first=0, latency=0.0, seed=0):
+        self.frame = frame.sort_values("game_date", ascending=False, kind="stable").reset_index(drop=True)
+        self.dates = self.frame["game_date"].to_numpy()[::-1]
+        self.role = role
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.latency = latency
+        self.rng = np.random.default_rng(seed)
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, start_dt, end_dt, player_id=None):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.fail_first or self.rng.random() < self.failure_rate
+            self.failures += fail
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"Injected failure fetching {start_dt} to {end_dt}")
+
+        # Dates are ascending in self.dates, so the range is one slice of the
+        # newest-first frame
+        n = len(self.dates)
+        first = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start_dt)), side="left")
+        end = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end_dt)), side="right")
+        rows = self.frame.iloc[n - end:n - first]
+        if player_id is not None:
+            rows = rows[rows[self.role].to_numpy() == player_id]
+        return rows.reset_index(drop=True)
+
+
+# Retrosheet play strings with the putouts and assists they credit, and a
+# relative frequency
+PLAYS = [
+    ("K", 22.0, (2,), ()), ("63/G", 8.0, (3,), (6,)), ("43/G", 7.5, (3,), (4,)), ("53/G", 4.5, (3,), (5,)),
+    ("13/G", 0.8, (3,), (1,)), ("8/F", 6.0, (8,), ()), ("7/F", 5.0, (7,), ()), ("9/F", 5.0, (9,), ()),
+    ("6/P", 1.5, (6,), ()), ("5/P", 1.0, (5,), ()), ("4/L", 1.0, (4,), ()), ("3/G", 1.0, (3,), ()),
+    ("S8/G", 5.0, (), ()), ("S7/L", 4.0, (), ()), ("S9/L.1-2", 3.0, (), ()), ("S6/G", 2.0, (), ()),
+    ("D7/L", 2.0, (), ()), ("D9/F.1-H", 2.0, (), ()), ("T8/F", 0.35, (), ()), ("HR/F7", 3.0, (), ()),
+    ("W", 8.0, (), ()), ("IW", 0.2, (), ()), ("HP", 1.1, (), ()), ("6(1)3/GDP", 1.9, (6, 3), (4,)),
+    ("54(1)/FO", 1.8, (4,), (5,)), ("FC6/G.1X2(64)", 0.4, (4,), (6,)), ("K+WP.1-2", 0.3, (2,), ()),
+    ("SB2", 0.8, (), ()), ("CS2(26)", 0.3, (6,), (2,)), ("WP.2-3", 0.3, (), ()), ("NP", 2.0, (), ()),
+    ("E6/G", 0.35, (), ()), ("E5/TH", 0.25, (), ()), ("E4/G", 0.2, (), ()), ("E9/F", 0.1, (), ()),
+    ("E1/TH", 0.05, (), ()), ("S7/L.2-H(E7/TH)", 0.15, (), ()), ("63/G.1-3(E3)", 0.1, (3,), (6,)),
+    ("PO1(E2/TH)", 0.05, (), ()), ("E2/F", 0.03, (), ()),
+]
+TEAMS = ["ANA", "ARI", "ATL", "BAL", "BOS", "CHA", "CHN", "CIN", "CLE", "COL", "DET", "HOU", "KCA", "LAN", "MIA",
+         "MIL", "MIN", "NYA", "NYN", "OAK", "PHI", "PIT", "SDN", "SEA", "SFN", "SLN", "TBA", "TEX", "TOR", "WAS"]
+PLAYS_COLUMNS = (["gid", "event", "inning", "top_bot", "batteam", "pitteam", "batter", "pitcher"]
+                 + [f"po{i}" for i in range(10)] + [f"a{i}" for i in range(1, 10)] + [f"f{i}" for i in range(2, 10)])
+
+
+def plays_frame(games=2430, plays_per_game=78, roster_size=26, seed=0):
+    """
+    Retrosheet plays.csv-style rows: one per play, with the defensive team,
+    putouts/assists by position and the fielder at f2..f9 (the pitcher is in
+    its own column, as in Retrosheet's file). Each team fields from a fixed
+    roster with a starting pitcher per game.
+    """
+    rng = np.random.default_rng(seed)
+    roster = np.array([[f"{team.lower()[:3]}{i:02d}{n:03d}" for n in range(roster_size)] for i, team in enumerate(TEAMS)], dtype=object)
+    n = games * plays_per_game
+    game = np.repeat(np.arange(games), plays_per_game)
+    home = rng.integers(0, len(TEAMS), games)
+    visitor = (home + rng.integers(1, len(TEAMS), games)) % len(TEAMS)
+    day = np.sort(rng.integers(0, SEASON_DAYS, games))
+    dates = (SEASON_START + pd.to_timedelta(day, unit="D")).strftime("%Y%m%d").to_numpy()
+    gid = np.array([f"{TEAMS[h]}{d}0" for h, d in zip(home, dates)], dtype=object)
+
+    top = np.tile(np.arange(plays_per_game) % 12 < 6, games)
+    defense = np.where(top, home[game], visitor[game])
+    offense = np.where(top, visitor[game], home[game])
+
+    # Per game and side: a starting pitcher and eight fielders from the roster
+    lineups = np.argsort(rng.random((games, 2, roster_size)), axis=2)[:, :, :9]
+    side = (~top).astype(int)
+    fielders = roster[defense[:, None], lineups[game, side]]
+
+    weights = np.array([play[1] for play in PLAYS])
+    codes = rng.choice(len(PLAYS), size=n, p=weights / weights.sum())
+    frame = pd.DataFrame({
+        "gid": gid[game],
+        "event": np.array([play[0] for play in PLAYS], dtype=object)[codes],
+        "inning": np.tile(np.arange(plays_per_game) * 9 // plays_per_game + 1, games),
+        "top_bot": (~top).astype(int),
+        "batteam": np.array(TEAMS, dtype=object)[offense],
+        "pitteam": np.array(TEAMS, dtype=object)[defense],
+        "batter": roster[offense, rng.integers(0, roster_size, n)],
+        "pitcher": fielders[:, 0],
+    })
+    for kind, credited in (("po", 2), ("a", 3)):
+        for position in range(0 if kind == "po" else 1, 10):
+            table = np.array([position in play[credited] for play in PLAYS], dtype=np.int8)
+            frame[f"{kind}{position}"] = table[codes]
+    for position in range(2, 10):
+        frame[f"f{position}"] = fielders[:, position - 1]
+    return frame[PLAYS_COLUMNS]
+
+
+def write_plays_csv(path, **kwargs):
+    """
+    Write plays_frame(**kwargs) to path. Returns the row count.
+    """
+    frame = plays_frame(**kwargs)
+    frame.to_csv(path, index=False)
+    return len(frame)
+
+
+def chadwick_register(frame):
+    """
+    A register frame in pybaseball.chadwick_register's layout naming every
+    batter and pitcher in a pitch frame, for resolving requests by name.
+    """
+    ids = np.unique(np.concatenate([frame["batter"].unique(), frame["pitcher"].unique()]))
+    return pd.DataFrame({
+        "name_first": [f"First{player_id}" for player_id in ids],
+        "name_last": [f"Last{player_id}" for player_id in ids],
+        "key_mlbam": ids,
+        "key_retro": [f"syn{player_id}" for player_id in ids],
+        "key_bbref": [f"syn{player_id}" for player_id in ids],
+        "key_fangraphs": -1,
+        "mlb_played_first": 2015,
+        "mlb_played_last": 2024,
+    })
@@ -1,11 +1,208 @@
+import argparse
 import csv
+import glob
+import hashlib
+import io
+import json
+import os
 import re
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 
 # Regex patterns to find errors in the "event" column
 error_pattern_explicit = re.compile(r'E(\d)/([TGF])')   # e.g. E6/T
 error_pattern_parenthetical = re.compile(r'\(E(\d)\)')  # e.g. (E6)
 
+POSITIONS = range(1, 10)
+CHUNK_ROWS = 100_000
+
+STAT_LABELS = ['T', 'G', 'F', 'PO', 'A']
+STAT_INDEX = {stat: i for i, stat in enumerate(STAT_LABELS)}
+# E0..E9: the error patterns accept any digit, not just real positions
+N_POSITIONS = 10
+POSITION_LABELS = np.array([f'E{i}' for i in range(N_POSITIONS)], dtype=object)
+
+# Bytes before a file's saved offset that must be unchanged to resume there
+RESUME_CHECK_BYTES = 4096
+# A file untouched this long is finished, so a last row without a newline is whole
+SETTLE_SECONDS = 2
+
+class FieldingAggregator:
+    """
+    Error, putout and assist counts held in a [player_team, position, stat]
+    int64 array. Player ids and teams are interned to integers and each
+    player_team row is a (player, team) pair, numbered in first-seen order.
+    first_seen[player_team, position] records when a cell was first touched
+    (-1 if never), so exports list rows in the same order as the original
+    nested dicts.
+    """
+
+    def __init__(self, capacity=1024):
+        self.player_ids = []
+        self.team_ids = []
+        self._player_index = {}
+        self._team_index = {}
+        self._pair_index = {}
+        self.n_pairs = 0
+        self.sequence = 0
+        self.pair_player = np.zeros(capacity, dtype=np.int64)
+        self.pair_team = np.zeros(capacity, dtype=np.int64)
+        self.counts = np.zeros((capacity, N_POSITIONS, len(STAT_LABELS)), dtype=np.int64)
+        self.first_seen = np.full((capacity, N_POSITIONS), -1, dtype=np.int64)
+
+    @staticmethod
+    def _intern(values, ids, index):
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(ids)
+                ids.append(value)
+            codes[i] = code
+        return codes
+
+    def _grow(self, n_pairs):
+        capacity = len(self.pair_player)
+        if n_pairs <= capacity:
+            return
+        capacity = max(n_pairs, 2 * capacity)
+
+        def grown(array, fill):
+            new = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            new[:len(array)] = array
+            return new
+
+        self.pair_player = grown(self.pair_player, 0)
+        self.pair_team = grown(self.pair_team, 0)
+        self.counts = grown(self.counts, 0)
+        self.first_seen = grown(self.first_seen, -1)
+
+    def _pair_rows(self, player_codes, team_codes):
+        """
+        player_team row for each (player, team) code pair, appending unseen
+        pairs in the order they first appear.
+        """
+        codes, keys = pd.factorize((player_codes << 32) | team_codes)
+        rows = np.empty(len(keys), dtype=np.int64)
+        new_keys = []
+        for i, key in enumerate(keys.tolist()):
+            row = self._pair_index.get(key)
+            if row is None:
+                row = self._pair_index[key] = self.n_pairs + len(new_keys)
+                new_keys.append(key)
+            rows[i] = row
+
+        if new_keys:
+            new_keys = np.array(new_keys, dtype=np.int64)
+            self._grow(self.n_pairs + len(new_keys))
+            self.pair_player[self.n_pairs:self.n_pairs + len(new_keys)] = new_keys >> 32
+            self.pair_team[self.n_pairs:self.n_pairs + len(new_keys)] = new_keys & 0xFFFFFFFF
+            self.n_pairs += len(new_keys)
+        return rows[codes]
+
+    def add(self, player_ids, teams, positions, stats, amounts):
+        """
+        Apply a batch of increments, given in the order they happened.
+        player_ids and teams are raw id strings; positions (0-9) and stats
+        (indexes into STAT_LABELS) are integer arrays.
+        """
+        if not len(player_ids):
+            return
+        player_codes, player_uniques = pd.factorize(np.asarray(player_ids, dtype=object))
+        team_codes, team_uniques = pd.factorize(np.asarray(teams, dtype=object))
+        player_codes = self._intern(player_uniques, self.player_ids, self._player_index)[player_codes]
+        team_codes = self._intern(team_uniques, self.team_ids, self._team_index)[team_codes]
+
+        rows = self._pair_rows(player_codes, team_codes)
+        positions = np.asarray(positions, dtype=np.int64)
+        np.add.at(self.counts, (rows, positions, np.asarray(stats, dtype=np.int64)), amounts)
+
+        cells, first = np.unique(rows * N_POSITIONS + positions, return_index=True)
+        first_seen = self.first_seen.reshape(-1)
+        untouched = first_seen[cells] < 0
+        first_seen[cells[untouched]] = self.sequence + first[untouched]
+        self.sequence += len(rows)
+
+    def merge(self, other):
+        """
+        Fold in a partial aggregator covering later events (e.g. the next
+        chunk from a parallel worker).
+        """
+        if not other.n_pairs:
+            self.sequence += other.sequence
+            return self
+        player_map = self._intern(other.player_ids, self.player_ids, self._player_index)
+        team_map = self._intern(other.team_ids, self.team_ids, self._team_index)
+        n = other.n_pairs
+        rows = self._pair_rows(player_map[other.pair_player[:n]], team_map[other.pair_team[:n]])
+
+        self.counts[rows] += other.counts[:n]
+        first_seen = self.first_seen[rows]
+        other_first_seen = other.first_seen[:n]
+        newly_touched = (first_seen < 0) & (other_first_seen >= 0)
+        first_seen[newly_touched] = self.sequence + other_first_seen[newly_touched]
+        self.first_seen[rows] = first_seen
+        self.sequence += other.sequence
+        return self
+
+    def to_arrays(self):
+        """
+        Aggregate state as plain arrays, e.g. for np.savez.
+        """
+        n = self.n_pairs
+        return {
+            'player_ids': np.array(self.player_ids, dtype=str),
+            'team_ids': np.array(self.team_ids, dtype=str),
+            'pair_player': self.pair_player[:n],
+            'pair_team': self.pair_team[:n],
+            'counts': self.counts[:n],
+            'first_seen': self.first_seen[:n],
+            'sequence': np.int64(self.sequence),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        n = len(arrays['pair_player'])
+        stats = cls(capacity=max(n, 1))
+        stats.player_ids = arrays['player_ids'].tolist()
+        stats.team_ids = arrays['team_ids'].tolist()
+        stats._player_index = {pid: i for i, pid in enumerate(stats.player_ids)}
+        stats._team_index = {team: i for i, team in enumerate(stats.team_ids)}
+        stats.pair_player[:n] = arrays['pair_player']
+        stats.pair_team[:n] = arrays['pair_team']
+        stats.counts[:n] = arrays['counts']
+        stats.first_seen[:n] = arrays['first_seen']
+        stats._pair_index = {key: i for i, key in enumerate(((stats.pair_player[:n] << 32) | stats.pair_team[:n]).tolist())}
+        stats.n_pairs = n
+        stats.sequence = int(arrays['sequence'])
+        return stats
+
+    def cells(self):
+        """
+        (player_team rows, positions) of every touched cell in export order:
+        pairs in first-seen order, positions within a pair likewise.
+        """
+        first_seen = self.first_seen[:self.n_pairs]
+        rows, positions = np.nonzero(first_seen >= 0)
+        order = np.lexsort((first_seen[rows, positions], rows))
+        return rows[order], positions[order]
+
+    def to_dict(self):
+        """
+        The nested {(player_id, team): {'E#': {stat: count}}} form the
+        row-by-row parser returns.
+        """
+        stats_by_player_team = {}
+        rows, positions = self.cells()
+        for row, position, counts in zip(rows.tolist(), positions.tolist(), self.counts[rows, positions].tolist()):
+            key = (self.player_ids[self.pair_player[row]], self.team_ids[self.pair_team[row]])
+            stats_by_player_team.setdefault(key, {})[POSITION_LABELS[position]] = dict(zip(STAT_LABELS, counts))
+        return stats_by_player_team
+
 def load_player_names(player_csv):
     """
     Loads allplayers.csv into a dictionary:
@@ -94,58 +291,350 @@ def process_event_data(input_csv):
 
     return stats_by_player_team
 
-def export_stats_to_csv(stats_by_player_team, player_names, output_csv):
+def select_event_columns(header, extra_columns=()):
+    """
+    The columns of a plays file the parser actually reads, in file order.
+    """
+    wanted = {'event', 'pitteam', 'f0', *extra_columns} | {f'{prefix}{i}' for prefix in ('f', 'po', 'a') for i in POSITIONS}
+    return [column for column in header if column in wanted]
+
+def event_columns(input_csv, extra_columns=()):
+    with open(input_csv, mode='r', newline='') as f:
+        header = next(csv.reader(f), [])
+    return select_event_columns(header, extra_columns)
+
+def read_event_chunks(input_csvs, chunk_rows=CHUNK_ROWS):
+    """
+    Stream the plays files as DataFrames of at most chunk_rows rows, reading
+    only the needed columns with the C parser. Values are kept as the raw
+    strings the row-by-row parser sees.
+    """
+    for input_csv in input_csvs:
+        reader = pd.read_csv(input_csv, usecols=event_columns(input_csv), dtype=str,
+                             keep_default_na=False, na_filter=False, chunksize=chunk_rows)
+        for chunk in reader:
+            yield chunk
+
+def parse_counts(values):
+    """
+    int() of every value, with 0 wherever int() raises ValueError (empty
+    fields included), matching the row-by-row parser. Each distinct string
+    is only converted once.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    parsed = np.zeros(len(uniques), dtype=np.int64)
+    for i, value in enumerate(uniques):
+        try:
+            parsed[i] = int(value)
+        except ValueError:
+            pass
+    return parsed[codes]
+
+def process_event_chunk(chunk):
+    """
+    Parse one chunk of plays into a partial FieldingAggregator.
+    """
+    n_rows = len(chunk)
+    events = chunk['event'].to_numpy()
+    teams = chunk['pitteam'].to_numpy() if 'pitteam' in chunk else np.full(n_rows, 'UNKNOWN_TEAM', dtype=object)
+    fielders = {
+        i: chunk[f'f{i}'].to_numpy() if f'f{i}' in chunk else np.full(n_rows, 'UNKNOWN_ID', dtype=object)
+        for i in range(10)
+    }
+
+    # Putouts and assists for every (row, position) with a known fielder,
+    # in row-major order
+    putouts = np.zeros((n_rows, 9), dtype=np.int64)
+    assists = np.zeros((n_rows, 9), dtype=np.int64)
+    for i in POSITIONS:
+        if f'po{i}' in chunk:
+            putouts[:, i - 1] = parse_counts(chunk[f'po{i}'].to_numpy())
+        if f'a{i}' in chunk:
+            assists[:, i - 1] = parse_counts(chunk[f'a{i}'].to_numpy())
+    known = np.stack([fielders[i] != 'UNKNOWN_ID' for i in POSITIONS], axis=1)
+    po_rows, po_positions = np.nonzero(((putouts != 0) | (assists != 0)) & known)
+    po_players = np.stack([fielders[i] for i in POSITIONS], axis=1)[po_rows, po_positions]
+
+    # Only events containing an 'E' can match either error pattern
+    error_rows, error_players, error_positions, error_stats = [], [], [], []
+    for row in np.flatnonzero(chunk['event'].str.contains('E', regex=False).to_numpy()).tolist():
+        event_str = events[row]
+        matches = error_pattern_explicit.findall(event_str)
+        matches += [(pos_str, 'G') for pos_str in error_pattern_parenthetical.findall(event_str)]
+        for (pos_str, err_type) in matches:
+            error_rows.append(row)
+            error_players.append(fielders[int(pos_str)][row])
+            error_positions.append(int(pos_str))
+            error_stats.append(STAT_INDEX[err_type])
+
+    # Every putout/assist cell is a PO and an A increment (either may be 0,
+    # which still creates the row). A stable sort on the play row puts each
+    # play's errors before its putouts and assists, as the row-by-row parser does.
+    rows = np.concatenate([error_rows, po_rows, po_rows]).astype(np.int64)
+    order = np.argsort(rows, kind='stable')
+    stats = FieldingAggregator()
+    stats.add(
+        np.concatenate([np.array(error_players, dtype=object), po_players, po_players])[order],
+        teams[rows[order]],
+        np.concatenate([error_positions, po_positions + 1, po_positions + 1]).astype(np.int64)[order],
+        np.concatenate([error_stats, np.full(len(po_rows), STAT_INDEX['PO']), np.full(len(po_rows), STAT_INDEX['A'])]).astype(np.int64)[order],
+        np.concatenate([np.ones(len(error_rows), dtype=np.int64), putouts[po_rows, po_positions], assists[po_rows, po_positions]])[order],
+    )
+    return stats
+
+def merge_stats(stats_by_player_team, partial):
+    """
+    Fold a later chunk's partial stats into the running totals, keeping
+    first-seen key order.
+    """
+    for key, positions_dict in partial.items():
+        totals = stats_by_player_team.setdefault(key, {})
+        for position_label, stat_dict in positions_dict.items():
+            if position_label not in totals:
+                totals[position_label] = stat_dict
+            else:
+                for stat, count in stat_dict.items():
+                    totals[position_label][stat] += count
+    return stats_by_player_team
+
+def process_event_chunks(chunks, workers=None):
+    """
+    Parse chunks on a process pool (a bounded number in flight) and merge
+    them back in order into one FieldingAggregator.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = FieldingAggregator()
+
+    if workers == 1:
+        for chunk in chunks:
+            stats.merge(process_event_chunk(chunk))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_event_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                stats.merge(pending.popleft().result())
+        while pending:
+            stats.merge(pending.popleft().result())
+    return stats
+
+def process_event_files(input_csvs, workers=None, chunk_rows=CHUNK_ROWS):
+    """
+    Streaming, multi-core version of process_event_data over one or more
+    plays files. The resulting FieldingAggregator's to_dict() is identical
+    to running process_event_data over the files concatenated.
+    """
+    return process_event_chunks(read_event_chunks(input_csvs, chunk_rows), workers)
+
+def load_checkpoint(checkpoint_path):
+    """
+    Aggregate state, processed game ids and per-file read offsets saved by
+    the last incremental run, or an empty checkpoint.
+    """
+    if not os.path.isfile(checkpoint_path):
+        return {'stats': FieldingAggregator(), 'games': set(), 'files': {}}
+    with np.load(checkpoint_path) as saved:
+        return {
+            'stats': FieldingAggregator.from_arrays(saved),
+            'games': set(saved['games'].tolist()),
+            'files': json.loads(str(saved['files'])),
+        }
+
+def save_checkpoint(checkpoint_path, checkpoint):
+    """
+    Write the checkpoint to a temporary file and rename it into place.
+    """
+    tmp_path = f'{checkpoint_path}.tmp.npz'
+    np.savez_compressed(
+        tmp_path,
+        games=np.array(sorted(checkpoint['games']), dtype=str),
+        files=np.array(json.dumps(checkpoint['files'])),
+        **checkpoint['stats'].to_arrays(),
+    )
+    os.replace(tmp_path, checkpoint_path)
+
+def last_line_end(f, start, end, block=65536):
+    """
+    Offset just past the last newline in f between start and end, or start
+    when there is none.
+    """
+    pos = end
+    while pos > start:
+        block_start = max(start, pos - block)
+        f.seek(block_start)
+        newline = f.read(pos - block_start).rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        pos = block_start
+    return start
+
+def read_new_event_chunks(input_csvs, checkpoint, chunk_rows=CHUNK_ROWS):
+    """
+    Stream only the plays added since the checkpoint. Each file is read from
+    its saved byte offset when the bytes before it are unchanged (an append),
+    and from the top otherwise. Everything past the offset is new, including
+    the rest of a game the last run stopped in the middle of. A file read
+    from the top drops the rows of games processed by an earlier run, except
+    the rows of the game it was cut in past the ones already counted.
+    Updates checkpoint['files'] and checkpoint['games'].
+    """
+    seen_games = set(checkpoint['games'])
+    for input_csv in input_csvs:
+        key = os.path.abspath(input_csv)
+        with open(input_csv, 'rb') as f:
+            header = f.readline()
+            data_start = f.tell()
+            # Stop at the last complete line in case the file is still being
+            # written; once it has settled, its end is the end of the last row
+            size = f.seek(0, os.SEEK_END)
+            end = last_line_end(f, data_start, size)
+            if end < size and time.time() - os.fstat(f.fileno()).st_mtime >= SETTLE_SECONDS:
+                end = size
+
+            start = data_start
+            saved = checkpoint['files'].get(key) or {}
+            if saved and data_start <= saved['offset'] <= end and saved['header'] == hashlib.sha1(header).hexdigest():
+                f.seek(max(data_start, saved['offset'] - RESUME_CHECK_BYTES))
+                if hashlib.sha1(f.read(saved['offset'] - f.tell())).hexdigest() == saved['tail']:
+                    start = saved['offset']
+            appended = start > data_start
+
+            f.seek(max(data_start, end - RESUME_CHECK_BYTES))
+            # The game the offset falls in, with its rows up to there, which
+            # a later read from the top must not count twice
+            entry = checkpoint['files'][key] = {
+                'offset': end,
+                'header': hashlib.sha1(header).hexdigest(),
+                'tail': hashlib.sha1(f.read(end - f.tell())).hexdigest(),
+                'open_game': saved.get('open_game') if appended or start >= end else None,
+                'open_rows': saved.get('open_rows', 0) if appended or start >= end else 0,
+            }
+            if start >= end:
+                continue
+            f.seek(start)
+            data = header + f.read(end - start)
+
+        # Rows of the previous run's open game already counted from the top
+        skip_game, skip_rows = (None, 0) if appended else (saved.get('open_game'), saved.get('open_rows', 0))
+        columns = select_event_columns(next(csv.reader([header.decode()]), []), ['gid'])
+        reader = pd.read_csv(io.BytesIO(data), usecols=columns, dtype=str,
+                             keep_default_na=False, na_filter=False, chunksize=chunk_rows)
+        for chunk in reader:
+            if 'gid' in chunk and len(chunk):
+                gids = chunk['gid']
+                last = gids.iloc[-1]
+                run = int((gids == last).sum())
+                if last == entry['open_game'] and gids.iloc[0] == last:
+                    entry['open_rows'] += run
+                else:
+                    entry['open_game'], entry['open_rows'] = last, run
+
+                if not appended:
+                    keep = ~gids.isin(seen_games)
+                    if skip_game is not None:
+                        in_skip_game = gids == skip_game
+                        keep |= in_skip_game & (in_skip_game.cumsum() > skip_rows)
+                        skip_rows = max(0, skip_rows - int(in_skip_game.sum()))
+                    chunk = chunk[keep.to_numpy()]
+                checkpoint['games'].update(chunk['gid'].unique().tolist())
+            if len(chunk):
+                yield chunk
+
+
+def update_incremental(input_csvs, checkpoint_path, workers=None, chunk_rows=CHUNK_ROWS):
+    """
+    Fold the games added since the last run into the checkpointed totals and
+    save the new checkpoint. Returns (stats, number of new games).
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    n_games = len(checkpoint['games'])
+    new_stats = process_event_chunks(read_new_event_chunks(input_csvs, checkpoint, chunk_rows), workers)
+    checkpoint['stats'].merge(new_stats)
+    save_checkpoint(checkpoint_path, checkpoint)
+    return checkpoint['stats'], len(checkpoint['games']) - n_games
+
+def export_stats_to_csv(stats, player_names, output_csv):
     """
     Write a CSV with columns:
       playerid, first, last, team, position, T_error, G_error, F_error, putouts, assists
+    straight from a FieldingAggregator's arrays.
     """
-    with open(output_csv, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([
-            'Player ID', 'First', 'Last', 'Team',
-            'position', 'Throw E', 'Field E', 'Catch E', 'PO', 'ASST'
-        ])
-
-        # stats_by_player_team is keyed by (player_id, team)
-        for (pid, team), positions_dict in stats_by_player_team.items():
-            # Look up first/last name from allplayers.csv data
-            names = player_names.get(pid, {})
-            first = names.get('first', '')
-            last = names.get('last', '')
-
-            for position_label, stat_dict in positions_dict.items():
-                t_count = stat_dict['T']
-                g_count = stat_dict['G']
-                f_count = stat_dict['F']
-                po_count = stat_dict['PO']
-                a_count = stat_dict['A']
-
-                writer.writerow([
-                    pid,
-                    first,
-                    last,
-                    team,
-                    position_label,
-                    t_count,
-                    g_count,
-                    f_count,
-                    po_count,
-                    a_count
-                ])
+    rows, positions = stats.cells()
+    counts = stats.counts[rows, positions]
+    player_codes = stats.pair_player[rows]
+
+    # Look up first/last name from allplayers.csv data, once per player
+    names = [player_names.get(pid, {}) for pid in stats.player_ids]
+    first = np.array([n.get('first', '') for n in names], dtype=object)
+    last = np.array([n.get('last', '') for n in names], dtype=object)
+
+    frame = pd.DataFrame({
+        'Player ID': np.array(stats.player_ids, dtype=object)[player_codes],
+        'First': first[player_codes],
+        'Last': last[player_codes],
+        'Team': np.array(stats.team_ids, dtype=object)[stats.pair_team[rows]],
+        'position': POSITION_LABELS[positions],
+        'Throw E': counts[:, STAT_INDEX['T']],
+        'Field E': counts[:, STAT_INDEX['G']],
+        'Catch E': counts[:, STAT_INDEX['F']],
+        'PO': counts[:, STAT_INDEX['PO']],
+        'ASST': counts[:, STAT_INDEX['A']],
+    })
+    # Same dialect as csv.writer: minimal quoting, \r\n line endings
+    frame.to_csv(output_csv, index=False, lineterminator='\r\n')
 
 def main():
+    parser = argparse.ArgumentParser(description="Summarize fielding errors, putouts and assists from Retrosheet plays")
+    parser.add_argument("plays", nargs="*", help="Plays CSV files, in order (e.g. one per season; default 2024plays.csv)")
+    parser.add_argument("--players", default='2024allplayers.csv', help="allplayers.csv used for names")
+    parser.add_argument("--output", default='error_summary.csv')
+    parser.add_argument("--workers", type=int, help="Parser processes (default: one per CPU)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows per parsed chunk")
+    parser.add_argument("--check", action="store_true",
+                        help="Also run the row-by-row parser and fail if its output differs")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only add games not in the checkpoint to the saved totals")
+    parser.add_argument("--checkpoint", help="Incremental state file (default <output>.checkpoint.npz)")
+    parser.add_argument("--drop-dir", help="Also read every *.csv in this directory, in name order (incremental mode)")
+    args = parser.parse_args()
+    if not args.plays and not args.drop_dir:
+        args.plays = ['2024plays.csv']
+
     # 1) Load player names from allplayers.csv
-    player_csv = '2024allplayers.csv'
-    player_names = load_player_names(player_csv)
+    player_names = load_player_names(args.players)
 
-    # 2) Process the Retrosheet data from retrosheet_event.csv
-    event_csv = '2024plays.csv'
-    stats_by_player = process_event_data(event_csv)
+    # 2) Process the Retrosheet plays in parallel chunks
+    start = time.perf_counter()
+    if args.incremental:
+        plays = list(args.plays)
+        if args.drop_dir:
+            plays += sorted(glob.glob(os.path.join(args.drop_dir, '*.csv')))
+        checkpoint_path = args.checkpoint or f'{args.output}.checkpoint.npz'
+        stats_by_player, new_games = update_incremental(plays, checkpoint_path, args.workers, args.chunk_rows)
+        print(f"Added {new_games} new game(s) from {len(plays)} plays file(s) in {time.perf_counter() - start:.1f}s")
+    else:
+        stats_by_player = process_event_files(args.plays, args.workers, args.chunk_rows)
+        print(f"Processed {len(args.plays)} plays file(s) in {time.perf_counter() - start:.1f}s")
 
     # 3) Export combined stats to error_summary.csv
-    output_csv = 'error_summary.csv'
-    export_stats_to_csv(stats_by_player, player_names, output_csv)
-    print(f"Exported stats with names to {output_csv}")
+    export_stats_to_csv(stats_by_player, player_names, args.output)
+    print(f"Exported stats with names to {args.output}")
+
+    if args.check and not args.incremental:
+        reference = {}
+        for event_csv in args.plays:
+            merge_stats(reference, process_event_data(event_csv))
+
+        # Compare as ordered lists so row order is checked too
+        def ordered(stats_by_player_team):
+            return [(key, [(label, dict(stat_dict)) for label, stat_dict in positions_dict.items()])
+                    for key, positions_dict in stats_by_player_team.items()]
+
+        if ordered(stats_by_player.to_dict()) != ordered(reference):
+            raise SystemExit(f"{args.output} differs from the row-by-row parser's output")
+        print("Output matches the row-by-row parser")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(REPO_FOLDER, "backend")]
+
+import card_cache
+from card_cache import CardCache
+
+KEY = (660271, 2024, "batter")
+calls_lock = threading.Lock()
+
+
+def slow_build(calls, card=None, cacheable=True):
+    def build():
+        with calls_lock:
+            calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return card or {"built": len(calls)}, cacheable
+    return build
+
+
+def test_concurrent_misses_build_once(tmp_path):
+    cache = CardCache(str(tmp_path))
+    calls = []
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        cards = list(executor.map(lambda _: cache.get_or_build(KEY, slow_build(calls)), range(8)))
+    assert len(calls) == 1
+    assert all(card == {"built": 1} for card in cards)
+    assert cache.misses == 1
+
+
+def test_caches_sharing_a_folder_build_once(tmp_path):
+    # Two caches stand in for two worker processes: the file lock and the
+    # disk re-check collapse their misses into one build
+    caches = [CardCache(str(tmp_path)) for _ in range(2)]
+    calls = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        cards = list(executor.map(lambda cache: cache.get_or_build(KEY, slow_build(calls)), caches))
+    assert len(calls) == 1
+    assert cards[0] == cards[1]
+
+
+def test_uncacheable_results_are_not_kept(tmp_path):
+    cache = CardCache(str(tmp_path))
+    calls = []
+    assert cache.get_or_build(KEY, slow_build(calls, {"error": "nope"}, cacheable=False)) == {"error": "nope"}
+    assert cache.get(KEY) is None
+    assert not os.path.exists(cache.path(KEY))
+    cache.get_or_build(KEY, slow_build(calls, {"error": "nope"}, cacheable=False))
+    assert len(calls) == 2
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = CardCache(str(tmp_path), max_entries=2)
+    for player_id in (1, 2, 3):
+        cache.put((player_id, 2024, "batter"), {"player": player_id})
+    assert cache.get_memory((1, 2024, "batter")) is None
+    assert cache.get_memory((3, 2024, "batter")) == {"player": 3}
+    # Still on disk, and read back into memory
+    assert cache.get((1, 2024, "batter")) == {"player": 1}
+    assert cache.get_memory((2, 2024, "batter")) is None
+
+
+def test_memory_tier_respects_byte_budget(tmp_path):
+    cache = CardCache(str(tmp_path), max_bytes=100)
+    cache.put((1, 2024, "batter"), {"data": "x" * 60})
+    cache.put((2, 2024, "batter"), {"data": "y" * 60})
+    assert cache.get_memory((1, 2024, "batter")) is None
+    assert cache.get_memory((2, 2024, "batter")) is not None
+    assert cache.stats()["bytes"] <= 100
+
+
+def test_version_change_invalidates_cards(tmp_path, monkeypatch):
+    old = CardCache(str(tmp_path))
+    old.put(KEY, {"engine": "old"})
+    assert CardCache(str(tmp_path)).get(KEY) == {"engine": "old"}
+
+    monkeypatch.setattr(card_cache, "ENGINE_VERSION", card_cache.ENGINE_VERSION + 1)
+    new = CardCache(str(tmp_path))
+    assert new.version != old.version
+    assert new.get(KEY) is None
+    calls = []
+    assert new.get_or_build(KEY, slow_build(calls, {"engine": "new"})) == {"engine": "new"}
+    assert old.get_disk(KEY) == {"engine": "old"}
+
+
+def test_lock_files_stay_out_of_card_folders(tmp_path):
+    cache = CardCache(str(tmp_path))
+    cache.get_or_build(KEY, slow_build([]))
+    assert os.listdir(os.path.dirname(cache.path(KEY))) == [os.path.basename(cache.path(KEY))]
+    assert os.path.isfile(cache.lock_path(KEY))
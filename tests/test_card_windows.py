@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(REPO_FOLDER, "backend"), os.path.join(REPO_FOLDER, "benchmarks")]
+
+import card_windows
+import statcast_store
+import synthetic
+from card_engine import build_card, card_from_counts
+
+YEAR = 2024
+WINDOWS = [(None, None), ("2024-05-01", "2024-06-15"), ("2024-07-04", None), (None, "2024-04-10"),
+           ("2024-06-01", "2024-06-01"), ("2024-08-10", "2024-08-01")]
+
+
+@pytest.fixture
+def season(tmp_path, monkeypatch):
+    monkeypatch.setattr(statcast_store, "STORE_FOLDER", str(tmp_path / "statcast"))
+    monkeypatch.setattr(card_windows, "STORE_FOLDER", str(tmp_path / "windows"))
+    monkeypatch.setattr(card_windows, "_seasons", {})
+    frame = synthetic.pitch_frame(6_200, batters=26, pitchers=700, seed=9)
+    statcast_store.write_season(YEAR, frame)
+    for role in ("batter", "pitcher"):
+        card_windows.build_season(YEAR, role)
+    return frame
+
+
+def in_window(frame, start_date, end_date):
+    dates = pd.to_datetime(frame["game_date"])
+    keep = np.ones(len(frame), dtype=bool)
+    if start_date:
+        keep &= dates >= pd.Timestamp(start_date)
+    if end_date:
+        keep &= dates <= pd.Timestamp(end_date)
+    return frame[keep]
+
+
+@pytest.mark.parametrize("role", ["batter", "pitcher"])
+def test_window_cards_match_cards_from_filtered_events(season, role):
+    players = season[role].value_counts().index[:5]
+    compared = 0
+    for player_id in players:
+        for start_date, end_date in WINDOWS:
+            events = in_window(season[season[role] == player_id], start_date, end_date)
+            counts = card_windows.window_counts(YEAR, player_id, role, start_date, end_date)
+            if not events["events"].notna().any():
+                assert not counts.any()
+                continue
+            assert card_from_counts(counts) == build_card(events, role), (player_id, start_date, end_date)
+            compared += 1
+    assert compared >= len(players) * 3
+
+
+def test_unknown_player_and_missing_season(season):
+    assert not card_windows.window_counts(YEAR, 1, "batter").any()
+    assert card_windows.window_counts(YEAR - 1, int(season["batter"].iloc[0]), "batter") is None
+
+
+def test_window_label_is_stable():
+    window = card_windows.CardWindow(((2023, 1.0), (2024, 2.5)), None, None)
+    assert str(window) == "2023x1+2024x2.5"
+    assert str(card_windows.CardWindow(((2024, 1.0),), "2024-05-01", "2024-06-01")) == "2024x1_2024-05-01_2024-06-01"
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(REPO_FOLDER, "backend"), os.path.join(REPO_FOLDER, "benchmarks")]
+
+import dice_tables
+import synthetic
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER
+from card_engine import build_card, build_cards
+from dice_tables import DICE_FACES, NO_RESULT
+
+
+def test_built_tables_agree_with_event_ranges():
+    frame = synthetic.pitch_frame(6_200, batters=26, pitchers=700, seed=4)
+    cards = list(build_cards(frame, "batter").values()) + list(build_cards(frame, "pitcher").values())[:100]
+    for card in cards:
+        encoded = dice_tables.card_tables(card)
+        compiled = dice_tables.compile_tables(card)
+        for name in ("lefty", "righty", "count"):
+            np.testing.assert_array_equal(encoded[name], compiled[name])
+
+
+def test_tables_resolve_each_face_like_the_records():
+    card = build_card(synthetic.pitch_frame(650, seed=8), "batter")
+    tables = dice_tables.card_tables(card)
+    for side in dice_tables.SIDES:
+        for record in card["event_ranges"][side]:
+            faces = tables[side][COUNT_ORDER.index(record['count_label']), record['range_start']:record['range_end'] + 1]
+            assert (faces == ALL_EVENTS_ORDER.index(record['event'])).all()
+    for record in card["count_frequencies"]:
+        faces = tables["count"][record['range_start']:record['range_end'] + 1]
+        assert (faces == COUNT_ORDER.index(record['count_label'])).all()
+
+
+def test_table_from_ends_matches_roll_table():
+    rng = np.random.default_rng(0)
+    labels = list(range(6))
+    for _ in range(200):
+        # Ranges laid end to end, some empty (-1 or not reaching past the
+        # previous end) and the last possibly short of or past face 999
+        ends = np.sort(rng.integers(-1, 1100, len(labels)))
+        ends[rng.random(len(labels)) < 0.2] = -1
+        records, start = [], 0
+        for label, end in zip(labels, ends):
+            if end >= start:
+                records.append({"label": label, "range_start": start, "range_end": int(end)})
+                start = int(end) + 1
+        expected = dice_tables.roll_table(records, labels, "label")
+        expected = np.where(expected < 0, NO_RESULT, expected)
+        np.testing.assert_array_equal(dice_tables.table_from_ends(ends, labels), expected)
+
+
+def test_stale_or_missing_tables_are_recompiled():
+    card = build_card(synthetic.pitch_frame(650, seed=8), "batter")
+    expected = dice_tables.compile_tables(card)
+    for stale in (None, dict(card["dice_tables"], format="uint16/base64"), dict(card["dice_tables"], events=["walk"])):
+        variant = dict(card, dice_tables=stale) if stale else {k: v for k, v in card.items() if k != "dice_tables"}
+        tables = dice_tables.card_tables(variant)
+        assert tables["lefty"].shape == (len(COUNT_ORDER), DICE_FACES)
+        np.testing.assert_array_equal(tables["righty"], expected["righty"])
+        np.testing.assert_array_equal(tables["count"], expected["count"])
+
+
+def test_encode_round_trip():
+    rng = np.random.default_rng(1)
+    sides = {side: rng.integers(0, 256, (len(COUNT_ORDER), DICE_FACES), dtype=np.uint8) for side in dice_tables.SIDES}
+    count = rng.integers(0, 256, DICE_FACES, dtype=np.uint8)
+    decoded = dice_tables.card_tables({"dice_tables": dice_tables.encode_tables(sides, count)})
+    for side in dice_tables.SIDES:
+        np.testing.assert_array_equal(decoded[side], sides[side])
+    np.testing.assert_array_equal(decoded["count"], count)
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import numpy as np
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(REPO_FOLDER, "backend"), os.path.join(REPO_FOLDER, "benchmarks")]
+
+import game_simulator
+import synthetic
+from card_constants import ALL_EVENTS_ORDER
+from card_engine import build_card
+from game_simulator import FIRST, SECOND, THIRD, transition
+
+LOADED = FIRST | SECOND | THIRD
+
+
+def test_walks_only_move_forced_runners():
+    assert transition("walk", 0, 0) == (0, FIRST, 0)
+    assert transition("walk", 1, SECOND) == (1, FIRST | SECOND, 0)
+    assert transition("hit_by_pitch", 2, FIRST | THIRD) == (2, LOADED, 0)
+    assert transition("catcher_interf", 0, LOADED) == (0, LOADED, 1)
+
+
+def test_hits_advance_every_runner_as_far_as_the_batter():
+    assert transition("single", 0, FIRST | THIRD) == (0, FIRST | SECOND, 1)
+    assert transition("field_error", 1, SECOND) == (1, FIRST | THIRD, 0)
+    assert transition("double", 0, FIRST) == (0, SECOND | THIRD, 0)
+    assert transition("double", 2, SECOND | THIRD) == (2, SECOND, 2)
+    assert transition("triple", 1, LOADED) == (1, THIRD, 3)
+    assert transition("home_run", 2, LOADED) == (2, 0, 4)
+
+
+def test_outs():
+    assert transition("strikeout", 0, LOADED) == (1, LOADED, 0)
+    assert transition("field_out_line_drive", 1, SECOND) == (2, SECOND, 0)
+    # Sacrifice fly only with fewer than two out
+    assert transition("field_out_fly_ball", 1, FIRST | THIRD) == (2, FIRST, 1)
+    assert transition("field_out_fly_ball", 2, THIRD) == (3, 0, 0)
+    # Ground outs move runners up with fewer than two out
+    assert transition("field_out_ground_ball", 0, FIRST | THIRD) == (1, SECOND, 1)
+    assert transition("field_out_ground_ball", 2, THIRD) == (3, 0, 0)
+
+
+def test_double_plays():
+    assert transition("double_play_combined", 0, FIRST | THIRD) == (2, 0, 1)
+    assert transition("double_play_combined", 0, LOADED) == (2, THIRD, 1)
+    # No run scores on the third out
+    assert transition("double_play_combined", 1, FIRST | THIRD) == (3, 0, 0)
+    # A plain ground out with first base empty
+    assert transition("sac_fly_double_play", 0, SECOND) == (1, THIRD, 0)
+
+
+def test_transition_tables_match_transition():
+    for e, event in enumerate(ALL_EVENTS_ORDER):
+        for outs in range(3):
+            for bases in range(8):
+                state = outs * 8 + bases
+                assert (game_simulator.NEXT_OUTS[e, state], game_simulator.NEXT_BASES[e, state],
+                        game_simulator.RUNS[e, state]) == transition(event, outs, bases)
+    # Inning-ending transitions clear the bases and score nothing
+    ended = game_simulator.NEXT_OUTS == 3
+    assert (game_simulator.NEXT_BASES[ended] == 0).all() and (game_simulator.RUNS[ended] == 0).all()
+
+
+def teams():
+    batter_frame = synthetic.pitch_frame(6_200, batters=9, pitchers=300, seed=5)
+    batter_cards = [build_card(frame, "batter") for _, frame in batter_frame.groupby("batter")]
+    pitcher_card = build_card(synthetic.pitch_frame(800, batters=300, pitchers=1, seed=6), "pitcher")
+    lineup = [(card, "R") for card in batter_cards]
+    return {"lineup": lineup, "pitcher": (pitcher_card, "R")}, {"lineup": lineup[::-1], "pitcher": (pitcher_card, "L")}
+
+
+def test_games_are_seeded_per_worker_count():
+    cdf = game_simulator.compile_teams(*teams())
+    home_team = np.ones(2 * game_simulator.MIN_GAMES_PER_WORKER, dtype=np.int64)
+    for workers in (1, 2):
+        first = game_simulator.simulate_schedule(cdf, home_team, seed=42, workers=workers)
+        again = game_simulator.simulate_schedule(cdf, home_team, seed=42, workers=workers)
+        np.testing.assert_array_equal(first, again)
+
+    # The pooled run is the per-worker streams merged back in schedule order
+    seeds = np.random.SeedSequence(42).spawn(2)
+    chunks = np.array_split(home_team, 2)
+    expected = np.concatenate([game_simulator._simulate_chunk(cdf, chunk, seed) for chunk, seed in zip(chunks, seeds)])
+    np.testing.assert_array_equal(game_simulator.simulate_schedule(cdf, home_team, seed=42, workers=2), expected)
+
+
+def test_games_end_by_the_rules():
+    cdf = game_simulator.compile_teams(*teams())
+    home_team = np.ones(2_000, dtype=np.int64)
+    scores = game_simulator.play_games(cdf, home_team, np.random.default_rng(1))
+    assert (scores >= 0).all()
+    # Ties only when extra innings run out
+    assert (scores[:, 0] != scores[:, 1]).mean() > 0.99
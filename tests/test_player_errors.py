@@ -0,0 +1,101 @@
+import io
+import os
+import sys
+import time
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_FOLDER, os.path.join(REPO_FOLDER, "benchmarks")]
+
+import player_errors
+import synthetic
+
+
+def full_run(tmp_path, seed=3):
+    plays = synthetic.plays_frame(games=40, plays_per_game=78, seed=seed)
+    full_csv = tmp_path / "full.csv"
+    plays.to_csv(full_csv, index=False)
+    return full_csv, player_errors.process_event_files([str(full_csv)], workers=1).to_dict()
+
+
+def settle(path):
+    past = time.time() - 2 * player_errors.SETTLE_SECONDS
+    os.utime(path, (past, past))
+
+
+def test_incremental_run_split_mid_game(tmp_path):
+    full_csv, expected = full_run(tmp_path)
+
+    # The first run sees the file cut off in the middle of game 10
+    lines = full_csv.read_bytes().splitlines(keepends=True)
+    cut = 1 + 10 * 78 + 30
+    growing_csv = tmp_path / "plays.csv"
+    growing_csv.write_bytes(b"".join(lines[:cut]))
+    checkpoint = str(tmp_path / "checkpoint.npz")
+    player_errors.update_incremental([str(growing_csv)], checkpoint, workers=1)
+
+    with open(growing_csv, "ab") as f:
+        f.write(b"".join(lines[cut:]))
+    stats, _ = player_errors.update_incremental([str(growing_csv)], checkpoint, workers=1)
+
+    assert stats.to_dict() == expected
+
+
+def test_incremental_rerun_adds_nothing(tmp_path):
+    plays_csv = tmp_path / "plays.csv"
+    synthetic.plays_frame(games=20, seed=4).to_csv(plays_csv, index=False)
+    checkpoint = str(tmp_path / "checkpoint.npz")
+    first, _ = player_errors.update_incremental([str(plays_csv)], checkpoint, workers=1)
+    expected = first.to_dict()
+
+    stats, new_games = player_errors.update_incremental([str(plays_csv)], checkpoint, workers=1)
+    assert new_games == 0
+    assert stats.to_dict() == expected
+
+
+def test_incremental_rewrite_after_mid_game_cut(tmp_path):
+    full_csv, expected = full_run(tmp_path)
+    lines = full_csv.read_bytes().splitlines(keepends=True)
+    cut = 1 + 10 * 78 + 30
+    growing_csv = tmp_path / "plays.csv"
+    growing_csv.write_bytes(b"".join(lines[:cut]))
+    checkpoint = str(tmp_path / "checkpoint.npz")
+    player_errors.update_incremental([str(growing_csv)], checkpoint, workers=1)
+
+    # Rewritten in place with different line endings, so it is read from the top
+    growing_csv.write_bytes(b"".join(line.rstrip(b"\n") + b"\r\n" for line in lines))
+    stats, _ = player_errors.update_incremental([str(growing_csv)], checkpoint, workers=1)
+
+    assert stats.to_dict() == expected
+
+
+def test_incremental_settled_file_without_final_newline(tmp_path):
+    full_csv, expected = full_run(tmp_path)
+    plays_csv = tmp_path / "plays.csv"
+    plays_csv.write_bytes(full_csv.read_bytes().rstrip(b"\n"))
+    settle(plays_csv)
+    checkpoint = str(tmp_path / "checkpoint.npz")
+
+    stats, _ = player_errors.update_incremental([str(plays_csv)], checkpoint, workers=1)
+    assert stats.to_dict() == expected
+
+
+def test_incremental_holds_back_line_being_written(tmp_path):
+    full_csv, expected = full_run(tmp_path)
+    data = full_csv.read_bytes()
+    partial = len(data) - 10
+    plays_csv = tmp_path / "plays.csv"
+    plays_csv.write_bytes(data[:partial])
+    checkpoint = str(tmp_path / "checkpoint.npz")
+    first, _ = player_errors.update_incremental([str(plays_csv)], checkpoint, workers=1)
+    assert first.to_dict() != expected
+
+    with open(plays_csv, "ab") as f:
+        f.write(data[partial:])
+    stats, _ = player_errors.update_incremental([str(plays_csv)], checkpoint, workers=1)
+    assert stats.to_dict() == expected
+
+
+def test_last_line_end_scans_past_one_block():
+    data = b"a,b\n" + b"x" * 50 + b"\n" + b"y" * 20
+    assert player_errors.last_line_end(io.BytesIO(data), 4, len(data), block=8) == len(data) - 20
+    assert player_errors.last_line_end(io.BytesIO(b"a,b\n" + b"y" * 20), 4, 24, block=8) == 4
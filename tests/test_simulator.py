@@ -0,0 +1,92 @@
+import os
+import sys
+
+import numpy as np
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(REPO_FOLDER, "backend"), os.path.join(REPO_FOLDER, "benchmarks")]
+
+import simulator
+import synthetic
+from card_constants import ALL_EVENTS_ORDER, COUNT_ORDER
+from card_engine import build_card
+from dice_tables import NO_RESULT
+
+
+def matchup_cards():
+    batter_card = build_card(synthetic.pitch_frame(650, batters=1, seed=1), "batter")
+    pitcher_card = build_card(synthetic.pitch_frame(800, batters=300, pitchers=1, seed=2), "pitcher")
+    return batter_card, pitcher_card
+
+
+def range_faces(records, label_key, labels, count_label=None):
+    """
+    Die faces each label covers in a card's range records.
+    """
+    faces = np.zeros(len(labels))
+    for record in records:
+        if count_label is not None and record['count_label'] != count_label:
+            continue
+        faces[labels.index(record[label_key])] += max(0, record['range_end'] - record['range_start'] + 1)
+    return faces
+
+
+def card_odds(batter_card, pitcher_card, pitcher_side, batter_side, preferences):
+    """
+    [count, card, event] odds read straight from the cards' range records.
+    """
+    odds = np.zeros((len(COUNT_ORDER), 2, len(ALL_EVENTS_ORDER)))
+    count_faces = range_faces(pitcher_card["count_frequencies"], 'count_label', COUNT_ORDER)
+    for c, count_label in enumerate(COUNT_ORDER):
+        for card_index, (card, side) in enumerate(((pitcher_card, pitcher_side), (batter_card, batter_side))):
+            event_faces = range_faces(card["event_ranges"][side], 'event', ALL_EVENTS_ORDER, count_label)
+            odds[c, card_index] = count_faces[c] * preferences[count_label][simulator.CARDS[card_index]] * event_faces
+    return odds / odds.sum()
+
+
+def test_compiled_probabilities_match_card_odds():
+    batter_card, pitcher_card = matchup_cards()
+    preferences = simulator.load_card_preferences()
+    for batter_hand, pitcher_hand in (("R", "R"), ("L", "R"), ("S", "L")):
+        compiled = simulator.compile_matchup(batter_card, pitcher_card, batter_hand, pitcher_hand, preferences)
+        pitcher_side, batter_side = simulator.card_sides(batter_hand, pitcher_hand)
+        expected = card_odds(batter_card, pitcher_card, pitcher_side, batter_side, preferences)
+        assert compiled["shape"] == expected.shape
+        np.testing.assert_allclose(compiled["probabilities"], expected, rtol=0, atol=1e-12)
+
+
+def test_alias_table_reproduces_probabilities():
+    probabilities = np.random.default_rng(0).dirichlet(np.full(50, 0.3))
+    thresholds, aliases = simulator.alias_table(probabilities)
+    # Each cell keeps thresholds[i] of its own 1/n slot and gives the rest to its alias
+    rebuilt = thresholds.copy()
+    np.add.at(rebuilt, aliases, 1 - thresholds)
+    np.testing.assert_allclose(rebuilt / len(probabilities), probabilities, atol=1e-12)
+
+
+def test_rolls_land_on_compiled_cells():
+    batter_card, pitcher_card = matchup_cards()
+    compiled = simulator.compile_matchup(batter_card, pitcher_card)
+    rng = np.random.default_rng(3)
+    rolls = np.column_stack([rng.integers(0, 1000, 5000), rng.integers(0, 100, 5000), rng.integers(0, 1000, 5000)])
+
+    counts, cards, events = simulator.resolve_rolls(batter_card, pitcher_card, rolls)
+    resolved = (counts != NO_RESULT) & (events != NO_RESULT)
+    assert resolved.any()
+    assert (compiled["probabilities"][counts[resolved], cards[resolved], events[resolved]] > 0).all()
+
+
+def test_simulation_is_seeded():
+    batter_card, pitcher_card = matchup_cards()
+    compiled = simulator.compile_matchup(batter_card, pitcher_card)
+    first = simulator.simulate_plate_appearances(compiled, 20_000, seed=7)
+    again = simulator.simulate_plate_appearances(compiled, 20_000, seed=7, batch_size=3_000)
+    assert first.sum() == 20_000
+    np.testing.assert_array_equal(first, again)
+
+
+def test_simulated_events_follow_probabilities():
+    batter_card, pitcher_card = matchup_cards()
+    compiled = simulator.compile_matchup(batter_card, pitcher_card)
+    tally = simulator.simulate_plate_appearances(compiled, 200_000, seed=11)
+    np.testing.assert_allclose(tally.sum(axis=(0, 1)) / 200_000, compiled["probabilities"].sum(axis=(0, 1)), atol=0.005)